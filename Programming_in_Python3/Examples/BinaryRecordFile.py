@@ -104,8 +104,82 @@
 >>> os.path.getsize(filename)
 18
 >>> os.remove(filename)
+
+>>> test = BinaryRecordFile(filename, S.size, memory_map=True)
+>>> for i, text in enumerate((b"Alpha", b"Bravo", b"Charlie", b"Delta")):
+...     test[i] = S.pack(text)
+>>> record = test[2]
+>>> record.tobytes().rstrip(bytes(1)), len(test)
+(b'Charlie', 4)
+>>> test[6] = S.pack(b"Golf")
+>>> record.tobytes().rstrip(bytes(1)), len(test), test[5]
+(b'Charlie', 7, None)
+>>> del test[0]
+>>> test.inplace_compact()
+Traceback (most recent call last):
+...
+BufferError: can't compact a memory mapped file while its items are in use
+>>> record.release()
+>>> test.inplace_compact()
+>>> [bytes(test[i]).rstrip(bytes(1)) for i in range(len(test))]
+[b'Bravo', b'Charlie', b'Delta', b'Golf']
+>>> os.path.getsize(filename)
+36
+>>> test.close()
+>>> with BinaryRecordFile(filename, S.size, memory_map=True) as test:
+...     len(test), test.append(S.pack(b"Hotel"))
+(4, 4)
+>>> os.path.getsize(filename)
+45
+>>> os.remove(filename)
+
+>>> test = BinaryRecordFile(filename, S.size)
+>>> for text in (b"Alpha", b"Bravo", b"Charlie", b"Delta", b"Echo"):
+...     index = test.append(S.pack(text))
+>>> del test[1]
+>>> del test[3]
+>>> test.fragmentation()
+FragmentationStats(slots=5, records=3, free=2, ratio=0.4)
+>>> test.append(S.pack(b"Foxtrot"))
+1
+>>> test.close()
+>>> test = BinaryRecordFile(filename, S.size)
+>>> test.append(S.pack(b"Golf"))
+3
+>>> del test[0]
+>>> del test[2]
+>>> test.incremental_compact(1)
+([(4, 0)], FragmentationStats(slots=4, records=3, free=1, ratio=0.25))
+>>> test.incremental_compact()
+([(3, 2)], FragmentationStats(slots=3, records=3, free=0, ratio=0.0))
+>>> [test[i].rstrip(bytes(1)) for i in range(len(test))]
+[b'Echo', b'Foxtrot', b'Golf']
+>>> test.close()
+>>> os.remove(filename)
+>>> os.remove(filename + ".free")
+
+>>> test = BinaryRecordFile(filename, S.size)
+>>> test.write_many({2: S.pack(b"Charlie"), 0: S.pack(b"Alpha"),
+...                  1: S.pack(b"Bravo"), 5: S.pack(b"Foxtrot")})
+>>> len(test)
+6
+>>> del test[1]
+>>> [x and x.rstrip(bytes(1)) for x in test.read_many([5, 0, 1, 2, 0])]
+[b'Foxtrot', b'Alpha', None, b'Charlie', b'Alpha']
+>>> test.read_many([1, 6])
+Traceback (most recent call last):
+...
+IndexError: no record at index position 6
+>>> [(i, x.rstrip(bytes(1))) for i, x in test.bulk_iter(chunk_size=20)]
+[(0, b'Alpha'), (2, b'Charlie'), (5, b'Foxtrot')]
+>>> test.close()
+>>> os.remove(filename)
 """
 
+import array
+import collections
+import heapq
+import mmap
 import os
 import struct
 import tempfile
@@ -113,18 +187,59 @@ import tempfile
 
 _DELETED = b"\x01"
 _OKAY = b"\x02"
+_SCAN_CHUNK = 1 << 20  # bytes read at a time when scanning the records
+_MAP_CHUNK = 1 << 22   # memory mapped files grow 4MB at a time
+
+FragmentationStats = collections.namedtuple("FragmentationStats",
+                                            "slots records free ratio")
 
 
 class BinaryRecordFile:
 
-    def __init__(self, filename, record_size, auto_flush=True):
+    def __init__(self, filename, record_size, auto_flush=True,
+                 memory_map=False):
         """A random access binary file that behaves rather like a list
         with each item a bytes or bytesarray object of record_size.
+
+        If memory_map is True the file is accessed through a memory
+        map: items are returned as memoryviews of the map rather than
+        copied into bytes, and reading or writing an item doesn't need
+        any system calls. Writes go straight into the operating
+        system's cache, so auto_flush doesn't flush each one; flush()
+        (and close()) writes the changed pages to disk. While the file
+        is open it is extended in chunks of _MAP_CHUNK bytes so it
+        isn't resized for every append; flush() and close() trim it to
+        the records written. A program that ends without calling either
+        leaves the file padded with blank records, but all the writes
+        made before the last flush() are on disk (and after a process
+        crash, as opposed to a system crash, so are the later ones).
+        Items must not be used after close(). Compacting the file in
+        place raises BufferError while any items are in use (release()
+        them, or copy them with bytes()), since touching an item whose
+        record had been cut off the end of the file would crash the
+        process.
+
+        The free slots (blank or deleted records) that append() reuses
+        are kept in a filename.free file alongside the records file,
+        so the records file's format is unchanged.
         """
         self.__record_size = record_size + 1
-        mode = "w+b" if not os.path.exists(filename) else "r+b"
-        self.__fh = open(filename, mode)
+        new = not os.path.exists(filename)
+        self.__fh = open(filename, "w+b" if new else "r+b")
         self.auto_flush = auto_flush
+        self.__map = None
+        self.__mapped = False
+        if memory_map:
+            self.__open_map()
+        self.__free = None  # Set of free slots, read or found when needed
+        self.__free_heap = None
+        self.__free_changed = False
+        self.__free_stamp = None
+        if new:
+            if os.path.exists(self.__free_filename()):
+                os.remove(self.__free_filename())
+        elif os.path.exists(self.__free_filename()):
+            self.__free_slots()
 
 
     @property
@@ -139,34 +254,437 @@ class BinaryRecordFile:
         return self.__fh.name
 
 
+    @property
+    def memory_mapped(self):
+        "True if the file is accessed through a memory map"
+        return self.__mapped
+
+
+    def __open_map(self):
+        self.__fh.seek(0, os.SEEK_END)
+        # __end is where the records end, __file_size where the file
+        # (which may be padded to a whole chunk) ends
+        self.__end = self.__file_size = self.__fh.tell()
+        self.__dirty = None
+        self.__old_maps = []    # Replaced maps that items still use
+        self.__mapped = True
+        # An empty file can't be mapped, so it is mapped by the first write
+        self.__map = (mmap.mmap(self.__fh.fileno(), self.__end)
+                      if self.__end else None)
+
+
+    def __reserve(self, size):
+        """Extends the file to a multiple of _MAP_CHUNK bytes that is
+        at least size bytes, and maps it
+        """
+        if size > self.__file_size:
+            self.__file_size = -(-size // _MAP_CHUNK) * _MAP_CHUNK
+            self.__fh.truncate(self.__file_size)
+        if self.__map is None:
+            self.__map = mmap.mmap(self.__fh.fileno(), self.__file_size)
+        elif len(self.__map) < self.__file_size:
+            self.__remap(self.__file_size)
+
+
+    def __remap(self, size):
+        """Maps size bytes of the file
+
+        The map is resized in place if possible, but a map can't be
+        resized while memoryviews of it are in use, so then a new map
+        replaces it; the old one stays valid until the last of its
+        memoryviews is released.
+        """
+        try:
+            self.__map.resize(size)
+            return
+        except (BufferError, SystemError):
+            pass    # Items are in use, or mremap() isn't available
+        try:
+            self.__map.close()
+        except BufferError:
+            self.__old_maps.append(self.__map)
+        self.__map = mmap.mmap(self.__fh.fileno(), size)
+
+
+    def __items_in_use(self):
+        "Returns True if any memoryviews of the map are in use"
+        for old in self.__old_maps[:]:
+            try:
+                old.close()
+            except BufferError:
+                return True
+            self.__old_maps.remove(old)
+        if self.__map is not None:
+            try:
+                self.__map.close()  # Only possible with no memoryviews
+            except BufferError:
+                return True
+            self.__map = (mmap.mmap(self.__fh.fileno(), self.__file_size)
+                          if self.__file_size else None)
+        return False
+
+
+    def __check_compactable(self):
+        if self.__mapped and self.__items_in_use():
+            raise BufferError("can't compact a memory mapped file while "
+                              "its items are in use")
+
+
+    def __flush_map(self):
+        if self.__map is not None and self.__dirty is not None:
+            start = (self.__dirty[0] // mmap.PAGESIZE) * mmap.PAGESIZE
+            end = min(self.__dirty[1], self.__end)
+            if end > start:
+                self.__map.flush(start, end - start)
+        self.__dirty = None
+        if self.__file_size > self.__end:
+            # Trim the padding; the map may stay longer than the file
+            # since nothing beyond the records is ever touched
+            self.__fh.truncate(self.__end)
+            self.__file_size = self.__end
+
+
+    def __close_map(self):
+        "Writes the map to disk and unmaps it"
+        self.flush()
+        for old in self.__old_maps + [self.__map]:
+            if old is not None:
+                try:
+                    old.close()
+                except BufferError:
+                    pass    # Items still in use keep it mapped until released
+        self.__map = None
+        self.__old_maps = []
+        self.__mapped = False
+
+
+    def __size(self):
+        "Returns the size of the file's records in bytes"
+        if self.__mapped:
+            return self.__end
+        if self.auto_flush:
+            self.__fh.flush()
+        self.__fh.seek(0, os.SEEK_END)
+        return self.__fh.tell()
+
+
+    def __read(self, offset, size):
+        if self.__mapped:
+            return memoryview(self.__map)[offset:offset + size]
+        self.__fh.seek(offset)
+        return self.__fh.read(size)
+
+
+    def __write(self, offset, data, flush=True):
+        if not self.__mapped:
+            self.__fh.seek(offset)
+            self.__fh.write(data)
+            if flush and self.auto_flush:
+                self.__fh.flush()
+            return
+        end = offset + len(data)
+        if end > self.__end:
+            if end > self.__file_size:
+                self.__reserve(end)
+            self.__end = end
+        self.__map[offset:end] = data
+        if self.__dirty is None:
+            self.__dirty = [offset, end]
+        else:
+            self.__dirty = [min(self.__dirty[0], offset),
+                            max(self.__dirty[1], end)]
+
+
+    def __truncate(self, size):
+        if self.__free is not None:
+            for index in range(-(-size // self.__record_size), len(self)):
+                self.__free.discard(index)
+            self.__free_changed = True
+        if not self.__mapped:
+            self.__fh.truncate(size)
+            return
+        if size < self.__end:
+            # Blank the cut off records in case the file is extended
+            # again before flush() trims it
+            self.__write(size, bytes(self.__end - size), flush=False)
+            self.__end = size
+
+
     def flush(self):
         """Flush writes to disk
-        Done automatically if auto_flush is True
+        Done automatically if auto_flush is True (except for changes to
+        memory mapped files, which are flushed as one batch)
         """
+        if self.__mapped:
+            self.__flush_map()
         self.__fh.flush()
+        self.__save_free()
 
 
     def close(self):
+        if self.__mapped:
+            self.__close_map()
+        self.__save_free()
         self.__fh.close()
 
 
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *ignore):
+        self.close()
+
+
+    def __free_filename(self):
+        return self.__fh.name + ".free"
+
+
+    def __free_slots(self):
+        """Returns the set of free slots, reading them from the .free
+        file, or if it is missing or out of date, by scanning the
+        records' state bytes
+        """
+        if self.__free is None:
+            slots = self.__load_free()
+            if slots is None:
+                slots = self.__scan_free()
+                self.__free_changed = True
+            self.__free = set(slots)
+            self.__free_heap = list(self.__free)
+            heapq.heapify(self.__free_heap)
+        return self.__free
+
+
+    def __load_free(self):
+        """The .free file holds the records file's size and modification
+        time (in nanoseconds) when it was saved, followed by the free
+        slots, all as 64-bit integers
+
+        If the records file has changed since then (for example, it was
+        written to by a program that ended without calling flush() or
+        close()) the .free file is ignored and the records are scanned.
+        """
+        try:
+            with open(self.__free_filename(), "rb") as fh:
+                slots = array.array("q", fh.read())
+        except (EnvironmentError, ValueError):
+            return None
+        stamp = self.__stamp()
+        if len(slots) < 2 or tuple(slots[:2]) != stamp:
+            return None
+        self.__free_stamp = stamp
+        return slots[2:]
+
+
+    def __save_free(self):
+        if self.__free is None:
+            return
+        self.__fh.flush()
+        stamp = self.__stamp()
+        if not self.__free_changed and stamp == self.__free_stamp:
+            return
+        slots = array.array("q", stamp)
+        slots.extend(sorted(self.__free))
+        with open(self.__free_filename(), "wb") as fh:
+            fh.write(slots.tobytes())
+        self.__free_changed = False
+        self.__free_stamp = stamp
+
+
+    def __stamp(self):
+        "Returns the records file's size and modification time"
+        info = os.fstat(self.__fh.fileno())
+        return info.st_size, info.st_mtime_ns
+
+
+    def __scan_free(self):
+        free = []
+        size = self.__size()
+        chunk = max(1, _SCAN_CHUNK // self.__record_size) * \
+                self.__record_size
+        for offset in range(0, size, chunk):
+            data = self.__read(offset, min(chunk, size - offset))
+            first = offset // self.__record_size
+            free.extend(first + i for i, state in
+                        enumerate(bytes(data[::self.__record_size]))
+                        if state != _OKAY[0])
+        return free
+
+
+    def __add_free(self, index):
+        if index not in self.__free:
+            self.__free.add(index)
+            heapq.heappush(self.__free_heap, index)
+            self.__free_changed = True
+
+
+    def __lowest_free(self):
+        """Returns the lowest free slot, or None if there isn't one
+
+        Slots that have been reused since they were freed are only
+        removed from the set of free slots, so they are skipped here.
+        """
+        free = self.__free_slots()
+        heap = self.__free_heap
+        length = len(self)
+        while heap:
+            index = heap[0]
+            if (index in free and index < length and
+                self.__state(index) != _OKAY[0]):
+                return index
+            heapq.heappop(heap)
+            free.discard(index)
+        return None
+
+
     def __setitem__(self, index, record):
         """Sets the item at position index to be the given record
 
         The index position can be beyond the current end of the file.
         """
+        self.__check_record(record)
+        self.__claim_slots((index,))
+        self.__write(index * self.__record_size, _OKAY + record)
+
+
+    def __check_record(self, record):
         assert isinstance(record, (bytes, bytearray)), \
                "binary data required"
         assert len(record) == self.record_size, (
             "record must be exactly {0} bytes".format(
             self.record_size))
-        self.__fh.seek(index * self.__record_size)
-        self.__fh.write(_OKAY)
-        self.__fh.write(record)
+
+
+    def __claim_slots(self, indexes):
+        """Removes the slots that are about to be written (in ascending
+        order) from the free slots and adds any blank slots that
+        writing beyond the end will leave
+        """
+        if self.__free is None:
+            return
+        length = len(self)
+        for index in indexes:
+            for blank in range(length, index):
+                self.__add_free(blank)
+            length = max(length, index + 1)
+            if index in self.__free:
+                self.__free.discard(index)
+                self.__free_changed = True
+
+
+    def write_many(self, records):
+        """Sets each record at its index position, given a dictionary
+        (or an iterable of pairs) of index positions and records
+
+        The records are sorted by index position and each run of
+        adjacent ones is written with a single write; with auto_flush
+        there is one flush at the end.
+        """
+        if isinstance(records, dict):
+            records = records.items()
+        records = sorted(records, key=lambda item: item[0])
+        for index, record in records:
+            self.__check_record(record)
+        self.__claim_slots(index for index, record in records)
+        runs = [(run[0][0] * self.__record_size,
+                 b"".join(_OKAY + record for index, record in run))
+                for run in self.__runs(records, lambda item: item[0])]
+        if self.__mapped or not hasattr(os, "pwrite"):
+            for offset, data in runs:
+                self.__write(offset, data, flush=False)
+        else:
+            # os.pwrite() needs no seeks; the file handle's buffer is
+            # flushed first and discarded (by seeking to the end) after
+            self.__fh.flush()
+            for offset, data in runs:
+                os.pwrite(self.__fh.fileno(), data, offset)
+            self.__fh.seek(0, os.SEEK_END)
         if self.auto_flush:
             self.__fh.flush()
 
 
+    def __runs(self, items, index_of):
+        """Splits items (in order of index position) into lists of
+        items with adjacent index positions
+        """
+        run = []
+        for item in items:
+            if run and index_of(item) != index_of(run[-1]) + 1:
+                yield run
+                run = []
+            run.append(item)
+        if run:
+            yield run
+
+
+    def read_many(self, indexes):
+        """Returns a list of the items at the given index positions,
+        in the same order (with None for deleted items)
+
+        Each run of adjacent index positions is read with a single
+        read. Raises IndexError if any index position has no record.
+        """
+        indexes = list(indexes)
+        if indexes and max(indexes) >= len(self):
+            raise IndexError("no record at index position {0}".format(
+                             max(indexes)))
+        direct = not self.__mapped and hasattr(os, "pread")
+        if direct:
+            self.__fh.flush()
+        items = {}
+        for run in self.__runs(sorted(set(indexes)), lambda index: index):
+            offset = run[0] * self.__record_size
+            size = len(run) * self.__record_size
+            if direct:
+                # os.pread() needs no seek and doesn't fill the file
+                # handle's read-ahead buffer
+                data = os.pread(self.__fh.fileno(), size, offset)
+            else:
+                data = self.__read(offset, size)
+            for i, index in enumerate(run):
+                offset = i * self.__record_size
+                if data[offset] == _OKAY[0]:
+                    items[index] = data[offset + 1:
+                                        offset + self.__record_size]
+                else:
+                    items[index] = None
+        return [items[index] for index in indexes]
+
+
+    def bulk_iter(self, start=0, chunk_size=_SCAN_CHUNK):
+        """Returns an iterator of (index, item) pairs for every item
+        that isn't deleted or blank, from index position start onwards
+
+        The file is read chunk_size bytes at a time rather than one
+        record at a time.
+        """
+        size = self.__size()
+        chunk = max(1, chunk_size // self.__record_size) * \
+                self.__record_size
+        for offset in range(start * self.__record_size, size, chunk):
+            data = self.__read(offset, min(chunk, size - offset))
+            index = offset // self.__record_size
+            for i in range(0, len(data), self.__record_size):
+                if data[i] == _OKAY[0]:
+                    yield index, data[i + 1:i + self.__record_size]
+                index += 1
+
+
+    def append(self, record):
+        """Sets the record in the lowest free slot (i.e., one that is
+        blank or whose record was deleted) or else at the end, and
+        returns its index position
+
+        A deleted record whose slot is reused can't be undeleted.
+        """
+        index = self.__lowest_free()
+        if index is None:
+            index = len(self)
+        self[index] = record
+        return index
+
+
     def __getitem__(self, index):
         """Returns the item at the given index position
 
@@ -175,23 +693,22 @@ class BinaryRecordFile:
         If the item at the given position has been deleted returns
         None.
         """
-        self.__seek_to_index(index)
-        state = self.__fh.read(1)
-        if state != _OKAY:
+        data = self.__read(self.__offset(index), self.__record_size)
+        if data[0] != _OKAY[0]:
             return None
-        return self.__fh.read(self.record_size)
-        
+        return data[1:]
 
-    def __seek_to_index(self, index):
-        if self.auto_flush:
-            self.__fh.flush()
-        self.__fh.seek(0, os.SEEK_END)
-        end = self.__fh.tell()
+
+    def __offset(self, index):
         offset = index * self.__record_size
-        if offset >= end:
+        if offset >= self.__size():
             raise IndexError("no record at index position {0}".format(
                              index))
-        self.__fh.seek(offset)
+        return offset
+
+
+    def __state(self, index):
+        return self.__read(self.__offset(index), 1)[0]
 
 
     def __delitem__(self, index):
@@ -199,14 +716,10 @@ class BinaryRecordFile:
 
         See undelete()
         """
-        self.__seek_to_index(index)
-        state = self.__fh.read(1)
-        if state != _OKAY:
-            return
-        self.__fh.seek(index * self.__record_size)
-        self.__fh.write(_DELETED)
-        if self.auto_flush:
-            self.__fh.flush()
+        if self.__state(index) == _OKAY[0]:
+            self.__write(index * self.__record_size, _DELETED)
+            if self.__free is not None:
+                self.__add_free(index)
 
 
     def undelete(self, index):
@@ -215,13 +728,11 @@ class BinaryRecordFile:
         If an item is deleted it can be undeleted---providing compact()
         (or inplace_compact()) has not been called.
         """
-        self.__seek_to_index(index)
-        state = self.__fh.read(1)
-        if state == _DELETED:
-            self.__fh.seek(index * self.__record_size)
-            self.__fh.write(_OKAY)
-            if self.auto_flush:
-                self.__fh.flush()
+        if self.__state(index) == _DELETED[0]:
+            self.__write(index * self.__record_size, _OKAY)
+            if self.__free is not None:
+                self.__free.discard(index)
+                self.__free_changed = True
             return True
         return False
 
@@ -234,15 +745,14 @@ class BinaryRecordFile:
         might be deleted. After calling compact() (or
         inplace_compact()), this returns the true number.
         """
-        if self.auto_flush:
-            self.__fh.flush()
-        self.__fh.seek(0, os.SEEK_END)
-        end = self.__fh.tell()
-        return end // self.__record_size
+        return self.__size() // self.__record_size
 
 
     def compact(self, keep_backup=False):
         """Eliminates blank and deleted records"""
+        memory_map = self.__mapped
+        if memory_map:
+            self.__close_map()
         compactfile = self.__fh.name + ".$$$"
         backupfile = self.__fh.name + ".bak"
         self.__fh.flush()
@@ -262,44 +772,84 @@ class BinaryRecordFile:
         if not keep_backup:
             os.remove(backupfile)
         self.__fh = open(self.__fh.name, "r+b")
+        if memory_map:
+            self.__open_map()
+        if self.__free is not None:
+            self.__free.clear()
+            self.__free_changed = True
 
 
     def inplace_compact(self):
         """Eliminates blank and deleted records in-place preserving the
         original order
         """
+        self.__check_compactable()
         index = 0
         length = len(self)
         while index < length:
-            self.__seek_to_index(index)
-            state = self.__fh.read(1)
-            if state != _OKAY:
+            if self.__state(index) != _OKAY[0]:
                 for next in range(index + 1, length):
-                    self.__seek_to_index(next)
-                    state = self.__fh.read(1)
-                    if state == _OKAY:
-                        self[index] = self[next]
+                    if self.__state(next) == _OKAY[0]:
+                        self[index] = bytes(self[next])
                         del self[next]
                         break
                 else:
                     break
             index += 1
-        self.__seek_to_index(0)
-        state = self.__fh.read(1)
-        if state != _OKAY:
-            self.__fh.truncate(0)
+        if len(self) == 0 or self.__state(0) != _OKAY[0]:
+            self.__truncate(0)
         else:
             limit = None
             for index in range(len(self) - 1, 0, -1):
-                self.__seek_to_index(index)
-                state = self.__fh.read(1)
-                if state != _OKAY:
+                if self.__state(index) != _OKAY[0]:
                     limit = index
                 else:
                     break
             if limit is not None:
-                self.__fh.truncate(limit * self.__record_size)
-        self.__fh.flush()
+                self.__truncate(limit * self.__record_size)
+        self.flush()
+
+
+    def incremental_compact(self, max_moves=1000):
+        """Moves up to max_moves records from the end of the file into
+        the lowest free slots, truncating the file as the free slots
+        at its end are used up
+
+        Unlike compact() and inplace_compact() this can be done a
+        little at a time, e.g., whenever a program is idle, although
+        records don't keep their order. Returns a list of (old, new)
+        index positions of the moved records, and the
+        FragmentationStats afterwards.
+        """
+        self.__check_compactable()
+        moves = []
+        while True:
+            end = last = len(self)
+            while last and self.__state(last - 1) != _OKAY[0]:
+                last -= 1
+            if last < end:
+                self.__truncate(last * self.__record_size)
+            if len(moves) == max_moves:
+                break
+            index = self.__lowest_free()
+            if index is None:
+                break
+            last -= 1
+            self[index] = bytes(self[last])
+            self.__truncate(last * self.__record_size)
+            moves.append((last, index))
+        return moves, self.fragmentation()
+
+
+    def fragmentation(self):
+        """Returns FragmentationStats of the number of record slots,
+        how many of them hold records, how many are free (blank or
+        deleted), and the ratio of free slots to slots
+        """
+        slots = len(self)
+        free = len(self.__free_slots())
+        return FragmentationStats(slots, slots - free, free,
+                                  free / slots if slots else 0.0)
 
 
 if __name__ == "__main__":
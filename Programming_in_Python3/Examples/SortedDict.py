@@ -73,12 +73,19 @@ class SortedDict(dict):
         >>> f = SortedDict(key=str.lower, S=1, a=2, n=3, I=4, T=5, y=6)
         >>> dict(f)
         {'a': 2, 'I': 4, 'S': 1, 'T': 5, 'y': 6, 'n': 3}
+        >>> g = SortedDict(f, str.lower, b=7, s=8)
+        >>> list(g.keys())
+        ['a', 'b', 'I', 'n', 's', 'S', 'T', 'y']
         """
         dictionary = dictionary or {}
         super().__init__(dictionary)
+        if isinstance(dictionary, SortedDict):
+            # Reuses the keys' order if the key function is the same
+            self.__keys = SortedList.SortedList(dictionary.__keys, key)
+        else:
+            self.__keys = SortedList.SortedList(super().keys(), key)
         if kwargs:
-            super().update(kwargs)
-        self.__keys = SortedList.SortedList(super().keys(), key)
+            self.update(kwargs)
 
 
     def update(self, dictionary=None, **kwargs):
@@ -106,18 +113,30 @@ class SortedDict(dict):
         >>> d.update(e)
         >>> list(d.items())
         [('g', 9), ('p', 4), ('q', 5), ('s', 1), ('t', 5), ('z', 3)]
+
+        Only the keys that are new are added to the sorted keys (and
+        a big batch of them is merged in rather than added one by one)
+        >>> d.update(dict.fromkeys(map(str, range(1000)), 0), z=0, q=1)
+        >>> len(d), list(d.items())[-5:]
+        (1006, [('p', 4), ('q', 1), ('s', 1), ('t', 5), ('z', 0)])
         """
+        new_keys = {}
         if dictionary is None:
             pass
         elif isinstance(dictionary, dict):
+            new_keys.update((key, None) for key in dictionary
+                            if key not in self)
             super().update(dictionary)
         else:
             for key, value in dictionary.items():
+                if key not in self:
+                    new_keys[key] = None
                 super().__setitem__(key, value)
         if kwargs:
+            new_keys.update((key, None) for key in kwargs
+                            if key not in self)
             super().update(kwargs)
-        self.__keys = SortedList.SortedList(super().keys(),
-                                            self.__keys.key)
+        self.__keys.update(new_keys)
 
     @classmethod
     def fromkeys(cls, iterable, value=None, key=None):
@@ -131,8 +150,27 @@ class SortedDict(dict):
         >>> e = SortedDict.fromkeys("KYLIE", 21)
         >>> list(e.items())
         [('E', 21), ('I', 21), ('K', 21), ('L', 21), ('Y', 21)]
+
+        If the iterable is a SortedDict, its order is reused rather than
+        sorting again (a SortedList may hold duplicates, so its values
+        are treated like any other iterable's)
+        >>> f = SortedDict.fromkeys(e, 0)
+        >>> list(f.items())
+        [('E', 0), ('I', 0), ('K', 0), ('L', 0), ('Y', 0)]
+        >>> g = SortedDict.fromkeys(SortedList.SortedList([1, 1, 2, 3, 3]))
+        >>> len(g), list(g.keys())
+        (3, [1, 2, 3])
+        >>> del g[1]
+        >>> list(g.keys())
+        [2, 3]
         """
-        return cls({k: value for k in iterable}, key)
+        d = cls(key=key)
+        if isinstance(iterable, SortedDict):
+            super(SortedDict, d).update(dict.fromkeys(iterable, value))
+            d.__keys = SortedList.SortedList(iterable.__keys, d.__keys.key)
+        else:
+            d.update(dict.fromkeys(iterable, value))
+        return d
 
 
     def value_at(self, index):
@@ -277,8 +315,7 @@ class SortedDict(dict):
         >>> list(d.values())
         [2, 4, 3, 1, 5, 6]
         """
-        for key in self.__keys:
-            yield self[key]
+        return map(super().__getitem__, self.__keys)
 
 
     def items(self):
@@ -288,8 +325,98 @@ class SortedDict(dict):
         >>> list(d.items())
         [('a', 2), ('i', 4), ('n', 3), ('s', 1), ('t', 5), ('y', 6)]
         """
-        for key in self.__keys:
-            yield (key, self[key])
+        return zip(self.__keys, self.values())
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True)):
+        """Returns a view of the keys from minimum to maximum in key
+        order (see SortedList.irange()); finding them is O(log n)
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> list(d.irange("b", "s"))
+        ['i', 'n', 's']
+        >>> list(d.irange("i", "t", (False, False)))
+        ['n', 's']
+        >>> list(d.irange(maximum="b")), len(d.irange("c"))
+        (['a'], 5)
+        """
+        return self.__keys.irange(minimum, maximum, inclusive)
+
+
+    def irange_items(self, minimum=None, maximum=None,
+                     inclusive=(True, True)):
+        """Returns an iterator of the items whose keys are from minimum
+        to maximum in key order
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> list(d.irange_items("b", "s"))
+        [('i', 4), ('n', 3), ('s', 1)]
+        >>> list(d.irange_items("t", inclusive=(False, True)))
+        [('y', 6)]
+        """
+        keys = self.__keys.irange(minimum, maximum, inclusive)
+        return zip(keys, map(super().__getitem__, keys))
+
+
+    def rank(self, key):
+        """Returns the number of keys that are less than key, which is
+        key's index position if it is in the dictionary
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.rank("a"), d.rank("n"), d.rank("o"), d.rank("z")
+        (0, 2, 3, 6)
+        """
+        return self.__keys.bisect_key_left(self.__keys.key(key))
+
+
+    def peekitem(self, index=-1):
+        """Returns the index-th item (by default the last) without
+        removing it
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.peekitem(), d.peekitem(0), d.peekitem(2)
+        (('y', 6), ('a', 2), ('n', 3))
+        >>> d.peekitem(19)
+        Traceback (most recent call last):
+        ...
+        IndexError: list index out of range
+        """
+        key = self.__keys[index]
+        return key, super().__getitem__(key)
+
+
+    def floor_key(self, key):
+        """Returns the greatest key that is less than or equal to key
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.floor_key("n"), d.floor_key("o"), d.floor_key("zz")
+        ('n', 'n', 'y')
+        >>> d.floor_key("A")
+        Traceback (most recent call last):
+        ...
+        KeyError: 'A'
+        """
+        index = self.__keys.bisect_key_right(self.__keys.key(key))
+        if index == 0:
+            raise KeyError(key)
+        return self.__keys[index - 1]
+
+
+    def ceiling_key(self, key):
+        """Returns the least key that is greater than or equal to key
+
+        >>> d = SortedDict(dict(s=1, a=2, n=3, i=4, t=5, y=6))
+        >>> d.ceiling_key("n"), d.ceiling_key("o"), d.ceiling_key("A")
+        ('n', 's', 'a')
+        >>> d.ceiling_key("z")
+        Traceback (most recent call last):
+        ...
+        KeyError: 'z'
+        """
+        index = self.__keys.bisect_key_left(self.__keys.key(key))
+        if index == len(self.__keys):
+            raise KeyError(key)
+        return self.__keys[index]
 
 
     def __iter__(self):
@@ -379,7 +506,9 @@ class SortedDict(dict):
         "{'E': 2, 'I': 3, 'N': 4, 'S': 5, 'V': 1}"
         """
         d = SortedDict()
-        super(SortedDict, d).update(self)
+        # Passing self would make dict.update() use this class's keys()
+        # and __getitem__() one key at a time
+        super(SortedDict, d).update(super().items())
         d.__keys = self.__keys.copy()
         return d
 
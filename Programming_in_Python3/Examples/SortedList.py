@@ -39,12 +39,28 @@ Traceback (most recent call last):
 ...
 AttributeError: 'SortedList' object has no attribute 'sort'
 
+>>> calls = []
+>>> def key(x):
+...     calls.append(x)
+...     return x.lower()
+>>> L = SortedList(["the", "quick", "brown", "fox", "jumped"], key)
+>>> len(calls)
+5
+>>> del calls[:]
+>>> L.add("Over"), L.remove("fox"), L.count("THE"), len(calls)
+(None, None, 1, 3)
+
 >>> import collections
 >>> isinstance(L, collections.Sequence)
 False
 """
 
+import bisect
+import heapq
+
+
 _identity = lambda x: x
+_MERGE_MIN = 128   # update() inserts fewer values than this one at a time
 
 
 class SortedList:
@@ -76,11 +92,47 @@ class SortedList:
         assert hasattr(self.__key, "__call__")
         if sequence is None:
             self.__list = []
+            self.__keys = []
         elif (isinstance(sequence, SortedList) and
               sequence.key == self.__key):
             self.__list = sequence.__list[:]
+            self.__keys = sequence.__keys[:]
         else:
-            self.__list = sorted(list(sequence), key=self.__key)
+            self.__list, self.__keys = self.__sorted(sequence)
+
+
+    def __sorted(self, sequence):
+        """Returns the sequence's values in order and their keys,
+        calling the key function once per value
+        """
+        values = list(sequence)
+        keys = [self.__key(value) for value in values]
+        order = sorted(range(len(values)), key=keys.__getitem__)
+        return [values[i] for i in order], [keys[i] for i in order]
+
+
+    def __merge(self, values, keys):
+        """Merges in values (which must be in order) with their keys;
+        new values go before existing values with equal keys, just as
+        with add()
+
+        Each new value's position is found by bisecting and the
+        existing values in between are copied a slice at a time, so
+        merging m values into n is O(m log n + n).
+        """
+        merged_list, merged_keys = [], []
+        start = 0
+        for value, key in zip(values, keys):
+            index = bisect.bisect_left(self.__keys, key, start)
+            merged_list += self.__list[start:index]
+            merged_keys += self.__keys[start:index]
+            merged_list.append(value)
+            merged_keys.append(key)
+            start = index
+        merged_list += self.__list[start:]
+        merged_keys += self.__keys[start:]
+        self.__list = merged_list
+        self.__keys = merged_keys
 
 
     @property
@@ -101,21 +153,18 @@ class SortedList:
         []
         """
         self.__list = []
+        self.__keys = []
 
 
     def __bisect_left(self, value):
         """Returns value's key and its index position in the list
         (or where value belongs if it isn't in the list)
+
+        The list of keys parallels the list of values, so this is the
+        only call of the key function.
         """
         key = self.__key(value)
-        left, right = 0, len(self.__list)
-        while left < right:
-            middle = (left + right) // 2
-            if self.__key(self.__list[middle]) < key:
-                left = middle + 1
-            else:
-                right = middle
-        return key, left
+        return key, bisect.bisect_left(self.__keys, key)
 
 
     def add(self, value):
@@ -132,11 +181,92 @@ class SortedList:
         >>> print(L)
         [-18, -1, 3, 4, 5, 5, 5, 7, 8, 22, 99]
         """
-        index = self.__bisect_left(value)[1]
+        key, index = self.__bisect_left(value)
         if index == len(self.__list):
             self.__list.append(value)
+            self.__keys.append(key)
         else:
             self.__list.insert(index, value)
+            self.__keys.insert(index, key)
+
+
+    def update(self, iterable):
+        """Adds all the values from the iterable to the list
+
+        This sorts the new values and merges them in, which is much
+        faster than calling add() for each one. (A small batch is
+        inserted one value at a time since merging copies the list.)
+        >>> L = SortedList((5, 8, -1, 3, 4, 22))
+        >>> L.update([7, 5, 30, -6])
+        >>> print(L)
+        [-6, -1, 3, 4, 5, 5, 7, 8, 22, 30]
+        >>> L.update(())
+        >>> print(L)
+        [-6, -1, 3, 4, 5, 5, 7, 8, 22, 30]
+        >>> L = SortedList(["ABC", "X"], lambda x: x.lower())
+        >>> L.update(["abc", "b"])
+        >>> print(L)
+        ['abc', 'ABC', 'b', 'X']
+        """
+        values, keys = self.__sorted(iterable)
+        if len(values) >= _MERGE_MIN:
+            self.__merge(values, keys)
+            return
+        index = len(self.__keys)
+        for value, key in zip(reversed(values), reversed(keys)):
+            index = bisect.bisect_left(self.__keys, key, 0, index)
+            self.__list.insert(index, value)
+            self.__keys.insert(index, key)
+
+
+    def merge(self, other):
+        """Adds all the values from other to the list
+
+        If other is a SortedList with the same key function its order
+        and keys are reused; otherwise this is the same as update().
+        >>> L = SortedList((5, 8, -1, 3, 4, 22))
+        >>> L.merge(SortedList((4, 6, 100)))
+        >>> print(L)
+        [-1, 3, 4, 4, 5, 6, 8, 22, 100]
+        >>> L.merge(SortedList((2, 1), lambda x: -x))
+        >>> print(L)
+        [-1, 1, 2, 3, 4, 4, 5, 6, 8, 22, 100]
+        """
+        if isinstance(other, SortedList) and other.key == self.__key:
+            self.__merge(other.__list, other.__keys)
+        else:
+            self.update(other)
+
+
+    @classmethod
+    def from_sorted_runs(cls, runs, key=None):
+        """Returns a SortedList of the values from the given iterables,
+        each of which must already be in order (using the key function
+        if one is given)
+
+        The runs are merged lazily with heapq.merge() so they can be
+        generators or files; merging n values from k runs is
+        O(n log k).
+        >>> runs = [(1, 5, 9), [2, 3], (), (x * 3 for x in range(4))]
+        >>> L = SortedList.from_sorted_runs(runs)
+        >>> print(L)
+        [0, 1, 2, 3, 3, 5, 6, 9, 9]
+        >>> L = SortedList.from_sorted_runs([["a", "C"], ["B", "c"]],
+        ...                                 lambda x: x.lower())
+        >>> print(L)
+        ['a', 'B', 'C', 'c']
+        >>> L.add("b")
+        >>> print(L)
+        ['a', 'b', 'B', 'C', 'c']
+        """
+        sorted_list = cls(key=key)
+        key = sorted_list.key
+        pairs = heapq.merge(*[((key(value), value) for value in run)
+                              for run in runs], key=lambda pair: pair[0])
+        for value_key, value in pairs:
+            sorted_list.__keys.append(value_key)
+            sorted_list.__list.append(value)
+        return sorted_list
 
 
     def pop(self, index=-1):
@@ -158,7 +288,9 @@ class SortedList:
         ...
         IndexError: pop index out of range
         """
-        return self.__list.pop(index)
+        value = self.__list.pop(index)
+        del self.__keys[index]
+        return value
 
 
     def remove(self, value):
@@ -200,9 +332,10 @@ class SortedList:
         """
         key, index = self.__bisect_left(value)
         while (index < len(self.__list) and
-                self.__key(self.__list[index]) == key):
+                self.__keys[index] == key):
             if self.__list[index] == value:
                 del self.__list[index]
+                del self.__keys[index]
                 return
             index += 1
         raise ValueError("{0}.remove(x): x not in list".format(
@@ -230,13 +363,11 @@ class SortedList:
         >>> L.remove_every("abc")
         3
         """
-        count = 0
         key, index = self.__bisect_left(value)
-        while (index < len(self.__list) and
-               self.__key(self.__list[index]) == key):
-            del self.__list[index]
-            count += 1
-        return count
+        end = bisect.bisect_right(self.__keys, key, index)
+        del self.__list[index:end]
+        del self.__keys[index:end]
+        return end - index
 
 
     def count(self, value):
@@ -253,13 +384,8 @@ class SortedList:
         >>> L.count("abc")
         3
         """
-        count = 0
         key, index = self.__bisect_left(value)
-        while (index < len(self.__list) and
-               self.__key(self.__list[index]) == key):
-            index += 1
-            count += 1
-        return count
+        return bisect.bisect_right(self.__keys, key, index) - index
 
 
     def index(self, value):
@@ -284,12 +410,108 @@ class SortedList:
         """
         key, index = self.__bisect_left(value)
         if (index < len(self.__list) and
-            self.__key(self.__list[index]) == key):
+            self.__keys[index] == key):
             return index
         raise ValueError("{0}.index(x): x not in list".format(
                          self.__class__.__name__))
 
 
+    def bisect_key_left(self, key):
+        """Returns the index position of the first value whose key is
+        not less than key
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> [L.bisect_key_left(x) for x in (5, 6, 100)]
+        [7, 9, 13]
+        >>> L = SortedList(["ABC", "X", "abc", "Abc"], lambda x: x.lower())
+        >>> L.bisect_key_left("abc"), L.bisect_key_left("b")
+        (0, 3)
+        """
+        return bisect.bisect_left(self.__keys, key)
+
+
+    def bisect_key_right(self, key):
+        """Returns the index position after the last value whose key is
+        not greater than key
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> [L.bisect_key_right(x) for x in (5, 6, -20)]
+        [9, 9, 0]
+        """
+        return bisect.bisect_right(self.__keys, key)
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True)):
+        """Returns a view of the values from minimum to maximum
+
+        The bounds are compared using the key function, either can be
+        None for no bound, and inclusive says whether values equal to
+        each bound are included. Finding the range is O(log n).
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> list(L.irange(3, 7))
+        [3, 3, 4, 5, 5, 7]
+        >>> list(L.irange(3, 7, (False, False)))
+        [4, 5, 5]
+        >>> list(L.irange(maximum=2)), list(L.irange(23))
+        ([-18, -1, 1, 2], [99])
+        >>> L = SortedList(["ABC", "X", "abc", "Abc", "b"], str.lower)
+        >>> list(L.irange("AbC", "B"))
+        ['ABC', 'abc', 'Abc', 'b']
+        """
+        return self.irange_key(
+                None if minimum is None else self.__key(minimum),
+                None if maximum is None else self.__key(maximum),
+                inclusive)
+
+
+    def irange_key(self, minimum=None, maximum=None,
+                   inclusive=(True, True)):
+        """Returns a view of the values whose keys are from minimum to
+        maximum (e.g., all the events in a time window when the key
+        function returns each event's time)
+
+        >>> L = SortedList(["ABC", "X", "abc", "Abc", "b"], str.lower)
+        >>> list(L.irange_key("abc", "x", (False, True)))
+        ['b', 'X']
+        >>> list(L.irange_key("c", "a"))
+        []
+        """
+        if minimum is None:
+            start = 0
+        elif inclusive[0]:
+            start = bisect.bisect_left(self.__keys, minimum)
+        else:
+            start = bisect.bisect_right(self.__keys, minimum)
+        if maximum is None:
+            stop = len(self.__keys)
+        elif inclusive[1]:
+            stop = bisect.bisect_right(self.__keys, maximum, start)
+        else:
+            stop = bisect.bisect_left(self.__keys, maximum, start)
+        return self.view(start, max(start, stop))
+
+
+    def view(self, start=None, stop=None, step=None):
+        """Returns a view of the values from start to stop (as for a
+        slice) that refers to the list rather than copying its values
+
+        A view reflects the values at its index positions when it is
+        used, so it should not be used after the list is changed.
+        >>> L = SortedList([9, -5, 3, -7, 8, 14, 0, 8, 3])
+        >>> V = L.view(2, 7)
+        >>> len(V), V[0], V[-1], list(V)
+        (5, 0, 8, [0, 3, 3, 8, 8])
+        >>> print(V[1:], V[::-2])
+        [3, 3, 8, 8] [8, 3, 0]
+        >>> V[5]
+        Traceback (most recent call last):
+        ...
+        IndexError: range object index out of range
+        """
+        return SortedListView(self.__list,
+                              range(len(self.__list))[start:stop:step])
+
+
     def __delitem__(self, index):
         """Deletes the value at the given index position
 
@@ -310,6 +532,7 @@ class SortedList:
         [-5, 0, 3]
         """
         del self.__list[index]
+        del self.__keys[index]
         
 
     def __getitem__(self, index):
@@ -381,7 +604,7 @@ class SortedList:
         """
         key, index = self.__bisect_left(value)
         return (index < len(self.__list) and
-                self.__key(self.__list[index]) == key)
+                self.__keys[index] == key)
 
 
     def __len__(self):
@@ -431,6 +654,38 @@ class SortedList:
         
     __copy__ = copy
 
+
+class SortedListView:
+
+    def __init__(self, values, positions):
+        """A read-only sequence of the values at the given range of
+        index positions; use SortedList.view() to create one
+        """
+        self.__values = values
+        self.__positions = positions
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SortedListView(self.__values, self.__positions[index])
+        return self.__values[self.__positions[index]]
+
+
+    def __iter__(self):
+        return map(self.__values.__getitem__, self.__positions)
+
+
+    def __reversed__(self):
+        return map(self.__values.__getitem__, reversed(self.__positions))
+
+
+    def __len__(self):
+        return len(self.__positions)
+
+
+    def __str__(self):
+        return str(list(self))
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+# Copyright (c) 2008-11 Qtrac Ltd. All rights reserved.
+# This program or module is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version. It is provided for educational
+# purposes and is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+
+"""
+A SortedList for numbers of one type that stores them in an array.array
+rather than as a list of Python objects. A float in a list costs an
+8-byte reference plus a 24-byte float object, whereas an array of
+typecode "d" holds just the 8-byte value, and the bisect module can
+search the array directly. Only the identity key is supported.
+
+>>> L = SortedList((5, 8, -1, 3, 4, 22))
+>>> L[2] = 18 #doctest: +IGNORE_EXCEPTION_DETAIL
+Traceback (most recent call last):
+...
+TypeError: use add() to insert a value and rely on the...
+>>> list(L)
+[-1.0, 3.0, 4.0, 5.0, 8.0, 22.0]
+>>> L.add(5)
+>>> L.add(5)
+>>> L.add(6)
+>>> list(L)
+[-1.0, 3.0, 4.0, 5.0, 5.0, 5.0, 6.0, 8.0, 22.0]
+>>> L.index(4)
+2
+>>> L.count(5), L.count(2)
+(3, 0)
+>>> L.insert(2, 9)
+Traceback (most recent call last):
+...
+AttributeError: 'SortedList' object has no attribute 'insert'
+>>> L = SortedList(range(10), typecode="l")
+>>> L.update([4, -2, 99])
+>>> print(L)
+[-2, 0, 1, 2, 3, 4, 4, 5, 6, 7, 8, 9, 99]
+>>> L.add(2.5)
+Traceback (most recent call last):
+...
+TypeError: 'float' object cannot be interpreted as an integer
+>>> SortedList([1], str.lower)
+Traceback (most recent call last):
+...
+AssertionError: an array SortedList only supports the identity key
+
+Values are looked up as the array stores them, so with typecode "f" a
+float matches the value it was rounded to when it was added
+>>> L = SortedList([0.1, 0.5], typecode="f")
+>>> 0.1 in L, L.index(0.1), L.count(0.1), list(L.irange(0.1, 0.5))
+(True, 0, 1, [0.10000000149011612, 0.5])
+"""
+
+import array
+import bisect
+import heapq
+
+from SortedList import SortedListView
+
+
+_identity = lambda x: x
+
+
+class SortedList:
+
+    def __init__(self, sequence=None, key=None, typecode="d"):
+        """Creates a SortedList that stores its values in an
+        array.array of the given typecode (see the array module)
+
+        >>> L = SortedList()
+        >>> print(L)
+        []
+        >>> L = SortedList((5, 8, -1, 3, 4, 22), typecode="i")
+        >>> print(L)
+        [-1, 3, 4, 5, 8, 22]
+        >>> L2 = SortedList(L, typecode="i")
+        >>> print(L2)
+        [-1, 3, 4, 5, 8, 22]
+        >>> L.typecode, L.itemsize
+        ('i', 4)
+        """
+        assert key is None or key is _identity, ("an array SortedList "
+                "only supports the identity key")
+        if (isinstance(sequence, SortedList) and
+            sequence.typecode == typecode):
+            self.__array = sequence.__array[:]
+        else:
+            self.__array = array.array(typecode, sorted(sequence or ()))
+
+
+    @property
+    def key(self):
+        """Return the key function used by this list (the identity)
+        """
+        return _identity
+
+
+    @property
+    def typecode(self):
+        """Return the typecode of the array holding the values
+        """
+        return self.__array.typecode
+
+
+    @property
+    def itemsize(self):
+        """Return the number of bytes each value takes
+        """
+        return self.__array.itemsize
+
+
+    def __stored(self, value):
+        """Returns value as the array would store it, so that a float
+        is compared with a float32 array's values at their precision
+        """
+        if self.__array.typecode == "f":
+            return array.array("f", (value,))[0]
+        return value
+
+
+    def clear(self):
+        """Clears the list
+
+        >>> L = SortedList((5, 8, -1, 3, 4, 22))
+        >>> L.clear()
+        >>> print(L)
+        []
+        """
+        del self.__array[:]
+
+
+    def add(self, value):
+        """Adds a value to the list (duplicates are allowed)
+
+        >>> L = SortedList((5, 8, -1, 3, 4, 22), typecode="l")
+        >>> L.add(5)
+        >>> L.add(5)
+        >>> L.add(7)
+        >>> L.add(-18)
+        >>> L.add(99)
+        >>> print(L)
+        [-18, -1, 3, 4, 5, 5, 5, 7, 8, 22, 99]
+        """
+        self.__array.insert(bisect.bisect_left(self.__array, value), value)
+
+
+    def update(self, iterable):
+        """Adds all the values from the iterable to the list
+
+        The new values are sorted and merged in, building the new array
+        in one pass, so for just a few values add() is quicker.
+        >>> L = SortedList((5, 8, -1, 3, 4, 22), typecode="l")
+        >>> L.update([7, 5, 30, -6])
+        >>> print(L)
+        [-6, -1, 3, 4, 5, 5, 7, 8, 22, 30]
+        >>> L.update(())
+        >>> print(L)
+        [-6, -1, 3, 4, 5, 5, 7, 8, 22, 30]
+        """
+        self.__merge(array.array(self.typecode, sorted(iterable)))
+
+
+    def __merge(self, values):
+        "Merges the array of sorted values into the list"
+        if not self.__array:
+            self.__array = values
+            return
+        # sorted() finds the two runs and merges them, all in C
+        self.__array = array.array(self.typecode,
+                                   sorted(self.__array + values))
+
+
+    def merge(self, other):
+        """Adds all the values from other to the list
+
+        If other is a SortedList of this kind with the same typecode
+        its array is merged in without sorting it again; otherwise this
+        is the same as update().
+        >>> L = SortedList((5, 8, -1, 3, 4, 22), typecode="l")
+        >>> L.merge(SortedList((4, 6, 100), typecode="l"))
+        >>> print(L)
+        [-1, 3, 4, 4, 5, 6, 8, 22, 100]
+        >>> L.merge([2, 1])
+        >>> print(L)
+        [-1, 1, 2, 3, 4, 4, 5, 6, 8, 22, 100]
+        """
+        if isinstance(other, SortedList) and other.typecode == self.typecode:
+            self.__merge(other.__array[:])
+        else:
+            self.update(other)
+
+
+    @classmethod
+    def from_sorted_runs(cls, runs, key=None, typecode="d"):
+        """Returns a SortedList of the values from the given iterables,
+        each of which must already be in order
+
+        The runs are merged lazily with heapq.merge() straight into the
+        array, so they can be generators or files; merging n values
+        from k runs is O(n log k).
+        >>> runs = [(1, 5, 9), [2, 3], (), (x * 3 for x in range(4))]
+        >>> L = SortedList.from_sorted_runs(runs, typecode="l")
+        >>> print(L)
+        [0, 1, 2, 3, 3, 5, 6, 9, 9]
+        """
+        sorted_list = cls(key=key, typecode=typecode)
+        sorted_list.__array.extend(heapq.merge(*runs))
+        return sorted_list
+
+
+    def pop(self, index=-1):
+        """Removes and returns the item the given index
+
+        >>> L = SortedList([-18, -1, 3, 4, 5, 5, 7, 8, 22, 99], typecode="l")
+        >>> L.pop()
+        99
+        >>> L.pop(0)
+        -18
+        >>> L.pop(5)
+        7
+        >>> print(L)
+        [-1, 3, 4, 5, 5, 8, 22]
+        >>> L.pop(12)
+        Traceback (most recent call last):
+        ...
+        IndexError: pop index out of range
+        """
+        return self.__array.pop(index)
+
+
+    def remove(self, value):
+        """Removes the first occurrence of value from the list
+
+        >>> L = SortedList([-18, -1, 3, 4, 5, 5, 7, 8, 22, 99])
+        >>> L.remove(20)
+        Traceback (most recent call last):
+        ...
+        ValueError: SortedList.remove(x): x not in list
+        >>> L.remove(5)
+        >>> L.remove(-18)
+        >>> L.remove(99)
+        >>> print(L)
+        [-1.0, 3.0, 4.0, 5.0, 7.0, 8.0, 22.0]
+        """
+        value = self.__stored(value)
+        index = bisect.bisect_left(self.__array, value)
+        if index < len(self.__array) and self.__array[index] == value:
+            del self.__array[index]
+            return
+        raise ValueError("{0}.remove(x): x not in list".format(
+                            self.__class__.__name__))
+
+
+    def remove_every(self, value):
+        """Removes every occurrence of value from the list
+
+        Returns the number of occurrences removed (which could be 0).
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 5, 5, 7, 8, 22, 99], None,
+        ...                "l")
+        >>> L.remove_every(-3)
+        0
+        >>> L.remove_every(7)
+        1
+        >>> L.remove_every(5)
+        4
+        >>> print(L)
+        [-18, -1, 3, 4, 8, 22, 99]
+        """
+        start, stop = self.__bounds(value)
+        del self.__array[start:stop]
+        return stop - start
+
+
+    def __bounds(self, value):
+        """Returns the index positions of the first occurrence of value
+        and the one after the last (which are equal if there is none)
+        """
+        value = self.__stored(value)
+        start = bisect.bisect_left(self.__array, value)
+        return start, bisect.bisect_right(self.__array, value, start)
+
+
+    def count(self, value):
+        """Counts every occurrence of value in the list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 5, 5, 7, 8, 22, 99])
+        >>> L.count(5), L.count(99), L.count(-17)
+        (4, 1, 0)
+        """
+        start, stop = self.__bounds(value)
+        return stop - start
+
+
+    def index(self, value):
+        """Returns the index position of the first occurrence of value
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> L.index(5)
+        7
+        >>> L.index(0)
+        Traceback (most recent call last):
+        ...
+        ValueError: SortedList.index(x): x not in list
+        >>> L.index(99)
+        12
+        """
+        value = self.__stored(value)
+        index = bisect.bisect_left(self.__array, value)
+        if index < len(self.__array) and self.__array[index] == value:
+            return index
+        raise ValueError("{0}.index(x): x not in list".format(
+                         self.__class__.__name__))
+
+
+    def bisect_key_left(self, key):
+        """Returns the index position of the first value that is not
+        less than key
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> [L.bisect_key_left(x) for x in (5, 6, 100)]
+        [7, 9, 13]
+        """
+        return bisect.bisect_left(self.__array, self.__stored(key))
+
+
+    def bisect_key_right(self, key):
+        """Returns the index position after the last value that is not
+        greater than key
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> [L.bisect_key_right(x) for x in (5, 6, -20)]
+        [9, 9, 0]
+        """
+        return bisect.bisect_right(self.__array, self.__stored(key))
+
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True)):
+        """Returns a view of the values from minimum to maximum
+
+        Either bound can be None for no bound, and inclusive says
+        whether values equal to each bound are included. Finding the
+        range is O(log n); array.array(L.typecode, view) copies it.
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3],
+        ...                typecode="l")
+        >>> list(L.irange(3, 7))
+        [3, 3, 4, 5, 5, 7]
+        >>> list(L.irange(3, 7, (False, False)))
+        [4, 5, 5]
+        >>> list(L.irange(maximum=2)), list(L.irange(23))
+        ([-18, -1, 1, 2], [99])
+        >>> list(L.irange(8, 4))
+        []
+        >>> array.array(L.typecode, L.irange(3, 4))
+        array('l', [3, 3, 4])
+        """
+        if minimum is None:
+            start = 0
+        elif inclusive[0]:
+            start = self.bisect_key_left(minimum)
+        else:
+            start = self.bisect_key_right(minimum)
+        if maximum is None:
+            stop = len(self.__array)
+        elif inclusive[1]:
+            stop = max(start, self.bisect_key_right(maximum))
+        else:
+            stop = max(start, self.bisect_key_left(maximum))
+        return SortedListView(self.__array, range(start, stop))
+
+
+    irange_key = irange
+
+
+    def view(self, start=None, stop=None, step=None):
+        """Returns a view of the values from start to stop (as for a
+        slice) that refers to the array rather than copying its values
+
+        A view reflects the values at its index positions when it is
+        used, so it should not be used after the list is changed.
+        >>> L = SortedList([9, -5, 3, -7, 8, 14, 0, 8, 3], typecode="l")
+        >>> V = L.view(2, 7)
+        >>> len(V), V[0], V[-1], list(V)
+        (5, 0, 8, [0, 3, 3, 8, 8])
+        >>> print(V[1:], V[::-2])
+        [3, 3, 8, 8] [8, 3, 0]
+        """
+        return SortedListView(self.__array,
+                              range(len(self.__array))[start:stop:step])
+
+
+    def __delitem__(self, index):
+        """Deletes the value at the given index position
+
+        >>> L = SortedList([9, -5, 3, -7, 8, 14, 0, 8, 3], typecode="l")
+        >>> del L[0]
+        >>> del L[-1]
+        >>> del L[5]
+        >>> print(L)
+        [-5, 0, 3, 3, 8, 9]
+        >>> del L[25]
+        Traceback (most recent call last):
+        ...
+        IndexError: array assignment index out of range
+        >>> del L[-3:]
+        >>> print(L)
+        [-5, 0, 3]
+        """
+        del self.__array[index]
+
+
+    def __getitem__(self, index):
+        """Returns the value at the given index position
+
+        >>> L = SortedList([9, -5, 3, -7, 8, 14, 0, 8, 3], typecode="l")
+        >>> L[0], L[3], L[4], L[-1]
+        (-7, 3, 3, 14)
+        >>> L[15]
+        Traceback (most recent call last):
+        ...
+        IndexError: array index out of range
+        >>> L[:3]
+        [-7, -5, 0]
+        >>> L[4:8]
+        [3, 8, 8, 9]
+        """
+        if isinstance(index, slice):
+            return self.__array[index].tolist()
+        return self.__array[index]
+
+
+    def __setitem__(self, index, value):
+        raise TypeError("use add() to insert a value and rely on "
+                        "the list to put it in the right place")
+
+
+    def __iter__(self):
+        """Returns an iterator for the list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3],
+        ...                typecode="l")
+        >>> list(L)
+        [-18, -1, 1, 2, 3, 3, 4, 5, 5, 7, 8, 22, 99]
+        """
+        return iter(self.__array)
+
+
+    def __reversed__(self):
+        """Returns a reverse iterator for the list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3],
+        ...                typecode="l")
+        >>> list(reversed(L))
+        [99, 22, 8, 7, 5, 5, 4, 3, 3, 2, 1, -1, -18]
+        """
+        return reversed(self.__array)
+
+
+    def __contains__(self, value):
+        """Returns True if value is in the list; otherwise returns False
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> 5 in L, 0 in L, 99 in L
+        (True, False, True)
+        """
+        value = self.__stored(value)
+        index = bisect.bisect_left(self.__array, value)
+        return index < len(self.__array) and self.__array[index] == value
+
+
+    def __len__(self):
+        """Returns the length of the list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> len(L)
+        13
+        >>> L = SortedList()
+        >>> len(L)
+        0
+        """
+        return len(self.__array)
+
+
+    def __str__(self):
+        """Returns a human readable string version of the list; the
+        result could be very long
+
+        >>> L = SortedList([-1, 3, 4, 7, 8, 22, -9, 2, 1, 3], typecode="l")
+        >>> str(L)
+        '[-9, -1, 1, 2, 3, 3, 4, 7, 8, 22]'
+        >>> L = SortedList()
+        >>> str(L)
+        '[]'
+        """
+        return str(self.__array.tolist())
+
+
+    def copy(self):
+        """Returns a copy of the list with the same typecode
+        >>> L = SortedList([-1, 3, 4, 7, 8, 22, -9, 2, 1, 3], typecode="l")
+        >>> m = L.copy()
+        >>> str(m)
+        '[-9, -1, 1, 2, 3, 3, 4, 7, 8, 22]'
+        >>> import copy
+        >>> n = copy.copy(L)
+        >>> str(n), n.typecode
+        ('[-9, -1, 1, 2, 3, 3, 4, 7, 8, 22]', 'l')
+        """
+        return SortedList(self, typecode=self.typecode)
+
+    __copy__ = copy
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
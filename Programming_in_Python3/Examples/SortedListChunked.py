@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+# Copyright (c) 2008-11 Qtrac Ltd. All rights reserved.
+# This program or module is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version. It is provided for educational
+# purposes and is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+
+"""
+A SortedList with the same API as SortedList.SortedList, but stored as
+a list of short sorted sublists (each at most 2 * load items) rather than
+one big list. Inserting or deleting only shifts the items of one sublist,
+so add(), remove() and pop() are O(sqrt n) rather than O(n), and building
+a list of millions of items one at a time is no longer quadratic.
+
+Each sublist has a parallel list of keys, and the largest key of every
+sublist is kept in a list of maxes, so the bisect module's functions can
+find the right sublist and position without calling the key function.
+Index positions are found using a list of the sublists' offsets which is
+rebuilt (in O(n / load)) the first time it is needed after a change.
+
+>>> L = SortedList((5, 8, -1, 3, 4, 22))
+>>> L[2] = 18 #doctest: +IGNORE_EXCEPTION_DETAIL
+Traceback (most recent call last):
+...
+TypeError: use add() to insert a value and rely on the...
+>>> list(L)
+[-1, 3, 4, 5, 8, 22]
+>>> L.add(5)
+>>> L.add(5)
+>>> L.add(6)
+>>> list(L)
+[-1, 3, 4, 5, 5, 5, 6, 8, 22]
+>>> L.index(4)
+2
+>>> L.count(5), L.count(2)
+(3, 0)
+>>> L.insert(2, 9)
+Traceback (most recent call last):
+...
+AttributeError: 'SortedList' object has no attribute 'insert'
+
+>>> import random
+>>> random.seed(917)
+>>> values = [random.randint(0, 50) for i in range(300)]
+>>> L = SortedList(load=4)
+>>> for value in values:
+...     L.add(value)
+>>> list(L) == sorted(values)
+True
+>>> [L[i] for i in range(0, 300, 37)] == sorted(values)[::37]
+True
+>>> for value in values[::2]:
+...     L.remove(value)
+>>> list(L) == sorted(values[1::2])
+True
+>>> L.remove_every(values[1]) == values[1::2].count(values[1])
+True
+>>> while L:
+...     x = L.pop(len(L) // 2)
+>>> len(L), list(L)
+(0, [])
+"""
+
+import bisect
+import itertools
+
+
+_identity = lambda x: x
+_LOAD = 1000
+
+
+class SortedList:
+
+    def __init__(self, sequence=None, key=None, load=_LOAD):
+        """Creates a SortedList that orders using < on the items,
+        or on the results of using the given key function
+
+        Each sublist holds between load / 2 and 2 * load items (apart
+        from when there is only one).
+
+        >>> L = SortedList()
+        >>> print(L)
+        []
+        >>> L = SortedList((5, 8, -1, 3, 4, 22))
+        >>> print(L)
+        [-1, 3, 4, 5, 8, 22]
+        >>> L = SortedList({9, 8, 7, 6, -1, -2})
+        >>> print(L)
+        [-2, -1, 6, 7, 8, 9]
+        >>> L = SortedList([-5, 4, -3, 8, -2, 16, -1, 0, -3, 8], load=2)
+        >>> print(L)
+        [-5, -3, -3, -2, -1, 0, 4, 8, 8, 16]
+        >>> L2 = SortedList(L)
+        >>> print(L2)
+        [-5, -3, -3, -2, -1, 0, 4, 8, 8, 16]
+        >>> L = SortedList(("the", "quick", "brown", "fox", "jumped"))
+        >>> print(L)
+        ['brown', 'fox', 'jumped', 'quick', 'the']
+        """
+        self.__key = key or _identity
+        assert hasattr(self.__key, "__call__")
+        assert load > 1
+        self.__load = load
+        if sequence is None:
+            self.clear()
+        elif (isinstance(sequence, SortedList) and
+              sequence.key == self.__key):
+            self.__build(list(sequence),
+                         list(itertools.chain.from_iterable(
+                              sequence.__keys)))
+        else:
+            values = sorted(list(sequence), key=self.__key)
+            self.__build(values, [self.__key(value) for value in values])
+
+
+    def __build(self, values, keys):
+        """Replaces the contents of the list with the given values,
+        which must be in order, and their keys
+        """
+        load = self.__load
+        self.__lists = [values[i:i + load]
+                        for i in range(0, len(values), load)]
+        self.__keys = [keys[i:i + load] for i in range(0, len(keys), load)]
+        self.__maxes = [keys[-1] for keys in self.__keys]
+        self.__len = len(values)
+        self.__offsets = None
+
+
+    @property
+    def key(self):
+        """Return the key function used by this list
+        """
+        return self.__key
+
+
+    def clear(self):
+        """Clears the list
+
+        >>> L = SortedList((5, 8, -1, 3, 4, 22))
+        >>> print(L)
+        [-1, 3, 4, 5, 8, 22]
+        >>> L.clear()
+        >>> print(L)
+        []
+        """
+        self.__lists = []
+        self.__keys = []
+        self.__maxes = []
+        self.__len = 0
+        self.__offsets = None
+
+
+    def __bisect_left(self, key):
+        """Returns the sublist and position in the sublist of the first
+        item whose key is not less than key; the sublist is
+        len(self.__lists) if every key is less
+        """
+        i = bisect.bisect_left(self.__maxes, key)
+        if i == len(self.__maxes):
+            return i, 0
+        return i, bisect.bisect_left(self.__keys[i], key)
+
+
+    def __position(self, index, message):
+        """Returns the sublist and position in the sublist of the
+        item at the given index position
+        """
+        if index < 0:
+            index += self.__len
+        if not 0 <= index < self.__len:
+            raise IndexError(message)
+        offsets = self.__get_offsets()
+        i = bisect.bisect_right(offsets, index) - 1
+        return i, index - offsets[i]
+
+
+    def __get_offsets(self):
+        """Returns the index position of the first item of every
+        sublist, rebuilding them if the list has changed
+        """
+        if self.__offsets is None:
+            self.__offsets = [0]
+            for values in self.__lists[:-1]:
+                self.__offsets.append(self.__offsets[-1] + len(values))
+        return self.__offsets
+
+
+    def __split(self, i):
+        """Splits the i-th sublist in half if it has grown too long
+        """
+        values = self.__lists[i]
+        if len(values) <= 2 * self.__load:
+            return
+        keys = self.__keys[i]
+        half = len(values) // 2
+        self.__lists.insert(i + 1, values[half:])
+        self.__keys.insert(i + 1, keys[half:])
+        del values[half:]
+        del keys[half:]
+        self.__maxes.insert(i + 1, self.__maxes[i])
+        self.__maxes[i] = keys[-1]
+
+
+    def __join(self, i):
+        """Joins the i-th sublist to a neighbour if it has become too
+        short
+        """
+        if (i >= len(self.__lists) or len(self.__lists) == 1 or
+            len(self.__lists[i]) >= self.__load // 2):
+            return
+        if i == len(self.__lists) - 1:
+            i -= 1
+        self.__lists[i].extend(self.__lists[i + 1])
+        self.__keys[i].extend(self.__keys[i + 1])
+        self.__maxes[i] = self.__maxes[i + 1]
+        del self.__lists[i + 1], self.__keys[i + 1], self.__maxes[i + 1]
+        self.__split(i)
+
+
+    def __delete(self, i, j, count=1):
+        """Deletes count items starting from position j of the i-th
+        sublist
+        """
+        self.__len -= count
+        self.__offsets = None
+        first = i
+        while count:
+            values, keys = self.__lists[i], self.__keys[i]
+            size = min(count, len(values) - j)
+            del values[j:j + size]
+            del keys[j:j + size]
+            count -= size
+            if values:
+                self.__maxes[i] = keys[-1]
+                i += 1
+            else:
+                del self.__lists[i], self.__keys[i], self.__maxes[i]
+            j = 0
+        self.__join(first + 1)
+        self.__join(first)
+
+
+    def __iter_from(self, i, j):
+        """Returns an iterator of the items from position j of the i-th
+        sublist onwards
+        """
+        if i >= len(self.__lists):
+            return iter(())
+        return itertools.chain(itertools.islice(self.__lists[i], j, None),
+                               itertools.chain.from_iterable(
+                                    self.__lists[i + 1:]))
+
+
+    def add(self, value):
+        """Adds a value to the list (duplicates are allowed)
+
+        >>> L = SortedList((5, 8, -1, 3, 4, 22))
+        >>> print(L)
+        [-1, 3, 4, 5, 8, 22]
+        >>> L.add(5)
+        >>> L.add(5)
+        >>> L.add(7)
+        >>> L.add(-18)
+        >>> L.add(99)
+        >>> print(L)
+        [-18, -1, 3, 4, 5, 5, 5, 7, 8, 22, 99]
+        """
+        key = self.__key(value)
+        self.__len += 1
+        self.__offsets = None
+        if not self.__maxes:
+            self.__lists.append([value])
+            self.__keys.append([key])
+            self.__maxes.append(key)
+            return
+        i, j = self.__bisect_left(key)
+        if i == len(self.__maxes):
+            i -= 1
+            self.__lists[i].append(value)
+            self.__keys[i].append(key)
+            self.__maxes[i] = key
+        else:
+            self.__lists[i].insert(j, value)
+            self.__keys[i].insert(j, key)
+        self.__split(i)
+
+
+    def pop(self, index=-1):
+        """Removes and returns the item the given index
+
+        >>> L = SortedList([-18, -1, 3, 4, 5, 5, 7, 8, 22, 99], load=2)
+        >>> print(L)
+        [-18, -1, 3, 4, 5, 5, 7, 8, 22, 99]
+        >>> L.pop()
+        99
+        >>> L.pop(0)
+        -18
+        >>> L.pop(5)
+        7
+        >>> print(L)
+        [-1, 3, 4, 5, 5, 8, 22]
+        >>> L.pop(12)
+        Traceback (most recent call last):
+        ...
+        IndexError: pop index out of range
+        """
+        i, j = self.__position(index, "pop index out of range")
+        value = self.__lists[i][j]
+        self.__delete(i, j)
+        return value
+
+
+    def remove(self, value):
+        """Removes the first occurrence of value from the list
+
+        >>> L = SortedList([-18, -1, 3, 4, 5, 5, 7, 8, 22, 99])
+        >>> print(L)
+        [-18, -1, 3, 4, 5, 5, 7, 8, 22, 99]
+        >>> L.remove(20)
+        Traceback (most recent call last):
+        ...
+        ValueError: SortedList.remove(x): x not in list
+        >>> L.remove(5)
+        >>> L.remove(-18)
+        >>> L.remove(99)
+        >>> print(L)
+        [-1, 3, 4, 5, 7, 8, 22]
+        >>> L = SortedList(["ABC", "X", "abc", "Abc"], lambda x: x.lower(),
+        ...                load=2)
+        >>> print(L)
+        ['ABC', 'abc', 'Abc', 'X']
+        >>> L.remove("Abca")
+        Traceback (most recent call last):
+        ...
+        ValueError: SortedList.remove(x): x not in list
+        >>> print(L)
+        ['ABC', 'abc', 'Abc', 'X']
+        >>> L.remove("Abc")
+        >>> print(L)
+        ['ABC', 'abc', 'X']
+        >>> L.remove("ABC")
+        >>> print(L)
+        ['abc', 'X']
+        >>> L.remove("X")
+        >>> print(L)
+        ['abc']
+        >>> L.remove("abc")
+        >>> print(L)
+        []
+        """
+        key = self.__key(value)
+        i, j = self.__bisect_left(key)
+        while i < len(self.__lists):
+            keys = self.__keys[i]
+            while j < len(keys) and keys[j] == key:
+                if self.__lists[i][j] == value:
+                    self.__delete(i, j)
+                    return
+                j += 1
+            if j < len(keys):
+                break
+            i, j = i + 1, 0
+        raise ValueError("{0}.remove(x): x not in list".format(
+                            self.__class__.__name__))
+
+
+    def remove_every(self, value):
+        """Removes every occurrence of value from the list
+
+        Returns the number of occurrences removed (which could be 0).
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 5, 5, 7, 8, 22, 99], load=2)
+        >>> L.add(5)
+        >>> L.add(5)
+        >>> print(L)
+        [-18, -1, 3, 4, 5, 5, 5, 5, 5, 5, 7, 8, 22, 99]
+        >>> L.remove_every(-3)
+        0
+        >>> L.remove_every(7)
+        1
+        >>> L.remove_every(5)
+        6
+        >>> print(L)
+        [-18, -1, 3, 4, 8, 22, 99]
+        >>> L = SortedList(["ABC", "X", "abc", "Abc"], lambda x: x.lower())
+        >>> L.remove_every("abc")
+        3
+        """
+        key = self.__key(value)
+        count = self.__count(key)
+        if count:
+            self.__delete(*self.__bisect_left(key), count=count)
+        return count
+
+
+    def __count(self, key):
+        """Returns the number of items whose key equals key
+        """
+        first = bisect.bisect_left(self.__maxes, key)
+        last = min(bisect.bisect_right(self.__maxes, key),
+                   len(self.__maxes) - 1)
+        count = 0
+        for keys in self.__keys[first:last + 1]:
+            count += (bisect.bisect_right(keys, key) -
+                      bisect.bisect_left(keys, key))
+        return count
+
+
+    def count(self, value):
+        """Counts every occurrence of value in the list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 5, 5, 7, 8, 22, 99], load=2)
+        >>> L.count(5)
+        4
+        >>> L.count(99)
+        1
+        >>> L.count(-17)
+        0
+        >>> L = SortedList(["ABC", "X", "abc", "Abc"], lambda x: x.lower())
+        >>> L.count("abc")
+        3
+        """
+        return self.__count(self.__key(value))
+
+
+    def index(self, value):
+        """Returns the index position of the first occurrence of value
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3],
+        ...                load=2)
+        >>> L.index(5)
+        7
+        >>> L.index(0)
+        Traceback (most recent call last):
+        ...
+        ValueError: SortedList.index(x): x not in list
+        >>> L.index(99)
+        12
+        >>> L = SortedList(["ABC", "X", "abc", "Abc"], lambda x: x.lower())
+        >>> print(L)
+        ['ABC', 'abc', 'Abc', 'X']
+        >>> L.index("x")
+        3
+        >>> L.index("abc")
+        0
+        """
+        key = self.__key(value)
+        i, j = self.__bisect_left(key)
+        if i < len(self.__keys) and self.__keys[i][j] == key:
+            return self.__get_offsets()[i] + j
+        raise ValueError("{0}.index(x): x not in list".format(
+                         self.__class__.__name__))
+
+
+    def __delitem__(self, index):
+        """Deletes the value at the given index position
+
+        >>> L = SortedList([9, -5, 3, -7, 8, 14, 0, 8, 3], load=2)
+        >>> print(L)
+        [-7, -5, 0, 3, 3, 8, 8, 9, 14]
+        >>> del L[0]
+        >>> del L[-1]
+        >>> del L[5]
+        >>> print(L)
+        [-5, 0, 3, 3, 8, 9]
+        >>> del L[25]
+        Traceback (most recent call last):
+        ...
+        IndexError: list assignment index out of range
+        >>> del L[-3:]
+        >>> print(L)
+        [-5, 0, 3]
+        >>> del L[::2]
+        >>> print(L)
+        [0]
+        """
+        if not isinstance(index, slice):
+            self.__delete(*self.__position(
+                          index, "list assignment index out of range"))
+            return
+        start, stop, step = index.indices(self.__len)
+        if step == 1:
+            if start < stop:
+                i, j = self.__position(start, "")
+                self.__delete(i, j, stop - start)
+        else:
+            values = list(self)
+            keys = list(itertools.chain.from_iterable(self.__keys))
+            del values[index]
+            del keys[index]
+            self.__build(values, keys)
+
+
+    def __getitem__(self, index):
+        """Returns the value at the given index position
+
+        >>> L = SortedList([9, -5, 3, -7, 8, 14, 0, 8, 3], load=2)
+        >>> L[0], L[3], L[4], L[-1]
+        (-7, 3, 3, 14)
+        >>> L[15]
+        Traceback (most recent call last):
+        ...
+        IndexError: list index out of range
+        >>> L[:3]
+        [-7, -5, 0]
+        >>> L[4:8]
+        [3, 8, 8, 9]
+        >>> L[::-3]
+        [14, 8, 0]
+        """
+        if not isinstance(index, slice):
+            i, j = self.__position(index, "list index out of range")
+            return self.__lists[i][j]
+        start, stop, step = index.indices(self.__len)
+        if step != 1:
+            return list(self)[index]
+        if start >= stop:
+            return []
+        return list(itertools.islice(
+                    self.__iter_from(*self.__position(start, "")),
+                    stop - start))
+
+
+    def __setitem__(self, index, value):
+        raise TypeError("use add() to insert a value and rely on "
+                        "the list to put it in the right place")
+
+
+    def __iter__(self):
+        """Returns an iterator for the list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3],
+        ...                load=2)
+        >>> result = []
+        >>> for x in L:
+        ...     result.append(x)
+        >>> print(result)
+        [-18, -1, 1, 2, 3, 3, 4, 5, 5, 7, 8, 22, 99]
+        """
+        return itertools.chain.from_iterable(self.__lists)
+
+
+    def __reversed__(self):
+        """Returns a reverse iterator for the list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3],
+        ...                load=2)
+        >>> result = []
+        >>> for x in reversed(L):
+        ...     result.append(x)
+        >>> print(result)
+        [99, 22, 8, 7, 5, 5, 4, 3, 3, 2, 1, -1, -18]
+        """
+        return itertools.chain.from_iterable(
+                    reversed(values) for values in reversed(self.__lists))
+
+
+    def __contains__(self, value):
+        """Returns True if value is in the list; otherwise returns False
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> 5 in L
+        True
+        >>> 0 in L
+        False
+        >>> 99 in L
+        True
+        >>> L = SortedList(["ABC", "X", "Abc"], lambda x: x.lower())
+        >>> "abc" in L
+        True
+        >>> "x" in L
+        True
+        >>> "ZZ" in L
+        False
+        """
+        key = self.__key(value)
+        i, j = self.__bisect_left(key)
+        return i < len(self.__keys) and self.__keys[i][j] == key
+
+
+    def __len__(self):
+        """Returns the length of the list
+
+        >>> L = SortedList([5, 5, -18, -1, 3, 4, 7, 8, 22, 99, 2, 1, 3])
+        >>> len(L)
+        13
+        >>> L = SortedList()
+        >>> len(L)
+        0
+        """
+        return self.__len
+
+
+    def __str__(self):
+        """Returns a human readable string version of the list; the
+        result could be very long
+
+        >>> L = SortedList([-1, 3, 4, 7, 8, 22, -9, 2, 1, 3])
+        >>> str(L)
+        '[-9, -1, 1, 2, 3, 3, 4, 7, 8, 22]'
+        >>> L = SortedList()
+        >>> str(L)
+        '[]'
+        >>> L = SortedList(("the", "quick", "brown", "fox", "jumped"))
+        >>> str(L)
+        "['brown', 'fox', 'jumped', 'quick', 'the']"
+        """
+        return str(list(self))
+
+
+    def copy(self):
+        """Returns a shallow copy of the list with the same key function
+        >>> L = SortedList([-1, 3, 4, 7, 8, 22, -9, 2, 1, 3])
+        >>> m = L.copy()
+        >>> str(m)
+        '[-9, -1, 1, 2, 3, 3, 4, 7, 8, 22]'
+        >>> m[:]
+        [-9, -1, 1, 2, 3, 3, 4, 7, 8, 22]
+        >>> import copy
+        >>> n = copy.copy(L)
+        >>> str(n)
+        '[-9, -1, 1, 2, 3, 3, 4, 7, 8, 22]'
+        """
+        return SortedList(self, self.__key, self.__load)
+
+    __copy__ = copy
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
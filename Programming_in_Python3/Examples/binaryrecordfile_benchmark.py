@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# Copyright (c) 2008-11 Qtrac Ltd. All rights reserved.
+# This program or module is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version. It is provided for educational
+# purposes and is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+
+"""Compares BinaryRecordFile's file handle and memory mapped modes
+
+usage: binaryrecordfile_benchmark.py [records [record_size]]
+
+Writes records (default 200000) records of record_size (default 64)
+bytes in order, reads them back in order, then reads and overwrites
+them in random order, for a file handle with and without auto_flush and
+for a memory mapped file. Then it does the same using write_many(),
+bulk_iter() and read_many(), with batches of 1000 random records.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import BinaryRecordFile
+
+
+def benchmark(filename, count, size, **kwargs):
+    if os.path.exists(filename):
+        os.remove(filename)
+    brf = BinaryRecordFile.BinaryRecordFile(filename, size, **kwargs)
+    record = bytes(i % 256 for i in range(size))
+    order = list(range(count))
+    random.shuffle(order)
+    timings = []
+
+    start = time.perf_counter()
+    for index in range(count):
+        brf[index] = record
+    brf.flush()
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for index in range(count):
+        brf[index]
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for index in order:
+        brf[index]
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for index in order:
+        brf[index] = record
+    brf.flush()
+    timings.append(time.perf_counter() - start)
+
+    brf.close()
+    os.remove(filename)
+    return timings
+
+
+def benchmark_many(filename, count, size, batch=1000, **kwargs):
+    if os.path.exists(filename):
+        os.remove(filename)
+    brf = BinaryRecordFile.BinaryRecordFile(filename, size, **kwargs)
+    record = bytes(i % 256 for i in range(size))
+    order = list(range(count))
+    random.shuffle(order)
+    batches = [order[i:i + batch] for i in range(0, count, batch)]
+    timings = []
+
+    start = time.perf_counter()
+    brf.write_many((index, record) for index in range(count))
+    brf.flush()
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for index, item in brf.bulk_iter():
+        pass
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for indexes in batches:
+        brf.read_many(indexes)
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for indexes in batches:
+        brf.write_many({index: record for index in indexes})
+    brf.flush()
+    timings.append(time.perf_counter() - start)
+
+    brf.close()
+    os.remove(filename)
+    return timings
+
+
+def main():
+    count = int(float(sys.argv[1])) if len(sys.argv) > 1 else 200000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    filename = os.path.join(tempfile.gettempdir(), "benchmark.dat")
+    random.seed(count)
+    print("{0} records of {1} bytes (seconds)".format(count, size))
+    print("{0:<18} {1:>10} {2:>10} {3:>10} {4:>10}".format(
+          "mode", "write", "read", "rand read", "rand write"))
+    modes = (("auto_flush", dict(auto_flush=True)),
+             ("no auto_flush", dict(auto_flush=False)),
+             ("memory_map", dict(memory_map=True)))
+    for name, kwargs in modes:
+        print("{0:<18} {1:>10.3f} {2:>10.3f} {3:>10.3f} {4:>10.3f}".format(
+              name, *benchmark(filename, count, size, **kwargs)))
+    for name, kwargs in modes:
+        print("{0:<18} {1:>10.3f} {2:>10.3f} {3:>10.3f} {4:>10.3f}".format(
+              name + " many", *benchmark_many(filename, count, size,
+                                              **kwargs)))
+
+
+main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Copyright (c) 2008-11 Qtrac Ltd. All rights reserved.
+# This program or module is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version. It is provided for educational
+# purposes and is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+
+"""Times streaming updates into a big SortedDict
+
+usage: sorteddict_benchmark.py [size [batch [batches]]]
+
+Builds a SortedDict of size (default 1000000) random keys, then applies
+batches (default 10) updates of batch (default 10000) keys, half of
+which are already in the dictionary. Each update is timed against
+rebuilding the sorted keys from scratch, which is what update() used to
+do, and fromkeys() and copy() are timed against sorting the keys again.
+"""
+
+import random
+import sys
+import time
+
+import SortedDict
+import SortedList
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    size = int(float(sys.argv[1])) if len(sys.argv) > 1 else 10 ** 6
+    batch = int(float(sys.argv[2])) if len(sys.argv) > 2 else 10 ** 4
+    batches = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    random.seed(size)
+    seconds, d = timed(SortedDict.SortedDict,
+                       {random.random(): i for i in range(size)})
+    print("build {0} keys: {1:.3f} sec".format(size, seconds))
+
+    existing = list(dict.keys(d))
+    incremental = rebuild = 0
+    for i in range(batches):
+        update = {random.random(): i for j in range(batch // 2)}
+        update.update((key, i) for key in
+                      random.sample(existing, batch - len(update)))
+        seconds, _ = timed(d.update, update)
+        incremental += seconds
+        seconds, _ = timed(SortedList.SortedList, dict.keys(d))
+        rebuild += seconds
+    print("{0} updates of {1} keys: {2:.3f} sec (rebuilding the keys "
+          "would take {3:.3f} sec)".format(batches, batch, incremental,
+                                           rebuild))
+
+    seconds, _ = timed(SortedDict.SortedDict.fromkeys, d, 0)
+    unsorted, _ = timed(SortedDict.SortedDict.fromkeys, list(d), 0)
+    print("fromkeys: {0:.3f} sec (from an unsorted list {1:.3f} "
+          "sec)".format(seconds, unsorted))
+    seconds, _ = timed(d.copy)
+    unsorted, _ = timed(SortedDict.SortedDict, dict(d))
+    print("copy: {0:.3f} sec (from an unsorted dict {1:.3f} "
+          "sec)".format(seconds, unsorted))
+
+
+main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# Copyright (c) 2008-11 Qtrac Ltd. All rights reserved.
+# This program or module is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version. It is provided for educational
+# purposes and is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+
+"""Compares the list-backed SortedList with the chunked one
+
+usage: sortedlist_benchmark.py [max_size [time_limit]]
+
+For each size from 1e3 up to max_size (default 1e7) the benchmark adds
+that many random values one at a time, looks up 1000 values by index
+position and with index(), then removes every value one at a time. An
+implementation that takes more than time_limit seconds (default 60) for
+a size is skipped for the larger sizes, since the list-backed version is
+quadratic and would take hours at 1e7.
+"""
+
+import random
+import sys
+import time
+
+import SortedList
+import SortedListChunked
+
+
+def benchmark(Class, values):
+    timings = []
+    start = time.perf_counter()
+    L = Class()
+    for value in values:
+        L.add(value)
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(values), max(1, len(values) // 1000)):
+        L.index(L[i])
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for value in values:
+        L.remove(value)
+    timings.append(time.perf_counter() - start)
+    assert len(L) == 0
+    return timings
+
+
+def main():
+    max_size = int(float(sys.argv[1])) if len(sys.argv) > 1 else 10 ** 7
+    time_limit = float(sys.argv[2]) if len(sys.argv) > 2 else 60
+    classes = (("list", SortedList.SortedList),
+               ("chunked", SortedListChunked.SortedList))
+    skipped = set()
+    print("{0:>10} {1:>8} {2:>10} {3:>10} {4:>10} {5:>10}".format(
+          "size", "class", "add", "lookup", "remove", "total"))
+    size = 1000
+    while size <= max_size:
+        random.seed(size)
+        values = [random.random() for i in range(size)]
+        for name, Class in classes:
+            if name in skipped:
+                print("{0:>10} {1:>8} {2:>10}".format(size, name,
+                                                      "skipped"))
+                continue
+            timings = benchmark(Class, values)
+            total = sum(timings)
+            print("{0:>10} {1:>8} {2:>10.3f} {3:>10.3f} {4:>10.3f} "
+                  "{5:>10.3f}".format(size, name, *(timings + [total])))
+            if total > time_limit:
+                skipped.add(name)
+        size *= 10
+
+
+main()
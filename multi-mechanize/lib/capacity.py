@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#  
+#  This file is part of Multi-Mechanize
+#
+#
+#  capacity search:  find the highest load that still meets a latency/error SLO.
+#
+#  load is expressed as a scale factor on every user group's configured threads, 
+#  so the workload mix stays the same from step to step.  the search doubles the 
+#  scale until the SLO is broken, then binary-searches between the last passing 
+#  and the first failing step.
+
+
+import reportwriter
+from results import average, percentile, chart_backend
+
+
+
+class SearchConfig(object):
+    def __init__(self, step_time=30, max_latency=1.0, latency_percentile=90, max_error_rate=0.01, max_scale=64):
+        self.step_time = step_time
+        self.max_latency = max_latency
+        self.latency_percentile = latency_percentile
+        self.max_error_rate = max_error_rate
+        self.max_scale = max_scale
+    
+    
+    
+class StepResult(object):
+    def __init__(self, scale, num_threads, duration, trans_times, error_count, search_config):
+        self.scale = scale
+        self.num_threads = num_threads
+        self.count = len(trans_times)
+        self.error_count = error_count
+        self.throughput = self.count / float(duration)
+        if trans_times:
+            self.avg_latency = average(trans_times)
+            self.pct_latency = percentile(trans_times, search_config.latency_percentile)
+            self.error_rate = error_count / float(self.count)
+        else:
+            self.avg_latency = self.pct_latency = None
+            self.error_rate = 1.0
+        self.passed = (self.pct_latency is not None and 
+                       self.pct_latency <= search_config.max_latency and 
+                       self.error_rate <= search_config.max_error_rate)
+
+
+
+def search(run_step, max_scale):
+    # run_step(scale) runs one load step and returns its StepResult
+    steps = []
+    
+    def step(scale):
+        result = run_step(scale)
+        steps.append(result)
+        return result.passed
+    
+    # exponential probe for the first failing step
+    passing, failing = 0, None
+    scale = 1
+    while scale <= max_scale:
+        if step(scale):
+            passing = scale
+            scale *= 2
+        else:
+            failing = scale
+            break
+    if failing is None:
+        if passing < max_scale and step(max_scale):
+            passing = max_scale
+        elif passing < max_scale:
+            failing = max_scale
+    
+    # binary search for the knee
+    if failing is not None:
+        while failing - passing > 1:
+            scale = (passing + failing) // 2
+            if step(scale):
+                passing = scale
+            else:
+                failing = scale
+    
+    best = None
+    for result in steps:
+        if result.scale == passing:
+            best = result
+    return best, steps
+    
+    
+    
+def output_capacity_results(results_dir, search_config, best, steps, user_group_configs, charts=None):
+    report = reportwriter.Report(results_dir)
+    charts = chart_backend(charts)
+    if charts.HEADER:
+        report.write_line(charts.HEADER)
+    curve = sorted(steps, key=lambda result: result.scale)
+    
+    with open(results_dir + 'capacity.csv', 'w') as f:
+        f.write('scale,threads,transactions,throughput,avg_latency,pct_latency,error_rate,passed\n')
+        for result in curve:
+            f.write('%i,%i,%i,%.3f,%s,%s,%.4f,%s\n' % (result.scale, result.num_threads, result.count, result.throughput, 
+                format_secs(result.avg_latency), format_secs(result.pct_latency), result.error_rate, result.passed))
+    
+    report.write_line('<h1>Capacity Search Report</h1>')
+    report.write_line('<h2>Summary</h2>')
+    report.write_line('<div class="summary">')
+    report.write_line('<b>SLO:</b> %spct latency &lt;= %.3f secs, error rate &lt;= %.2f%%<br />' % (
+        search_config.latency_percentile, search_config.max_latency, search_config.max_error_rate * 100))
+    report.write_line('<b>step time:</b> %d secs<br />' % search_config.step_time)
+    report.write_line('<b>steps run:</b> %d<br /><br />' % len(steps))
+    if best is None:
+        report.write_line('<b>max sustainable throughput:</b> SLO not met at the lowest load<br />')
+    else:
+        report.write_line('<b>max sustainable throughput:</b> %.2f transactions/sec<br />' % best.throughput)
+        report.write_line('<b>at:</b> %ix configured threads (%d threads)<br /><br />' % (best.scale, best.num_threads))
+    if user_group_configs:
+        report.write_line('<b>workload configuration (scale 1x):</b><br /><br />')
+        report.write_line('<table>')
+        report.write_line('<tr><th>group name</th><th>threads</th><th>script name</th></tr>')
+        for user_group_config in user_group_configs:
+            report.write_line('<tr><td>%s</td><td>%d</td><td>%s</td></tr>' % 
+                (user_group_config.name, user_group_config.num_threads, user_group_config.script_file))
+        report.write_line('</table>')
+    report.write_line('</div>')
+    
+    report.write_line('<h2>Throughput vs. Latency</h2>')
+    report.write_line('<table>')
+    report.write_line('<tr><th>scale</th><th>threads</th><th>count</th><th>rate</th><th>avg</th><th>%spct</th><th>errors</th><th>SLO</th></tr>' % search_config.latency_percentile)
+    for result in curve:
+        report.write_line('<tr><td>%ix</td><td>%i</td><td>%i</td><td>%.2f</td><td>%s</td><td>%s</td><td>%.2f%%</td><td>%s</td></tr>' % (
+            result.scale, result.num_threads, result.count, result.throughput, 
+            format_secs(result.avg_latency), format_secs(result.pct_latency), result.error_rate * 100, 
+            result.passed and 'pass' or 'fail'))
+    report.write_line('</table>')
+    
+    curve_chart = charts.capacity_graph([(result.throughput, result.pct_latency) for result in curve if result.pct_latency is not None], 
+        search_config.max_latency, 'Capacity_curve.png', results_dir)
+    report.write_line('<h3>Graphs</h3>')
+    report.write_line('<h4>%spct Response Time vs. Throughput</h4>' % search_config.latency_percentile)
+    report.write_line(curve_chart)
+    
+    report.write_line('<hr />')
+    report.write_closing_html()
+    
+    
+    
+def format_secs(secs):
+    if secs is None:
+        return 'N/A'
+    return '%.3f' % secs
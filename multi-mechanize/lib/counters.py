@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#
+#  This file is part of Multi-Mechanize
+#
+#
+#  live counters in shared memory, for the console progress line.
+#
+#  each user group process gets one block, created by the controller before
+#  the process starts.  every agent owns a row of the block and is the only
+#  writer of it, so no process-shared lock is needed; the controller just
+#  sums the rows.  the counts don't wait on the results queue and writer,
+#  so they stay current when the results pipeline falls behind.
+
+
+import multiprocessing
+
+
+
+FIELDS = ('transactions', 'timers', 'errors', 'timeouts')
+
+
+
+class CounterBlock(object):
+    def __init__(self, num_rows):
+        self.num_rows = num_rows
+        self.counts = multiprocessing.Array('l', num_rows * len(FIELDS), lock=False)
+
+
+    def add(self, row, transactions=0, timers=0, errors=0, timeouts=0):
+        # only the agent that owns the row may call this
+        base = row * len(FIELDS)
+        counts = self.counts
+        counts[base] += transactions
+        counts[base + 1] += timers
+        counts[base + 2] += errors
+        counts[base + 3] += timeouts
+
+
+    def reset(self):
+        self.counts[:] = [0] * len(self.counts)
+
+
+    def totals(self):
+        # [transactions, timers, errors, timeouts] summed over all rows
+        values = self.counts[:]
+        return [sum(values[i::len(FIELDS)]) for i in range(len(FIELDS))]
+
+
+
+def sum_totals(blocks):
+    totals = [0] * len(FIELDS)
+    for block in blocks:
+        for i, value in enumerate(block.totals()):
+            totals[i] += value
+    return totals
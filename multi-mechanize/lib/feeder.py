@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#  
+#  This file is part of Multi-Mechanize
+#
+#
+#  shared test data for Transaction scripts.
+#
+#  a feeder is declared in config.cfg:
+#
+#    [feeder:users]
+#    file: data/users.csv
+#    mode: unique
+#
+#  and scripts read rows from it at run time (feeders is set on the Transaction 
+#  class before it is instantiated, so __init__ can read rows too):
+#
+#    row = self.feeders['users'].next_row()
+#
+#  modes:  sequential walks the rows in order and wraps around, random picks any 
+#  row, unique hands out each row once and then raises FeederExhausted.  in the 
+#  sequential and unique modes, the processes of a node take turns:  process p 
+#  of k gets rows p, p + k, p + 2k, ...  so they don't all start at row 0.
+#
+#  the data file is memory-mapped once per node before the user group processes 
+#  are forked, so every process and thread shares the same pages.  each process 
+#  gets its own cursor, so handing out rows never takes a lock.
+
+
+import array
+import csv
+import itertools
+import mmap
+import os
+import random
+import threading
+
+
+
+MODES = ('sequential', 'random', 'unique')
+FORMATS = ('csv', 'binary')
+
+
+
+class FeederExhausted(Exception):
+    pass
+    
+
+
+class FeederConfig(object):
+    def __init__(self, name, file_name, mode='sequential', format='csv', record_size=None):
+        self.name = name
+        self.file_name = file_name
+        self.mode = mode
+        self.format = format
+        self.record_size = record_size
+
+
+
+class DataFeeder(object):
+    def __init__(self, name, file_name, mode='sequential', record_size=None):
+        if mode not in MODES:
+            raise ValueError('unknown feeder mode: %s' % mode)
+        self.name = name
+        self.file_name = file_name
+        self.mode = mode
+        self.record_size = record_size  # None for csv (one row per line)
+        self.process_num = 0
+        self.num_processes = 1
+        self.__open()
+        self.bind(0, 1)
+        
+        
+    def __open(self):
+        f = open(self.file_name, 'rb')
+        try:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError('feeder file is empty: %s' % self.file_name)
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        
+        if self.record_size:
+            self.offsets = None
+            self.row_count = len(self.mm) // self.record_size
+        else:
+            # start offset of every line.  4 or 8 bytes per row, no matter how wide the rows are.
+            self.offsets = array.array('L')
+            pos = 0
+            size = len(self.mm)
+            while pos < size:
+                end = self.mm.find('\n', pos)
+                if end == -1:
+                    end = size
+                if end > pos and self.mm[pos:end].strip():
+                    self.offsets.append(pos)
+                pos = end + 1
+            self.offsets.append(size)  # sentinel, marks the end of the last row
+            self.row_count = len(self.offsets) - 1
+        if self.row_count == 0:
+            raise ValueError('feeder file has no rows: %s' % self.file_name)
+    
+    
+    def bind(self, process_num, num_processes):
+        # called inside each user group process, so cursors are never shared between processes
+        self.process_num = process_num
+        self.num_processes = num_processes
+        self.cursor = itertools.count()  # next() is atomic, threads in a process can share it
+        self.local = threading.local()
+    
+    
+    def next_index(self):
+        if self.mode == 'random':
+            try:
+                rnd = self.local.random
+            except AttributeError:
+                rnd = self.local.random = random.Random()
+            return rnd.randrange(self.row_count)
+        elif self.mode == 'unique':
+            index = self.process_num + (self.cursor.next() * self.num_processes)
+            if index >= self.row_count:
+                raise FeederExhausted('data feeder %s exhausted' % self.name)
+            return index
+        else:
+            return (self.process_num + (self.cursor.next() * self.num_processes)) % self.row_count
+    
+    
+    def row(self, index):
+        if self.record_size:
+            start = index * self.record_size
+            return self.mm[start:start + self.record_size]
+        line = self.mm[self.offsets[index]:self.offsets[index + 1]].rstrip('\r\n')
+        return csv.reader([line]).next()
+        
+        
+    def next_row(self):
+        return self.row(self.next_index())
+    
+    
+    def __len__(self):
+        return self.row_count
+    
+    
+    def __getstate__(self):
+        # the map can't be pickled (spawned processes on windows), it is re-opened on the other side
+        state = self.__dict__.copy()
+        for name in ('mm', 'offsets', 'cursor', 'local'):
+            state.pop(name, None)
+        return state
+    
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__open()
+        self.bind(self.process_num, self.num_processes)
+
+
+
+def open_feeders(feeder_configs):
+    feeders = {}
+    for feeder_config in feeder_configs:
+        if feeder_config.format == 'binary':
+            record_size = feeder_config.record_size
+        else:
+            record_size = None
+        feeders[feeder_config.name] = DataFeeder(feeder_config.name, feeder_config.file_name, feeder_config.mode, record_size)
+    return feeders
@@ -12,11 +12,21 @@ try:
     import matplotlib
     matplotlib.use('Agg')  # use a non-GUI backend
     from pylab import *
+    available = True
 except ImportError:
-    print 'ERROR: can not import Matplotlib. install Matplotlib to generate graphs'
+    available = False
     
 
 
+# nothing to add to the report head for PNG graphs (see jsgraph.HEADER)
+HEADER = ''
+
+
+
+def image_html(image_name):
+    return '<img src="%s"></img>' % image_name
+
+
 # response time graph for raw data
 def resp_graph_raw(nested_resp_list, image_name, dir='./'):
     fig = figure(figsize=(8, 3.3))  # image dimensions  
@@ -33,6 +43,7 @@ def resp_graph_raw(nested_resp_list, image_name, dir='./'):
         markeredgecolor='blue', markerfacecolor='blue', markersize=2.0)
     ax.plot([0.0,], [0.0,], linewidth=0.0, markersize=0.0)
     savefig(dir + image_name) 
+    return image_html(image_name)
     
     
 
@@ -77,6 +88,7 @@ def resp_graph(avg_resptime_points_dict, percentile_80_resptime_points_dict, per
             )
             
     savefig(dir + image_name) 
+    return image_html(image_name)
     
     
     
@@ -96,4 +108,59 @@ def tp_graph(throughputs_dict, image_name, dir='./'):
         markeredgecolor='red', markerfacecolor='yellow', markersize=2.0)
     ax.plot([0.0,], [0.0,], linewidth=0.0, markersize=0.0)
     savefig(dir + image_name) 
-    
\ No newline at end of file
+    return image_html(image_name)
+        
+    
+    
+# network throughput graph (KB/sec sent and received)
+def net_graph(sent_dict, received_dict, image_name, dir='./'):
+    fig = figure(figsize=(8, 3.3))  # image dimensions  
+    ax = fig.add_subplot(111)
+    ax.set_xlabel('Elapsed Time In Test (secs)', size='x-small')
+    ax.set_ylabel('Network Throughput (KB/sec)' , size='x-small')
+    ax.grid(True, color='#666666')
+    xticks(size='x-small')
+    yticks(size='x-small')
+    x_seq = sorted(received_dict.keys())
+    y_seq = [received_dict[x] for x in x_seq]
+    ax.plot(x_seq, y_seq, 
+        color='blue', linestyle='-', linewidth=0.75, marker='o', 
+        markeredgecolor='blue', markerfacecolor='yellow', markersize=2.0)
+    x_seq = sorted(sent_dict.keys())
+    y_seq = [sent_dict[x] for x in x_seq]
+    ax.plot(x_seq, y_seq, 
+        color='green', linestyle='-', linewidth=0.75, marker='o', 
+        markeredgecolor='green', markerfacecolor='yellow', markersize=2.0)
+    ax.plot([0.0,], [0.0,], linewidth=0.0, markersize=0.0)
+    ax.legend(
+            ax.get_lines()[:2], 
+            ('received', 'sent'), 
+            loc='best',
+            handlelength=1,
+            borderpad=1,                
+            prop=matplotlib.font_manager.FontProperties(size='xx-small')
+            )
+    savefig(dir + image_name) 
+    return image_html(image_name)
+    
+    
+    
+# capacity curve (latency vs. throughput, one point per load step)
+def capacity_graph(points, max_latency, image_name, dir='./'):
+    fig = figure(figsize=(8, 3.3))  # image dimensions  
+    ax = fig.add_subplot(111)
+    ax.set_xlabel('Throughput (transactions/sec)', size='x-small')
+    ax.set_ylabel('Response Time (secs)' , size='x-small')
+    ax.grid(True, color='#666666')
+    xticks(size='x-small')
+    yticks(size='x-small')
+    points = sorted(points)
+    x_seq = [item[0] for item in points]
+    y_seq = [item[1] for item in points]
+    ax.plot(x_seq, y_seq, 
+        color='blue', linestyle='-', linewidth=0.75, marker='o', 
+        markeredgecolor='blue', markerfacecolor='yellow', markersize=3.0)
+    ax.axhline(max_latency, color='red', linestyle='--', linewidth=0.75)
+    ax.plot([0.0,], [0.0,], linewidth=0.0, markersize=0.0)
+    savefig(dir + image_name) 
+    return image_html(image_name)
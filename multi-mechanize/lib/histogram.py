@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#  
+#  This file is part of Multi-Mechanize
+#
+#
+#  log-linear histogram of timer values (secs), so percentiles can be taken 
+#  without keeping every sample.  values are bucketed in microseconds with 
+#  11 bits of precision (relative error < 0.1%); min, max, mean and stdev 
+#  are exact.
+
+
+import math
+
+
+
+SUB_BUCKET_BITS = 11
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+UNITS_PER_SEC = 1000000
+
+
+
+def bucket_index(value):
+    units = int(value * UNITS_PER_SEC)
+    if units < SUB_BUCKET_COUNT:
+        return max(units, 0)
+    shift = units.bit_length() - SUB_BUCKET_BITS
+    return (shift * SUB_BUCKET_HALF) + (units >> shift)
+
+
+
+def bucket_limit(index):
+    # first value past the bucket, in secs
+    if index < SUB_BUCKET_COUNT:
+        return float(index + 1) / UNITS_PER_SEC
+    shift = (index - SUB_BUCKET_HALF) // SUB_BUCKET_HALF
+    return float((index - (shift * SUB_BUCKET_HALF) + 1) << shift) / UNITS_PER_SEC
+
+
+
+def bucket_value(index):
+    # midpoint of the bucket, in secs
+    if index < SUB_BUCKET_COUNT:
+        return float(index) / UNITS_PER_SEC
+    shift = (index - SUB_BUCKET_HALF) // SUB_BUCKET_HALF
+    lower = (index - (shift * SUB_BUCKET_HALF)) << shift
+    return (lower + ((1 << shift) / 2.0)) / UNITS_PER_SEC
+
+
+
+class Histogram(object):
+    def __init__(self):
+        self.counts = {}  # {bucket index: count}
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = None
+        self.max = None
+    
+    
+    def record(self, value, count=1):
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.total_sq += (value ** 2) * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+    
+    
+    def record_corrected(self, value, expected_interval):
+        # coordinated omission correction (as in HdrHistogram):  a closed-loop agent that waited 'value' secs 
+        # would have sent a request every 'expected_interval' secs meanwhile, and each of those would have 
+        # seen a little less of the stall:  value - expected_interval, value - 2 * expected_interval, ... 
+        # down to expected_interval.  they are back-filled a bucket at a time, so a long stall costs one 
+        # step per bucket it spans rather than one per missing request.
+        self.record(value)
+        if not expected_interval or expected_interval <= 0:
+            return
+        missing = int(value / expected_interval) - 1
+        if missing < 1:
+            return
+        first = value - (missing * expected_interval)
+        done = 0
+        while done < missing:
+            start = first + (done * expected_interval)
+            index = bucket_index(start)
+            count = int(math.ceil((bucket_limit(index) - start) / expected_interval))
+            count = min(max(count, 1), missing - done)
+            # sums of the run start, start + expected_interval, ... (count values)
+            steps = count * (count - 1) / 2.0
+            step_squares = (count - 1) * count * (2 * count - 1) / 6.0
+            self.counts[index] = self.counts.get(index, 0) + count
+            self.count += count
+            self.total += (start * count) + (expected_interval * steps)
+            self.total_sq += ((start ** 2) * count) + (2 * start * expected_interval * steps) + ((expected_interval ** 2) * step_squares)
+            done += count
+        if first < self.min:
+            self.min = first
+    
+    
+    def merge(self, other):
+        for index, count in other.counts.iteritems():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+    
+    
+    def mean(self):
+        return self.total / self.count
+    
+    
+    def stdev(self):
+        # sample standard deviation, same as results.standard_dev()
+        if self.count < 2:
+            return 0
+        variance = (self.total_sq - (self.total ** 2) / self.count) / (self.count - 1)
+        return max(variance, 0) ** .5
+    
+    
+    def percentile(self, percentile):
+        # same rank as results.percentile():  the int(count * pct)th smallest value
+        rank = int(self.count * (percentile / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen > rank:
+                return min(max(bucket_value(index), self.min), self.max)
+        return self.max
+    
+    
+    def __len__(self):
+        return self.count
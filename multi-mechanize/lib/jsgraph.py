@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#  
+#  This file is part of Multi-Mechanize
+#
+#
+#  client-side charts for results.html (no Matplotlib needed).
+#
+#  same functions as graph.py, but instead of rendering a PNG, each one returns 
+#  a <canvas> plus the chart data as compact JSON; the browser draws it with 
+#  the small script in HEADER, which goes in the report once.
+
+
+import json
+import re
+
+
+
+# written once into the report, before any chart
+HEADER = """\
+<script type="text/javascript">
+//<![CDATA[
+function mmChart(id, spec) {
+    var canvas = document.getElementById(id);
+    if (!canvas.getContext) { return; }
+    var ctx = canvas.getContext('2d');
+    var w = canvas.width, h = canvas.height, left = 60, right = 15, top = 15, bottom = 35;
+    var xmin = 0, xmax = 0, ymin = 0, ymax = 0, i, j, s;
+    for (i = 0; i < spec.series.length; i++) {
+        s = spec.series[i];
+        for (j = 0; j < s.x.length; j++) {
+            xmax = Math.max(xmax, s.x[j]);
+            ymax = Math.max(ymax, s.y[j]);
+        }
+    }
+    if (spec.hline !== undefined) { ymax = Math.max(ymax, spec.hline); }
+    if (xmax == xmin) { xmax = xmin + 1; }
+    if (ymax == ymin) { ymax = ymin + 1; }
+    ymax = ymax * 1.05;
+    function px(x) { return left + (x - xmin) / (xmax - xmin) * (w - left - right); }
+    function py(y) { return h - bottom - (y - ymin) / (ymax - ymin) * (h - top - bottom); }
+    ctx.font = '10px Verdana, sans-serif';
+    ctx.strokeStyle = '#666666';
+    ctx.fillStyle = '#000000';
+    ctx.lineWidth = 0.5;
+    for (i = 0; i <= 5; i++) {
+        var gx = xmin + (xmax - xmin) * i / 5, gy = ymin + (ymax - ymin) * i / 5;
+        ctx.beginPath(); ctx.moveTo(px(gx), py(ymin)); ctx.lineTo(px(gx), py(ymax)); ctx.stroke();
+        ctx.beginPath(); ctx.moveTo(px(xmin), py(gy)); ctx.lineTo(px(xmax), py(gy)); ctx.stroke();
+        ctx.textAlign = 'center'; ctx.fillText(+gx.toPrecision(3), px(gx), h - bottom + 12);
+        ctx.textAlign = 'right'; ctx.fillText(+gy.toPrecision(3), left - 4, py(gy) + 3);
+    }
+    ctx.textAlign = 'center';
+    ctx.fillText(spec.xlabel, left + (w - left - right) / 2, h - 5);
+    ctx.save(); ctx.translate(12, top + (h - top - bottom) / 2); ctx.rotate(-Math.PI / 2);
+    ctx.fillText(spec.ylabel, 0, 0); ctx.restore();
+    for (i = 0; i < spec.series.length; i++) {
+        s = spec.series[i];
+        ctx.strokeStyle = s.color; ctx.fillStyle = s.color; ctx.lineWidth = 1;
+        if (s.line) {
+            ctx.beginPath();
+            for (j = 0; j < s.x.length; j++) {
+                if (j == 0) { ctx.moveTo(px(s.x[j]), py(s.y[j])); } else { ctx.lineTo(px(s.x[j]), py(s.y[j])); }
+            }
+            ctx.stroke();
+        }
+        for (j = 0; j < s.x.length; j++) { ctx.fillRect(px(s.x[j]) - 1, py(s.y[j]) - 1, 2, 2); }
+        if (s.label) { ctx.textAlign = 'left'; ctx.fillText(s.label, w - right - 60, top + 12 * (i + 1)); }
+    }
+    if (spec.hline !== undefined) {
+        ctx.strokeStyle = 'red'; ctx.setLineDash && ctx.setLineDash([4, 3]);
+        ctx.beginPath(); ctx.moveTo(px(xmin), py(spec.hline)); ctx.lineTo(px(xmax), py(spec.hline)); ctx.stroke();
+    }
+}
+//]]>
+</script>"""
+
+
+
+def chart_html(image_name, spec):
+    # the id is made safe for html, and quoted for javascript by json
+    chart_id = 'chart_' + re.sub(r'\W', '_', image_name.replace('.png', ''))
+    return ('<canvas id="%s" width="800" height="330"></canvas>\n'
+            '<script type="text/javascript">mmChart(%s, %s);</script>') % (chart_id, json.dumps(chart_id), to_json(spec))
+
+
+
+def to_json(spec):
+    return json.dumps(spec, separators=(',', ':'))
+
+
+
+def series(points, color, line=True, label=None):
+    return {
+        'x': [round(x, 3) for x, y in points], 
+        'y': [round(y, 4) for x, y in points], 
+        'color': color, 
+        'line': line, 
+        'label': label, 
+    }
+
+
+
+# response time graph for raw data
+def resp_graph_raw(nested_resp_list, image_name, dir='./'):
+    return chart_html(image_name, {
+        'xlabel': 'Elapsed Time In Test (secs)', 
+        'ylabel': 'Response Time (secs)', 
+        'series': [series(nested_resp_list, 'blue', line=False)], 
+    })
+    
+    
+
+# response time graph for bucketed data
+def resp_graph(avg_resptime_points_dict, percentile_80_resptime_points_dict, percentile_90_resptime_points_dict, image_name, dir='./'):
+    return chart_html(image_name, {
+        'xlabel': 'Elapsed Time In Test (secs)', 
+        'ylabel': 'Response Time (secs)', 
+        'series': [
+            series(sorted(percentile_90_resptime_points_dict.items()), 'purple', label='90pct'), 
+            series(sorted(percentile_80_resptime_points_dict.items()), 'orange', label='80pct'), 
+            series(sorted(avg_resptime_points_dict.items()), 'green', label='Avg'), 
+        ], 
+    })
+    
+    
+    
+# throughput graph
+def tp_graph(throughputs_dict, image_name, dir='./'):
+    return chart_html(image_name, {
+        'xlabel': 'Elapsed Time In Test (secs)', 
+        'ylabel': 'Transactions Per Second (count)', 
+        'series': [series(sorted(throughputs_dict.items()), 'red')], 
+    })
+    
+    
+    
+# network throughput graph (KB/sec sent and received)
+def net_graph(sent_dict, received_dict, image_name, dir='./'):
+    return chart_html(image_name, {
+        'xlabel': 'Elapsed Time In Test (secs)', 
+        'ylabel': 'Network Throughput (KB/sec)', 
+        'series': [
+            series(sorted(received_dict.items()), 'blue', label='received'), 
+            series(sorted(sent_dict.items()), 'green', label='sent'), 
+        ], 
+    })
+    
+    
+    
+# capacity curve (latency vs. throughput, one point per load step)
+def capacity_graph(points, max_latency, image_name, dir='./'):
+    return chart_html(image_name, {
+        'xlabel': 'Throughput (transactions/sec)', 
+        'ylabel': 'Response Time (secs)', 
+        'series': [series(sorted(points), 'blue')], 
+        'hline': max_latency, 
+    })
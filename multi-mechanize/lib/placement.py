@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#
+#  This file is part of Multi-Mechanize
+#
+#
+#  process placement:  pin user groups and the results writer to cpu cores.
+#
+#    [global]
+#    writer_cpus: 0
+#
+#    [user_group-1]
+#    cpus: 1-15
+#
+#  the controller process (which runs the results writer) is pinned to
+#  writer_cpus, and user groups without a cpus option keep off those cores.
+#  cpu lists use the taskset/cpuset syntax:  0-3,8,10-11
+#
+#  affinity is set with the taskset command (util-linux).  where it isn't
+#  available, placement is skipped with a warning and the test runs unpinned.
+#
+#  user groups are always started by forking (python 2 has no other start
+#  method), so there is no start_method option.
+
+
+import os
+import subprocess
+import sys
+
+
+
+class PlacementConfig(object):
+    def __init__(self, writer_cpus=None):
+        self.writer_cpus = writer_cpus  # sorted list of cpu numbers, or None
+
+
+
+def parse_cpu_list(cpus):
+    # '0-3,8' -> [0, 1, 2, 3, 8]
+    result = set()
+    for entry in cpus.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            if '-' in entry:
+                first, last = [int(x) for x in entry.split('-', 1)]
+            else:
+                first = last = int(entry)
+        except ValueError:
+            raise ValueError('bad cpu list entry: %s' % entry)
+        if first < 0 or last < first:
+            raise ValueError('bad cpu range: %s' % entry)
+        result.update(range(first, last + 1))
+    if not result:
+        raise ValueError('empty cpu list')
+    return sorted(result)
+
+
+
+def format_cpu_list(cpus):
+    return ','.join([str(cpu) for cpu in cpus])
+
+
+
+def set_affinity(cpus, pid=None):
+    # pins every thread of the process.  returns False if placement isn't supported here.
+    if pid is None:
+        pid = os.getpid()
+    try:
+        with open(os.devnull, 'w') as devnull:
+            ret = subprocess.call(['taskset', '-a', '-p', '-c', format_cpu_list(cpus), str(pid)], stdout=devnull, stderr=devnull)
+    except OSError:
+        sys.stderr.write('WARNING: cpu affinity is not supported on this system (taskset not found)\n')
+        return False
+    if ret != 0:
+        sys.stderr.write('WARNING: taskset could not set cpu affinity of process %i to %s\n' % (pid, format_cpu_list(cpus)))
+        return False
+    return True
+
@@ -8,20 +8,20 @@
 
 
 class Report(object):
+    # the report is built in memory and written to results.html in one go by write_closing_html()
     def __init__(self, results_dir):
         self.results_dir = results_dir
         self.fn = results_dir + 'results.html'
+        self.lines = []
         self.write_head_html()
 
     
     def write_line(self, line):
-        with open(self.fn, 'a') as f:
-            f.write('%s\n' % line)
+        self.lines.append('%s\n' % line)
 
 
     def write_head_html(self):
-        with open(self.fn, 'w') as f:
-            f.write("""\
+        self.lines.append("""\
 <!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
     "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
 <html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
@@ -94,11 +94,13 @@ class Report(object):
   
 
     def write_closing_html(self):
-        with open(self.fn, 'a') as f:
-            f.write("""\
+        self.lines.append("""\
 </body>
 </html>
 """)
+        with open(self.fn, 'w') as f:
+            f.write(''.join(self.lines))
+        self.lines = []
 
 
 
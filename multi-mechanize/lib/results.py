@@ -6,24 +6,80 @@
 #  This file is part of Multi-Mechanize
 
 
+import math
+import random
 import time
 from collections import defaultdict
 import graph
+import histogram
+import jsgraph
 import reportwriter
+import segments
 
 
 
-def output_results(results_dir, results_file, run_time, rampup, ts_interval, user_group_configs=None):
+# error recorded for transactions that ran past the configured transaction_timeout
+TIMEOUT_ERROR = 'transaction timeout'
+
+# values of the report_charts option
+CHART_BACKENDS = ('png', 'js')
+
+
+class AnalysisConfig(object):
+    def __init__(self, warmup=None, cooldown=None, co_expected_interval=None, charts=None, raw_sample_size=10000):
+        # steady-state window.  when neither is set, it is detected from the throughput time-series.
+        self.warmup = warmup
+        self.cooldown = cooldown
+        # report coordinated-omission corrected percentiles next to the measured ones, back-filling a 
+        # request every co_expected_interval secs of each stall.  None turns the correction off.
+        self.co_expected_interval = co_expected_interval
+        # 'png' (Matplotlib) or 'js' (drawn in the browser).  None picks png when Matplotlib is installed.
+        self.charts = charts
+        # raw points kept per timer for the scatter plots (0 keeps them all).  aggregates always use every point.
+        self.raw_sample_size = raw_sample_size
+
+
+
+def chart_backend(charts=None):
+    # module that draws the report charts:  graph (PNG files) or jsgraph (embedded in results.html)
+    if charts is None:
+        charts = graph.available and 'png' or 'js'
+    if charts == 'png' and not graph.available:
+        print 'ERROR: can not import Matplotlib. install Matplotlib to generate PNG graphs (using report_charts: js instead)'
+        charts = 'js'
+    if charts not in CHART_BACKENDS:
+        raise ValueError('report_charts must be one of %s, not %r' % (', '.join(CHART_BACKENDS), charts))
+    if charts == 'js':
+        return jsgraph
+    return graph
+
+
+
+def output_results(results_dir, results_file, run_time, rampup, ts_interval, user_group_configs=None, window=None, analysis_config=None):
+    if analysis_config is None:
+        analysis_config = AnalysisConfig()
+    
     report = reportwriter.Report(results_dir)
+    charts = chart_backend(analysis_config.charts)
+    if charts.HEADER:
+        report.write_line(charts.HEADER)
     
-    results = Results(results_dir + results_file, run_time)
+    results = Results(results_dir + results_file, run_time, window, ts_interval, analysis_config.co_expected_interval, 
+                      analysis_config.raw_sample_size)
+    steady_state = results.steady_state_window(analysis_config.warmup, analysis_config.cooldown)
     
     print 'transactions: %i' % results.total_transactions
     print 'errors: %i' % results.total_errors
+    if results.trans_series.bytes_sent or results.trans_series.bytes_received:
+        print 'bytes sent/received: %i/%i' % (results.trans_series.bytes_sent, results.trans_series.bytes_received)
+    if results.total_timeouts:
+        print 'timeouts: %i' % results.total_timeouts
     print ''
     print 'test start: %s' % results.start_datetime
     print 'test finish: %s' % results.finish_datetime
     print ''
+    print 'steady state: %.1f - %.1f secs (%s)' % steady_state
+    print ''
     
     report.write_line('<h1>Performance Results Report</h1>')
     
@@ -32,10 +88,16 @@ def output_results(results_dir, results_file, run_time, rampup, ts_interval, use
     report.write_line('<div class="summary">')
     report.write_line('<b>transactions:</b> %d<br />' % results.total_transactions)
     report.write_line('<b>errors:</b> %d<br />' % results.total_errors)
+    report.write_line('<b>timeouts:</b> %d<br />' % results.total_timeouts)
+    report.write_line('<b>bytes sent:</b> %d<br />' % results.trans_series.bytes_sent)
+    report.write_line('<b>bytes received:</b> %d<br />' % results.trans_series.bytes_received)
     report.write_line('<b>run time:</b> %d secs<br />' % run_time)
     report.write_line('<b>rampup:</b> %d secs<br /><br />' % rampup)
     report.write_line('<b>test start:</b> %s<br />' % results.start_datetime)
     report.write_line('<b>test finish:</b> %s<br /><br />' % results.finish_datetime)
+    if window is not None:
+        report.write_line('<b>analysis window:</b> %s - %s secs<br />' % window)
+    report.write_line('<b>steady state:</b> %.1f - %.1f secs (%s)<br />' % steady_state)
     report.write_line('<b>time-series interval:</b> %s secs<br /><br /><br />' % ts_interval)
     if user_group_configs:
         report.write_line('<b>workload configuration:</b><br /><br />')
@@ -47,57 +109,110 @@ def output_results(results_dir, results_file, run_time, rampup, ts_interval, use
         report.write_line('</table>')
     report.write_line('</div>')
     
+    # transaction mix - only interesting when user groups run weighted script mixes
+    script_names = sorted(set(results.script_series) - set(['']))
+    if len(script_names) > 1:
+        report.write_line('<h2>Transaction Mix</h2>')
+        report.write_line('<table>')
+        report.write_line('<tr><th>script name</th><th>count</th><th>mix</th><th>rate</th><th>errors</th><th>avg</th><th>90pct</th><th>avg bytes sent</th><th>avg bytes received</th></tr>')
+        for script_name in script_names:
+            series = results.script_series[script_name]
+            report.write_line('<tr><td>%s</td><td>%i</td><td>%.1f%%</td><td>%.2f</td><td>%i</td><td>%.3f</td><td>%.3f</td><td>%i</td><td>%i</td></tr>' % (
+                script_name, 
+                series.count, 
+                100.0 * series.count / results.trans_series.count, 
+                series.count / float(run_time), 
+                series.error_count, 
+                series.hist.mean(), 
+                series.hist.percentile(90), 
+                series.bytes_sent / series.count, 
+                series.bytes_received / series.count, 
+            ))
+        report.write_line('</table>')
+    
+    # outcome of each transaction:  the status set by the scripts, or ok/error/timeout
+    if results.status_counts:
+        report.write_line('<h2>Transaction Status</h2>')
+        report.write_line('<table>')
+        report.write_line('<tr><th>status</th><th>count</th><th>share</th></tr>')
+        for status in sorted(results.status_counts):
+            count = results.status_counts[status]
+            report.write_line('<tr><td>%s</td><td>%i</td><td>%.1f%%</td></tr>' % (status, count, 100.0 * count / results.total_transactions))
+        report.write_line('</table>')
+    
     report.write_line('<h2>All Transactions</h2>')
+    write_timer_section(report, charts, results.trans_series, 'All_Transactions', 'Transaction', results_dir, ts_interval, steady_state)
+    
+    # network throughput - a flat bytes/sec line while latency grows points at a bandwidth limit
+    if results.trans_series.bytes_sent or results.trans_series.bytes_received:
+        report.write_line('<h2>Network Throughput</h2>')
+        write_network_section(report, charts, results.trans_series, results_dir)
+        
+    # custom timers
+    for timer_name in sorted(results.timer_series):
+        report.write_line('<hr />')
+        report.write_line('<h2>Custom Timer: %s</h2>' % timer_name)
+        write_timer_section(report, charts, results.timer_series[timer_name], timer_name, 'Timer', results_dir, ts_interval, steady_state)
     
-    # all transactions - response times
-    trans_timer_points = []  # [elapsed, timervalue]
-    trans_timer_vals = []
-    for resp_stats in results.resp_stats_list:
-        t = (resp_stats.elapsed_time, resp_stats.trans_time)
-        trans_timer_points.append(t)
-        trans_timer_vals.append(resp_stats.trans_time)
-    graph.resp_graph_raw(trans_timer_points, 'All_Transactions_response_times.png', results_dir)
+    report.write_line('<hr />')
+    report.write_closing_html()
+
+
+
+def write_timer_section(report, charts, series, image_prefix, label, results_dir, ts_interval, steady_state):
+    raw_points = series.raw_points()
+    raw_chart = charts.resp_graph_raw(raw_points, image_prefix + '_response_times.png', results_dir)
     
-    report.write_line('<h3>Transaction Response Summary (secs)</h3>')
+    report.write_line('<h3>%s Response Summary (secs)</h3>' % label)
     report.write_line('<table>')
-    report.write_line('<tr><th>count</th><th>min</th><th>avg</th><th>80pct</th><th>90pct</th><th>95pct</th><th>max</th><th>stdev</th></tr>') 
-    report.write_line('<tr><td>%i</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td></tr>'  % (
-        results.total_transactions, 
-        min(trans_timer_vals), 
-        average(trans_timer_vals), 
-        percentile(trans_timer_vals, 80), 
-        percentile(trans_timer_vals, 90), 
-        percentile(trans_timer_vals, 95), 
-        max(trans_timer_vals),
-        standard_dev(trans_timer_vals), 
-    ))
+    report.write_line('<tr><th>window</th><th>count</th><th>min</th><th>avg</th><th>80pct</th><th>90pct</th><th>95pct</th><th>99pct</th><th>max</th><th>stdev</th></tr>') 
+    summaries = [('full run', series.hist)]
+    if series.corrected_hist is not None:
+        summaries.append(('full run (CO corrected)', series.corrected_hist))
+    summaries.append(('steady state', series.window_histogram(steady_state[0], steady_state[1])))
+    if series.corrected_hist is not None:
+        summaries.append(('steady state (CO corrected)', series.window_histogram(steady_state[0], steady_state[1], corrected=True)))
+    for window_name, hist in summaries:
+        if not hist.count:
+            report.write_line('<tr><td>%s</td><td>0</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td></tr>' % window_name)
+            continue
+        report.write_line('<tr><td>%s</td><td>%i</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td></tr>'  % (
+            window_name, 
+            hist.count, 
+            hist.min, 
+            hist.mean(), 
+            hist.percentile(80), 
+            hist.percentile(90), 
+            hist.percentile(95), 
+            hist.percentile(99), 
+            hist.max,
+            hist.stdev(), 
+        ))
     report.write_line('</table>')
     
-    
-    # all transactions - interval details
+    # interval details
     avg_resptime_points = {}  # {intervalnumber: avg_resptime}
     percentile_80_resptime_points = {}  # {intervalnumber: 80pct_resptime}
     percentile_90_resptime_points = {}  # {intervalnumber: 90pct_resptime}
     interval_secs = ts_interval
-    splat_series = split_series(trans_timer_points, interval_secs)
     report.write_line('<h3>Interval Details (secs)</h3>')
     report.write_line('<table>')
     report.write_line('<tr><th>interval</th><th>count</th><th>rate</th><th>min</th><th>avg</th><th>80pct</th><th>90pct</th><th>95pct</th><th>max</th><th>stdev</th></tr>') 
-    for i, bucket in enumerate(splat_series):
+    for i, hist in enumerate(series.interval_series()):
         interval_start = int((i + 1) * interval_secs)
-        cnt = len(bucket) 
+        cnt = hist.count
         
         if cnt == 0:
             report.write_line('<tr><td>%i</td><td>0</td><td>0</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td></tr>' % (i + 1))  
         else:
             rate = cnt / float(interval_secs)
-            mn = min(bucket)
-            avg = average(bucket)
-            pct_80 = percentile(bucket, 80)
-            pct_90 = percentile(bucket, 90)
-            pct_95 = percentile(bucket, 95)
-            mx = max(bucket)
-            stdev = standard_dev(bucket)
+            mn = hist.min
+            avg = hist.mean()
+            pct_80 = hist.percentile(80)
+            pct_90 = hist.percentile(90)
+            pct_95 = hist.percentile(95)
+            mx = hist.max
+            stdev = hist.stdev()
             report.write_line('<tr><td>%i</td><td>%i</td><td>%.2f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td></tr>' % (i + 1, cnt, rate, mn, avg, pct_80, pct_90, pct_95, mx, stdev))
 
             avg_resptime_points[interval_start] = avg
@@ -105,197 +220,362 @@ def output_results(results_dir, results_file, run_time, rampup, ts_interval, use
             percentile_90_resptime_points[interval_start] = pct_90
 
     report.write_line('</table>') 
-    graph.resp_graph(avg_resptime_points, percentile_80_resptime_points, percentile_90_resptime_points, 'All_Transactions_response_times_intervals.png', results_dir)
+    intervals_chart = charts.resp_graph(avg_resptime_points, percentile_80_resptime_points, percentile_90_resptime_points, image_prefix + '_response_times_intervals.png', results_dir)
     
+    # throughput
+    throughput_points = {}  # {intervalnumber: numberofrequests}
+    interval_secs = series.tp_interval
+    for i, count in enumerate(series.throughput_series()):
+        throughput_points[int((i + 1) * interval_secs)] = (count / interval_secs)
+    throughput_chart = charts.tp_graph(throughput_points, image_prefix + '_throughput.png', results_dir)
     
     report.write_line('<h3>Graphs</h3>')
     report.write_line('<h4>Response Time: %s sec time-series</h4>' % ts_interval)
-    report.write_line('<img src="All_Transactions_response_times_intervals.png"></img>')     
-    report.write_line('<h4>Response Time: raw data (all points)</h4>')
-    report.write_line('<img src="All_Transactions_response_times.png"></img>') 
-    report.write_line('<h4>Throughput: 5 sec time-series</h4>')
-    report.write_line('<img src="All_Transactions_throughput.png"></img>')  
-    
+    report.write_line(intervals_chart)     
+    if len(raw_points) < series.count:
+        report.write_line('<h4>Response Time: raw data (time-stratified sample, %i of %i points)</h4>' % (len(raw_points), series.count))
+    else:
+        report.write_line('<h4>Response Time: raw data (all points)</h4>')
+    report.write_line(raw_chart) 
+    report.write_line('<h4>Throughput: %i sec time-series</h4>' % interval_secs)
+    report.write_line(throughput_chart)  
 
 
-    # all transactions - throughput
-    throughput_points = {}  # {intervalnumber: numberofrequests}
-    interval_secs = 5.0
-    splat_series = split_series(trans_timer_points, interval_secs)
-    for i, bucket in enumerate(splat_series):
-        throughput_points[int((i + 1) * interval_secs)] = (len(bucket) / interval_secs)
-    graph.tp_graph(throughput_points, 'All_Transactions_throughput.png', results_dir)
-    
-        
-        
-    # custom timers
-    for timer_name in sorted(results.uniq_timer_names):
-        custom_timer_vals = []
-        custom_timer_points = []
-        for resp_stats in results.resp_stats_list:
-            try:
-                val = resp_stats.custom_timers[timer_name]
-                custom_timer_points.append((resp_stats.elapsed_time, val)) 
-                custom_timer_vals.append(val)
-            except KeyError:
-                pass
-        graph.resp_graph_raw(custom_timer_points, timer_name + '_response_times.png', results_dir)
-        
-        throughput_points = {}  # {intervalnumber: numberofrequests}
-        interval_secs = 5.0
-        splat_series = split_series(custom_timer_points, interval_secs)
-        for i, bucket in enumerate(splat_series):
-            throughput_points[int((i + 1) * interval_secs)] = (len(bucket) / interval_secs)
-        graph.tp_graph(throughput_points, timer_name + '_throughput.png', results_dir)
-        
-        report.write_line('<hr />')
-        report.write_line('<h2>Custom Timer: %s</h2>' % timer_name)
-        
-        report.write_line('<h3>Timer Summary (secs)</h3>')
-        
-        report.write_line('<table>')
-        report.write_line('<tr><th>count</th><th>min</th><th>avg</th><th>80pct</th><th>90pct</th><th>95pct</th><th>max</th><th>stdev</th></tr>') 
-        report.write_line('<tr><td>%i</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td></tr>'  % (
-            len(custom_timer_vals), 
-            min(custom_timer_vals), 
-            average(custom_timer_vals), 
-            percentile(custom_timer_vals, 80), 
-            percentile(custom_timer_vals, 90), 
-            percentile(custom_timer_vals, 95), 
-            max(custom_timer_vals),
-            standard_dev(custom_timer_vals)
-        ))
-        report.write_line('</table>')
-    
-        
-        # custom timers - interval details
-        avg_resptime_points = {}  # {intervalnumber: avg_resptime}
-        percentile_80_resptime_points = {}  # {intervalnumber: 80pct_resptime}
-        percentile_90_resptime_points = {}  # {intervalnumber: 90pct_resptime}
-        interval_secs = ts_interval
-        splat_series = split_series(custom_timer_points, interval_secs)
-        report.write_line('<h3>Interval Details (secs)</h3>')
-        report.write_line('<table>')
-        report.write_line('<tr><th>interval</th><th>count</th><th>rate</th><th>min</th><th>avg</th><th>80pct</th><th>90pct</th><th>95pct</th><th>max</th><th>stdev</th></tr>') 
-        for i, bucket in enumerate(splat_series):
-            interval_start = int((i + 1) * interval_secs)
-            cnt = len(bucket) 
-            
-            if cnt == 0:
-                report.write_line('<tr><td>%i</td><td>0</td><td>0</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td><td>N/A</td></tr>' % (i + 1))  
-            else:
-                rate = cnt / float(interval_secs)
-                mn = min(bucket)
-                avg = average(bucket)
-                pct_80 = percentile(bucket, 80)
-                pct_90 = percentile(bucket, 90)
-                pct_95 = percentile(bucket, 95)
-                mx = max(bucket)
-                stdev = standard_dev(bucket)
-
-                report.write_line('<tr><td>%i</td><td>%i</td><td>%.2f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%.3f</td></tr>' % (i + 1, cnt, rate, mn, avg, pct_80, pct_90, pct_95, mx, stdev))
-                 
-                avg_resptime_points[interval_start] = avg
-                percentile_80_resptime_points[interval_start] = pct_80
-                percentile_90_resptime_points[interval_start] = pct_90
-        report.write_line('</table>') 
-        graph.resp_graph(avg_resptime_points, percentile_80_resptime_points, percentile_90_resptime_points, timer_name + '_response_times_intervals.png', results_dir)
-    
-        
-        report.write_line('<h3>Graphs</h3>')
-        report.write_line('<h4>Response Time: %s sec time-series</h4>' % ts_interval)
-        report.write_line('<img src="%s_response_times_intervals.png"></img>' % timer_name)
-        report.write_line('<h4>Response Time: raw data (all points)</h4>')        
-        report.write_line('<img src="%s_response_times.png"></img>' % timer_name)
-        report.write_line('<h4>Throughput: 5 sec time-series</h4>')
-        report.write_line('<img src="%s_throughput.png"></img>' % timer_name) 
-        
-    
-        
-    ## user group times
-    #for user_group_name in sorted(results.uniq_user_group_names):
-    #    ug_timer_vals = []
-    #    for resp_stats in results.resp_stats_list:
-    #        if resp_stats.user_group_name == user_group_name: 
-    #            ug_timer_vals.append(resp_stats.trans_time)
-    #    print user_group_name
-    #    print 'min: %.3f' % min(ug_timer_vals)
-    #    print 'avg: %.3f' % average(ug_timer_vals)
-    #    print '80pct: %.3f' % percentile(ug_timer_vals, 80)
-    #    print '90pct: %.3f' % percentile(ug_timer_vals, 90)
-    #    print '95pct: %.3f' % percentile(ug_timer_vals, 95)
-    #    print 'max: %.3f' % max(ug_timer_vals)
-    #    print ''        
-    
-    report.write_line('<hr />')
-    report.write_closing_html()
+
+def write_network_section(report, charts, series, results_dir):
+    interval_secs = series.tp_interval
+    sent_points = {}  # {intervalnumber: KB/sec}
+    received_points = {}  # {intervalnumber: KB/sec}
+    report.write_line('<table>')
+    report.write_line('<tr><th>interval</th><th>KB/sec sent</th><th>KB/sec received</th></tr>')
+    for i, (bytes_sent, bytes_received) in enumerate(series.network_series()):
+        interval_start = int((i + 1) * interval_secs)
+        sent_points[interval_start] = bytes_sent / 1024.0 / interval_secs
+        received_points[interval_start] = bytes_received / 1024.0 / interval_secs
+        report.write_line('<tr><td>%i</td><td>%.1f</td><td>%.1f</td></tr>' % (i + 1, sent_points[interval_start], received_points[interval_start]))
+    report.write_line('</table>')
+    network_chart = charts.net_graph(sent_points, received_points, 'All_Transactions_network.png', results_dir)
+    report.write_line('<h4>Network Throughput: %i sec time-series</h4>' % interval_secs)
+    report.write_line(network_chart)
 
 
 
 class Results(object):
-    def __init__(self, results_file_name, run_time):
+    def __init__(self, results_file_name, run_time, window=None, ts_interval=10, co_expected_interval=None, raw_sample_size=0):
         self.results_file_name = results_file_name
         self.run_time = run_time
+        self.window = window  # (start, end) elapsed secs, or None for the whole run
+        self.ts_interval = ts_interval
+        self.co_expected_interval = co_expected_interval
+        # raw points each timer keeps per interval, so the sample is spread evenly over the run
+        self.raw_points_per_interval = None
+        if raw_sample_size:
+            self.raw_points_per_interval = max(raw_sample_size // int(math.ceil(run_time / float(ts_interval))), 1)
         self.total_transactions = 0
         self.total_errors = 0
+        self.total_timeouts = 0
+        self.status_counts = defaultdict(int)  # {status: count}
         self.uniq_timer_names = set()
         self.uniq_user_group_names = set()
+        self.uniq_script_names = set()
+        
+        # everything is aggregated in the one pass over the results file
+        self.trans_series = self.__new_series(co_expected_interval is not None)
+        self.timer_series = {}  # {timer_name: TimerSeries}
+        self.script_series = {}  # {script_name: TimerSeries}
         
-        self.resp_stats_list = self.__parse_file()
+        self.epoch_start = None
+        self.epoch_finish = None
+        self.__parse_file()
         
-        self.epoch_start = self.resp_stats_list[0].epoch_secs
-        self.epoch_finish = self.resp_stats_list[-1].epoch_secs
         self.start_datetime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.epoch_start))
         self.finish_datetime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.epoch_finish))
         
         
         
+    def __new_series(self, corrected=False):
+        # every series counts its intervals from the start of the test (or of the window), the same origin 
+        # as the elapsed times warmup and cooldown are given in
+        origin = self.window is not None and float(self.window[0]) or 0.0
+        return TimerSeries(self.ts_interval, origin=origin, corrected=corrected, raw_points_per_interval=self.raw_points_per_interval)
+    
+    
     def __parse_file(self):
-        f = open(self.results_file_name, 'rb')
-        resp_stats_list = []
-        for line in f:
-            fields = line.strip().split(',')
-            
-            request_num = int(fields[0])
-            elapsed_time = float(fields[1])
-            epoch_secs = int(fields[2])
-            user_group_name = fields[3]
-            trans_time = float(fields[4])
-            error = fields[5]
-            
-            self.uniq_user_group_names.add(user_group_name)
-            
-            custom_timers = {}
-            timers_string = ''.join(fields[6:]).replace('{', '').replace('}', '')
-            splat = timers_string.split("'")[1:]
-            timers = []
-            vals = []
-            for x in splat:
-                if ':' in x:
-                    x = float(x.replace(': ', ''))
-                    vals.append(x)
-                else:
-                    timers.append(x)
-                    self.uniq_timer_names.add(x)
-            for timer, val in zip(timers, vals):
-                custom_timers[timer] = val
+        # segmented results only read the segments overlapping the window
+        for line in segments.read_lines(self.results_file_name, self.window):
+            r = parse_line(line)
+            if self.window is not None and not (self.window[0] <= r.elapsed_time < self.window[1]):
+                continue
             
-            r = ResponseStats(request_num, elapsed_time, epoch_secs, user_group_name, trans_time, error, custom_timers)
+            self.uniq_user_group_names.add(r.user_group_name)
+            self.uniq_script_names.add(r.script_name)
+            self.uniq_timer_names.update(r.custom_timers)
             
-            if elapsed_time < self.run_time:  # drop all times that appear after the last request was sent (incomplete interval)
-                resp_stats_list.append(r)
+            if r.elapsed_time < self.run_time:  # drop all times that appear after the last request was sent (incomplete interval)
+                if self.epoch_start is None:
+                    self.epoch_start = r.epoch_secs
+                self.epoch_finish = r.epoch_secs
+                self.__aggregate(r)
             
-            if error != '':
+            if r.error != '':
                 self.total_errors += 1
+            if r.error == TIMEOUT_ERROR:
+                self.total_timeouts += 1
+            if r.status:
+                self.status_counts[r.status] += 1
                 
             self.total_transactions += 1
-            
-        return resp_stats_list    
-   
+    
+    
+    def __aggregate(self, r):
+        expected_interval = self.co_expected_interval
+        self.trans_series.add(r.elapsed_time, r.trans_time, r.error != '', expected_interval)
+        self.trans_series.add_transfer(r.elapsed_time, r.bytes_sent, r.bytes_received)
+        try:
+            script_series = self.script_series[r.script_name]
+        except KeyError:
+            script_series = self.script_series[r.script_name] = self.__new_series(expected_interval is not None)
+        script_series.add(r.elapsed_time, r.trans_time, r.error != '', expected_interval)
+        script_series.add_transfer(r.elapsed_time, r.bytes_sent, r.bytes_received)
+        for timer_name, val in r.custom_timers.iteritems():
+            try:
+                timer_series = self.timer_series[timer_name]
+            except KeyError:
+                timer_series = self.timer_series[timer_name] = self.__new_series()
+            timer_series.add(r.elapsed_time, val)
+    
+    
+    def steady_state_window(self, warmup=None, cooldown=None):
+        # returns (start, end, how) in elapsed secs.  explicit warmup/cooldown win over detection.
+        start = self.trans_series.offset
+        end = float(self.run_time)
+        if self.window is not None:
+            end = min(end, float(self.window[1]))
+        if warmup is None and cooldown is None:
+            counts = self.trans_series.interval_counts()
+            first, last = detect_steady_state(counts)
+            end = min(end, start + last * self.ts_interval)
+            start = start + first * self.ts_interval
+            return (start, end, 'detected')
+        if warmup is not None:
+            start = float(warmup)
+        if cooldown is not None:
+            end = end - cooldown
+        return (start, end, 'configured')
+
+
+
+class TimerSeries(object):
+    # single-pass aggregates for one timer:  histograms for the whole run and for each interval
+    def __init__(self, ts_interval, tp_interval=5.0, origin=0.0, corrected=False, raw_points_per_interval=None):
+        self.ts_interval = ts_interval
+        self.tp_interval = tp_interval
+        self.offset = origin  # elapsed time the intervals are counted from
+        self.count = 0
+        self.error_count = 0
+        # raw (elapsed, value) points for the scatter plot:  a reservoir sample of each interval, or all of them
+        self.raw_points_per_interval = raw_points_per_interval
+        self.raw_samples = {}  # {interval number: [points seen, [(elapsed, value)]]}
+        self.random = random.Random(0)  # the same results file always gives the same sample
+        self.hist = histogram.Histogram()
+        self.intervals = {}  # {interval number: Histogram}
+        self.tp_counts = defaultdict(int)  # {throughput interval number: count}
+        # payload sizes, see add_transfer()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.tp_bytes = {}  # {throughput interval number: [bytes sent, bytes received]}
+        # coordinated-omission corrected copies, see Histogram.record_corrected()
+        self.corrected_hist = None
+        self.corrected_intervals = None
+        if corrected:
+            self.corrected_hist = histogram.Histogram()
+            self.corrected_intervals = {}
+    
+    def add(self, elapsed, value, error=False, expected_interval=None):
+        self.count += 1
+        if error:
+            self.error_count += 1
+        interval = int((elapsed - self.offset) // self.ts_interval)
+        self.sample(interval, (elapsed, value))
+        self.hist.record(value)
+        try:
+            self.intervals[interval].record(value)
+        except KeyError:
+            hist = self.intervals[interval] = histogram.Histogram()
+            hist.record(value)
+        if self.corrected_hist is not None:
+            self.corrected_hist.record_corrected(value, expected_interval)
+            try:
+                hist = self.corrected_intervals[interval]
+            except KeyError:
+                hist = self.corrected_intervals[interval] = histogram.Histogram()
+            hist.record_corrected(value, expected_interval)
+        self.tp_counts[int((elapsed - self.offset) // self.tp_interval)] += 1
+    
+    def add_transfer(self, elapsed, bytes_sent, bytes_received):
+        # called after add() for the same sample
+        if not (bytes_sent or bytes_received):
+            return
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        interval = int((elapsed - self.offset) // self.tp_interval)
+        try:
+            totals = self.tp_bytes[interval]
+        except KeyError:
+            totals = self.tp_bytes[interval] = [0, 0]
+        totals[0] += bytes_sent
+        totals[1] += bytes_received
+    
+    def network_series(self):
+        # [(bytes sent, bytes received)] per throughput interval
+        if not self.tp_counts:
+            return []
+        return [tuple(self.tp_bytes.get(i, (0, 0))) for i in xrange(max(self.tp_counts) + 1)]
+    
+    def sample(self, interval, point):
+        try:
+            sample = self.raw_samples[interval]
+        except KeyError:
+            sample = self.raw_samples[interval] = [0, []]
+        sample[0] += 1
+        points = sample[1]
+        if self.raw_points_per_interval is None or len(points) < self.raw_points_per_interval:
+            points.append(point)
+        else:
+            i = self.random.randrange(sample[0])  # reservoir sampling (algorithm R)
+            if i < self.raw_points_per_interval:
+                points[i] = point
+    
+    def raw_points(self):
+        points = []
+        for interval in sorted(self.raw_samples):
+            points.extend(sorted(self.raw_samples[interval][1]))
+        return points
+    
+    def interval_series(self):
+        if not self.intervals:
+            return []
+        return [self.intervals.get(i, histogram.Histogram()) for i in xrange(max(self.intervals) + 1)]
+    
+    def interval_counts(self):
+        return [hist.count for hist in self.interval_series()]
+    
+    def throughput_series(self):
+        if not self.tp_counts:
+            return []
+        return [self.tp_counts.get(i, 0) for i in xrange(max(self.tp_counts) + 1)]
+    
+    def window_histogram(self, start, end, corrected=False):
+        # merged histogram of the intervals whose midpoint falls inside the window
+        if corrected:
+            intervals = self.corrected_intervals
+        else:
+            intervals = self.intervals
+        hist = histogram.Histogram()
+        for i, interval_hist in intervals.iteritems():
+            midpoint = self.offset + (i + 0.5) * self.ts_interval
+            if start <= midpoint < end:
+                hist.merge(interval_hist)
+        return hist
+
+
+
+def detect_steady_state(series):
+    # returns (first, last) interval numbers bounding the steady state:  series[first:last]
+    #
+    # change points are found with the MSER rule (marginal standard error):  truncate 
+    # the d intervals that minimize the standard error of the mean of what is left.  it 
+    # is applied once from the front for warmup, and once from the back for cooldown.
+    # at most half of the run can be cut from either end.
+    n = len(series)
+    if n < 4:
+        return 0, n
+    first = mser_truncation(series)
+    last = n - mser_truncation(list(reversed(series[first:])))
+    return first, last
+
+
+
+def mser_truncation(series):
+    n = len(series)
+    best_d, best_stat = 0, None
+    # running sums from the back, so every candidate truncation point costs O(1)
+    total = 0.0
+    total_sq = 0.0
+    suffix = [None] * (n + 1)
+    for i in xrange(n - 1, -1, -1):
+        total += series[i]
+        total_sq += series[i] ** 2
+        suffix[i] = (total, total_sq)
+    for d in xrange(0, n // 2 + 1):
+        remaining = n - d
+        total, total_sq = suffix[d]
+        mean = total / remaining
+        stat = (total_sq / remaining - mean ** 2) / remaining
+        if best_stat is None or stat < best_stat - 1e-12:
+            best_d, best_stat = d, stat
+    return best_d
+
+
+
+# leading columns of a results.csv row (everything before the custom timers dict).
+# older results files don't have all the columns, so the layout is picked by column count.
+RESULT_LAYOUTS = {
+    6: ('request_num', 'elapsed_time', 'epoch_secs', 'user_group_name', 'trans_time', 'error'),
+    7: ('request_num', 'elapsed_time', 'epoch_secs', 'user_group_name', 'script_name', 'trans_time', 'error'),
+    8: ('request_num', 'elapsed_time', 'epoch_secs', 'user_group_name', 'script_name', 'thread_num', 'trans_time', 'error'),
+    11: ('request_num', 'elapsed_time', 'epoch_secs', 'user_group_name', 'script_name', 'thread_num', 'trans_time', 'error', 
+         'bytes_sent', 'bytes_received', 'status'),
+}
+
+
+
+def parse_line(line):
+    fields = line.strip().split(',')
+    
+    # the custom timers dict comes after the columns.  an error or status can start with '{' too, but it
+    # comes before the dict, and the dict's own fields (split at its commas) don't, so take the last match.
+    candidates = [index for index in RESULT_LAYOUTS if index < len(fields) and fields[index].startswith('{')]
+    if not candidates:
+        raise ValueError('unrecognized results line: %s' % line.strip())
+    timers_index = max(candidates)
+    layout = RESULT_LAYOUTS[timers_index]
+    columns = dict(zip(layout, fields[:timers_index]))
+    
+    custom_timers = {}
+    timers_string = ''.join(fields[timers_index:]).replace('{', '').replace('}', '')
+    splat = timers_string.split("'")[1:]
+    timers = []
+    vals = []
+    for x in splat:
+        if ':' in x:
+            x = float(x.replace(': ', ''))
+            vals.append(x)
+        else:
+            timers.append(x)
+    for timer, val in zip(timers, vals):
+        custom_timers[timer] = val
+    
+    return ResponseStats(
+        int(columns['request_num']), 
+        float(columns['elapsed_time']), 
+        int(columns['epoch_secs']), 
+        columns['user_group_name'], 
+        float(columns['trans_time']), 
+        columns['error'], 
+        custom_timers, 
+        columns.get('script_name', ''), 
+        int(columns['thread_num']) if 'thread_num' in columns else None, 
+        int(columns.get('bytes_sent', 0)), 
+        int(columns.get('bytes_received', 0)), 
+        columns.get('status', ''), 
+    )
+
 
 
 class ResponseStats(object):
-    def __init__(self, request_num, elapsed_time, epoch_secs, user_group_name, trans_time, error, custom_timers):
+    def __init__(self, request_num, elapsed_time, epoch_secs, user_group_name, trans_time, error, custom_timers, script_name='', thread_num=None, 
+                 bytes_sent=0, bytes_received=0, status=''):
         self.request_num = request_num
         self.elapsed_time = elapsed_time
         self.epoch_secs = epoch_secs
@@ -303,6 +583,11 @@ class ResponseStats(object):
         self.trans_time = trans_time
         self.error = error
         self.custom_timers = custom_timers
+        self.script_name = script_name
+        self.thread_num = thread_num
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.status = status
         
 
 
@@ -7,9 +7,9 @@
 #
 """a collection of functions and classes for multi-mechanize results files"""
 
-import re
-import fileinput
 from datetime import datetime
+import results
+import segments
 
 try:
     from sqlalchemy.ext.declarative import declarative_base
@@ -81,8 +81,13 @@ class ResultRow(Base):
     elapsed = Column(Float, nullable=False, index=True)
     epoch = Column(Float, nullable=False, index=True)
     user_group_name = Column(String(50), nullable=False)
+    script_name = Column(String(50), index=True)
+    thread_num = Column(Integer)
     scriptrun_time = Column(Float, nullable=False)
     error = Column(String(255))
+    bytes_sent = Column(Integer)
+    bytes_received = Column(Integer)
+    status = Column(String(50), index=True)
     custom_timers = Column(String(50))
 
     global_config = relation("GlobalConfig",
@@ -93,7 +98,9 @@ class ResultRow(Base):
 
     def __init__(self, project_name=None, run_id=None, trans_count=None, 
             elapsed=None, epoch=None, user_group_name=None,
-            scriptrun_time=None, error=None, custom_timers=None):
+            scriptrun_time=None, error=None, custom_timers=None,
+            script_name=None, thread_num=None, bytes_sent=None,
+            bytes_received=None, status=None):
         self.project_name = str(project_name)
         self.run_id = run_id
         self.trans_count = int(trans_count)
@@ -103,12 +110,18 @@ class ResultRow(Base):
         self.scriptrun_time = float(scriptrun_time)
         self.error = str(error)
         self.custom_timers = str(custom_timers)
+        self.script_name = script_name and str(script_name) or None
+        self.thread_num = thread_num
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.status = status and str(status) or None
 
     def __repr__(self):
-        return "<ResultRow('%s','%s','%i','%.3f','%i','%s','%.3f','%s','%s')>" % (
+        return "<ResultRow('%s','%s','%i','%.3f','%i','%s','%s','%s','%.3f','%s','%s','%s','%s','%s')>" % (
                 self.project_name, self.run_id, self.trans_count, self.elapsed, 
-                self.epoch, self.user_group_name, self.scriptrun_time, 
-                self.error, self.custom_timers)
+                self.epoch, self.user_group_name, self.script_name, self.thread_num, 
+                self.scriptrun_time, self.error, self.bytes_sent, self.bytes_received, 
+                self.status, self.custom_timers)
  
 class TimerRow(Base):
     """class representing a multi-mechanize custom timer result"""
@@ -134,8 +147,6 @@ def load_results_database(project_name, run_localtime, results_dir,
         user_group_configs):
     """parse and load a multi-mechanize results csv file into a database"""
 
-    logline_re = re.compile('(.+),(.+),(.+),(.+),(.+),(.?),(\{.+\})')
-    
     engine = create_engine(results_database, echo=False)
     ResultRow.metadata.create_all(engine)
     TimerRow.metadata.create_all(engine)
@@ -159,21 +170,24 @@ def load_results_database(project_name, run_localtime, results_dir,
                 ug_config.num_threads, ug_config.script_file)
         global_config.user_group_configs.append(user_group_config)
 
-    for line in fileinput.input([results_file]):
+    for line in segments.read_lines(results_file):
         line = line.rstrip()
-        match = logline_re.match(line)
-        if match:
-            result_row = ResultRow(project_name, run_id, match.group(1), 
-                    match.group(2), match.group(3), match.group(4),
-                    match.group(5), match.group(6), match.group(7))
-    
-            global_config.results.append(result_row)
-            timer_data = eval(match.group(7))
-            for index in timer_data:
-                timer_row = TimerRow(index, timer_data[index])
-                result_row.timers.append(timer_row)
-
-            sa_current_session.add(result_row)
+        try:
+            r = results.parse_line(line)
+        except ValueError:
+            continue
+        result_row = ResultRow(project_name, run_id, r.request_num, 
+                r.elapsed_time, r.epoch_secs, r.user_group_name,
+                r.trans_time, r.error, repr(r.custom_timers), 
+                r.script_name, r.thread_num, r.bytes_sent, r.bytes_received, 
+                r.status)
+
+        global_config.results.append(result_row)
+        for index in r.custom_timers:
+            timer_row = TimerRow(index, r.custom_timers[index])
+            result_row.timers.append(timer_row)
+
+        sa_current_session.add(result_row)
     
     sa_current_session.commit()
     sa_current_session.close()
@@ -9,16 +9,20 @@
 import SimpleXMLRPCServer
 import socket
 import thread
+import segments
     
     
     
-def launch_rpc_server(port, project_name, run_callback):  
+def launch_rpc_server(port, project_name, run_callback, pool=None):  
     host = socket.gethostbyaddr(socket.gethostname())[0]
     server = SimpleXMLRPCServer.SimpleXMLRPCServer((host, port), logRequests=False)
-    server.register_instance(RemoteControl(project_name, run_callback))
+    server.register_instance(RemoteControl(project_name, run_callback, pool))
     server.register_introspection_functions()
     print '\nMulti-Mechanize: %s listening on port %i' % (host, port)
-    print 'waiting for xml-rpc commands...\n'
+    if pool is not None:
+        print 'user group processes are warm (%i), waiting for xml-rpc commands...\n' % len(pool.user_groups)
+    else:
+        print 'waiting for xml-rpc commands...\n'
     try:
         server.serve_forever()
     except KeyboardInterrupt:
@@ -27,16 +31,26 @@ def launch_rpc_server(port, project_name, run_callback):
 
 
 class RemoteControl(object):
-    def __init__(self, project_name, run_callback):
+    def __init__(self, project_name, run_callback, pool=None):
         self.project_name = project_name
         self.run_callback = run_callback
+        self.pool = pool  # warm user group processes, or None to fork them for every run
         self.test_running = False
         self.output_dir = None
+        # parameters of the current run, 0 means the value in config.cfg (or start now)
+        self.start_at = 0
+        self.run_time = 0
+        self.rampup = 0
     
-    def run_test(self):
+    def run_test(self, start_at=0, run_time=0, rampup=0):
+        # start_at is an epoch time:  a controller can pass the same one to every node so they start in lockstep
         if self.test_running:
             return 'Test Already Running'
         else:
+            self.test_running = True
+            self.start_at = start_at
+            self.run_time = run_time
+            self.rampup = rampup
             thread.start_new_thread(self.run_callback, (self,))
             return 'Test Started'    
     
@@ -59,5 +73,4 @@ class RemoteControl(object):
         if self.output_dir is None:
             return 'Results Not Available'
         else:
-            with open(self.output_dir + 'results.csv', 'r') as f:
-                return f.read()
+            return ''.join(segments.read_lines(self.output_dir + 'results.csv'))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#  
+#  This file is part of Multi-Mechanize
+#
+#
+#  segmented results files for long (soak) tests.
+#
+#  with results_segment_time set, results are written to results.0000.csv, 
+#  results.0001.csv, ... each covering that many seconds of elapsed time.  closed 
+#  segments are gzipped by a background thread, and results.idx lists the time 
+#  range of every segment so a time window can be analyzed by reading only the 
+#  segments that overlap it.
+
+
+import gzip
+import os
+import Queue
+import shutil
+import threading
+
+
+
+INDEX_HEADER = 'segment,first_elapsed,last_elapsed,first_epoch,last_epoch,count\n'
+
+
+
+class SegmentInfo(object):
+    def __init__(self, segment, first_elapsed, last_elapsed, first_epoch, last_epoch, count):
+        self.segment = segment
+        self.first_elapsed = first_elapsed
+        self.last_elapsed = last_elapsed
+        self.first_epoch = first_epoch
+        self.last_epoch = last_epoch
+        self.count = count
+
+
+
+class SegmentWriter(object):
+    def __init__(self, results_dir, results_file='results.csv', segment_time=None):
+        self.results_dir = results_dir
+        self.results_file = results_file
+        self.segment_time = segment_time
+        self.f = None
+        self.segment_num = None
+        self.info = None
+        self.compressor = None
+        if segment_time:
+            self.compressor = Compressor()
+            self.compressor.daemon = True
+            self.compressor.start()
+            with open(index_name(results_dir + results_file), 'w') as f:
+                f.write(INDEX_HEADER)
+        else:
+            self.f = open(results_dir + results_file, 'w')
+    
+    
+    def write(self, line, elapsed, epoch):
+        if self.segment_time:
+            segment_num = int(elapsed // self.segment_time)
+            # late results (elapsed before the current segment started) stay in the current segment
+            if self.segment_num is None or segment_num > self.segment_num:
+                self.__rotate(segment_num)
+            info = self.info
+            if info.count == 0:
+                info.first_elapsed = info.last_elapsed = elapsed
+                info.first_epoch = info.last_epoch = epoch
+            else:
+                info.first_elapsed = min(info.first_elapsed, elapsed)
+                info.last_elapsed = max(info.last_elapsed, elapsed)
+                info.first_epoch = min(info.first_epoch, epoch)
+                info.last_epoch = max(info.last_epoch, epoch)
+            info.count += 1
+        self.f.write(line)
+        self.f.flush()
+    
+    
+    def __rotate(self, segment_num):
+        self.__close_segment()
+        self.segment_num = segment_num
+        segment = segment_name(self.results_file, segment_num)
+        self.f = open(self.results_dir + segment, 'w')
+        self.info = SegmentInfo(segment, 0, 0, 0, 0, 0)
+    
+    
+    def __close_segment(self):
+        if self.f is None:
+            return
+        self.f.close()
+        self.f = None
+        if self.segment_time:
+            info = self.info
+            with open(index_name(self.results_dir + self.results_file), 'a') as f:
+                f.write('%s,%.3f,%.3f,%i,%i,%i\n' % (info.segment, info.first_elapsed, info.last_elapsed, 
+                    info.first_epoch, info.last_epoch, info.count))
+            self.compressor.queue.put(self.results_dir + info.segment)
+    
+    
+    def close(self):
+        self.__close_segment()
+        if self.compressor is not None:
+            self.compressor.queue.put(None)
+            self.compressor.join()
+
+
+
+class Compressor(threading.Thread):
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.queue = Queue.Queue()
+    
+    def run(self):
+        while True:
+            file_name = self.queue.get()
+            if file_name is None:
+                break
+            src = open(file_name, 'rb')
+            dst = gzip.open(file_name + '.gz.tmp', 'wb')
+            shutil.copyfileobj(src, dst)
+            dst.close()
+            src.close()
+            # readers fall back to the plain segment until the compressed one is in place
+            os.rename(file_name + '.gz.tmp', file_name + '.gz')
+            os.remove(file_name)
+
+
+
+def segment_name(results_file, segment_num):
+    base, ext = os.path.splitext(results_file)
+    return '%s.%04d%s' % (base, segment_num, ext)
+
+
+
+def index_name(results_file_name):
+    return os.path.splitext(results_file_name)[0] + '.idx'
+
+
+
+def read_index(results_file_name):
+    # returns a list of SegmentInfo, or None if the results were not segmented
+    try:
+        f = open(index_name(results_file_name), 'r')
+    except IOError:
+        return None
+    segment_infos = []
+    with f:
+        for line in f:
+            if line == INDEX_HEADER or not line.strip():
+                continue
+            fields = line.strip().split(',')
+            segment_infos.append(SegmentInfo(fields[0], float(fields[1]), float(fields[2]), 
+                int(fields[3]), int(fields[4]), int(fields[5])))
+    return segment_infos
+
+
+
+def results_file_names(results_file_name, window=None):
+    # the files holding results for the given (start, end) elapsed time window
+    segment_infos = read_index(results_file_name)
+    if segment_infos is None:
+        return [results_file_name]
+    results_dir = os.path.dirname(results_file_name)
+    file_names = []
+    for info in segment_infos:
+        if window is not None and (info.last_elapsed < window[0] or info.first_elapsed >= window[1]):
+            continue
+        file_name = os.path.join(results_dir, info.segment)
+        if os.path.exists(file_name + '.gz'):
+            file_name += '.gz'
+        file_names.append(file_name)
+    return file_names
+
+
+
+def read_lines(results_file_name, window=None):
+    for file_name in results_file_names(results_file_name, window):
+        if file_name.endswith('.gz'):
+            f = gzip.open(file_name, 'rb')
+        else:
+            f = open(file_name, 'rb')
+        try:
+            for line in f:
+                yield line
+        finally:
+            f.close()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#
+#  This file is part of Multi-Mechanize
+
+
+""" script to measure how cpu pinning changes timing jitter on a load generator
+
+usage: python affinity_benchmark.py [samples] [busy processes]
+
+a timing process repeatedly sleeps for 1 ms (like an agent waiting on a socket)
+and times a small fixed piece of work (like parsing a response), while busy
+processes load the other cores.  it runs once unpinned and once with the timing
+process on core 0 and the busy processes on the remaining cores, then prints the
+spread of the measured times for each run.
+"""
+
+
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import placement
+
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(xrange(10000))
+
+
+
+def measure(samples, results):
+    timings = []
+    for i in xrange(samples):
+        time.sleep(.001)
+        start = time.time()
+        sum(xrange(20000))
+        timings.append(time.time() - start)
+    results.put(timings)
+
+
+
+def run(samples, num_busy, pinned):
+    num_cpus = multiprocessing.cpu_count()
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    busy_procs = [multiprocessing.Process(target=busy, args=(stop,)) for i in range(num_busy)]
+    timer_proc = multiprocessing.Process(target=measure, args=(samples, results))
+    for proc in busy_procs:
+        proc.start()
+        if pinned:
+            placement.set_affinity(range(1, num_cpus) or [0], proc.pid)
+    timer_proc.start()
+    if pinned:
+        placement.set_affinity([0], timer_proc.pid)
+    timings = results.get()
+    timer_proc.join()
+    stop.set()
+    for proc in busy_procs:
+        proc.join()
+    return timings
+
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    count = len(timings)
+    avg = sum(timings) / count
+    stdev = (sum([(t - avg) ** 2 for t in timings]) / count) ** 0.5
+    return avg, stdev, timings[int(count * .99) - 1], timings[-1]
+
+
+
+if __name__ == '__main__':
+    samples = len(sys.argv) > 1 and int(sys.argv[1]) or 2000
+    num_busy = len(sys.argv) > 2 and int(sys.argv[2]) or multiprocessing.cpu_count()
+
+    print 'cpus: %i  busy processes: %i  samples: %i\n' % (multiprocessing.cpu_count(), num_busy, samples)
+    if multiprocessing.cpu_count() < 2:
+        print 'WARNING: only one cpu, pinning can not separate the timing process from the busy ones\n'
+    print '%-10s %12s %12s %12s %12s %10s' % ('run', 'avg (ms)', 'stdev (ms)', '99pct (ms)', 'max (ms)', 'cv')
+    for name, pinned in (('unpinned', False), ('pinned', True)):
+        avg, stdev, pct_99, mx = summarize(run(samples, num_busy, pinned))
+        print '%-10s %12.4f %12.4f %12.4f %12.4f %10.3f' % (name, avg * 1000, stdev * 1000, pct_99 * 1000, mx * 1000, stdev / avg)
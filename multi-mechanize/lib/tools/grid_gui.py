@@ -15,6 +15,7 @@ sample gui application for controlling multi-mechanize instances via the remote
 import socket
 import ScrolledText
 import Tkinter
+import time
 import tkFileDialog
 import xmlrpclib
 
@@ -26,6 +27,9 @@ NODES = [
     '192.168.1.3:9001',
 ]
 
+# tests start this many secs after 'Run Tests', at the same time on every node (node clocks must be in sync, e.g. ntp)
+START_DELAY = 2
+
 
 
 class Application:
@@ -59,10 +63,11 @@ class Application:
                 
     def run_tests(self):
         self.clear_window()
+        start_at = time.time() + START_DELAY
         for host, port in self.hosts:
             server = xmlrpclib.ServerProxy('http://%s:%s' % (host, port))
             try:
-                status = server.run_test()
+                status = server.run_test(start_at)
                 self.text_box.insert(Tkinter.END, '%s:%s:\n%s\n\n\n' % (host, port, status))
             except socket.error:
                 self.text_box.insert(Tkinter.END, 'can not make connection to: %s:%s\n' % (host, port))
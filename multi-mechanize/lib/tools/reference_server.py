@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#
+#  This file is part of Multi-Mechanize
+
+
+""" loopback HTTP server with known latency, errors and response sizes, for benchmarking multi-mechanize itself
+
+usage: python reference_server.py [options]
+
+    --latency exp:0.05          response latency distribution (secs)
+    --size uniform:512,8192     response body size distribution (bytes)
+    --error-rate 0.01           fraction of requests answered with 500
+
+distributions:  fixed:v  uniform:low,high  exp:mean  normal:mean,stdev  lognormal:mu,sigma
+
+a request can override the server settings with query parameters, e.g.
+GET /?latency=0.2&size=5000&status=503
+
+every response carries the latency and status that were injected in the
+X-Injected-Latency and X-Injected-Status headers, so measured percentiles can
+be checked against the distribution the server actually applied.
+
+the server is a single-threaded event loop (asyncore), with HTTP/1.1 keep-alive,
+so the latency it adds doesn't tie up a thread per request and the load generator,
+not the target, sets the throughput ceiling.
+"""
+
+
+import asynchat
+import asyncore
+import cgi
+import heapq
+import itertools
+import optparse
+import random
+import socket
+import sys
+import time
+import urlparse
+
+
+
+STATUS_TEXT = {200: 'OK', 404: 'Not Found', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+
+def parse_distribution(spec):
+    # 'exp:0.05' -> a function returning random samples (never negative)
+    try:
+        name, params = spec.split(':', 1)
+        params = [float(x) for x in params.split(',')]
+    except ValueError:
+        raise ValueError('bad distribution: %s' % spec)
+    distributions = {
+        'fixed': (1, lambda v: v),
+        'uniform': (2, random.uniform),
+        'exp': (1, lambda mean: random.expovariate(1.0 / mean) if mean else 0.0),
+        'normal': (2, random.normalvariate),
+        'lognormal': (2, random.lognormvariate),
+    }
+    try:
+        num_params, func = distributions[name]
+    except KeyError:
+        raise ValueError('unknown distribution: %s (use one of %s)' % (name, ', '.join(sorted(distributions))))
+    if len(params) != num_params:
+        raise ValueError('%s takes %i parameter(s): %s' % (name, num_params, spec))
+    return lambda: max(func(*params), 0.0)
+
+
+
+class Profile(object):
+    # what the server injects into each response
+    def __init__(self, latency='fixed:0', size='fixed:1024', error_rate=0.0):
+        self.latency = parse_distribution(latency)
+        self.size = parse_distribution(size)
+        self.error_rate = error_rate
+
+    def response(self, path):
+        # returns (latency, status, body size) for a request path
+        query = cgi.parse_qs(urlparse.urlparse(path).query)
+        latency = float(query['latency'][0]) if 'latency' in query else self.latency()
+        size = int(query['size'][0]) if 'size' in query else int(self.size())
+        if 'status' in query:
+            status = int(query['status'][0])
+        elif self.error_rate and random.random() < self.error_rate:
+            status = 500
+        else:
+            status = 200
+        return latency, status, size
+
+
+
+class Scheduler(object):
+    # delayed sends, run from the event loop
+    def __init__(self):
+        self.pending = []  # heap of (due, seq, handler, data)
+        self.seq = itertools.count()
+
+    def send_at(self, due, handler, data):
+        heapq.heappush(self.pending, (due, self.seq.next(), handler, data))
+
+    def timeout(self, max_timeout):
+        if not self.pending:
+            return max_timeout
+        return min(max(self.pending[0][0] - time.time(), 0.0), max_timeout)
+
+    def run_due(self):
+        now = time.time()
+        while self.pending and self.pending[0][0] <= now:
+            due, seq, handler, data = heapq.heappop(self.pending)
+            if not handler.connected:
+                continue
+            if data is None:
+                handler.close_when_done()
+            else:
+                handler.push(data)
+
+
+
+class RequestHandler(asynchat.async_chat):
+    def __init__(self, sock, server):
+        asynchat.async_chat.__init__(self, sock)
+        self.server = server
+        self.buffer = []
+        self.headers = None
+        self.last_due = 0.0  # pipelined responses go out in request order
+        self.set_terminator('\r\n\r\n')
+
+    def collect_incoming_data(self, data):
+        self.buffer.append(data)
+
+    def found_terminator(self):
+        if self.headers is None:
+            self.headers = ''.join(self.buffer)
+            self.buffer = []
+            content_length = 0
+            for line in self.headers.split('\r\n')[1:]:
+                if line.lower().startswith('content-length:'):
+                    content_length = int(line.split(':', 1)[1])
+            if content_length:
+                self.set_terminator(content_length)  # read and discard the request body
+                return
+        self.buffer = []
+        self.handle_request(self.headers)
+        self.headers = None
+        self.set_terminator('\r\n\r\n')
+
+    def handle_request(self, headers):
+        request_line = headers.split('\r\n', 1)[0]
+        try:
+            method, path, version = request_line.split()
+        except ValueError:
+            self.close_when_done()
+            return
+        keep_alive = version == 'HTTP/1.1' and 'connection: close' not in headers.lower()
+        try:
+            latency, status, size = self.server.profile.response(path)
+        except ValueError:
+            latency, status, size = 0.0, 404, 0
+        response = '%s %i %s\r\nContent-Type: text/plain\r\nContent-Length: %i\r\nX-Injected-Latency: %.6f\r\nX-Injected-Status: %i\r\n%s\r\n%s' % (
+            version, status, STATUS_TEXT.get(status, 'Unknown'), size, latency, status, '' if keep_alive else 'Connection: close\r\n',
+            self.server.body(size))
+        due = max(time.time() + latency, self.last_due)
+        self.last_due = due
+        self.server.requests += 1
+        self.server.scheduler.send_at(due, self, response)
+        if not keep_alive:
+            self.server.scheduler.send_at(due, self, None)  # close once the response is sent
+
+
+
+class ReferenceServer(asyncore.dispatcher):
+    def __init__(self, host, port, profile):
+        asyncore.dispatcher.__init__(self)
+        self.profile = profile
+        self.scheduler = Scheduler()
+        self.requests = 0
+        self.body_buffer = 'x' * 65536
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.set_reuse_addr()
+        self.bind((host, port))
+        self.listen(1024)
+
+    def body(self, size):
+        while size > len(self.body_buffer):
+            self.body_buffer *= 2
+        return self.body_buffer[:size]
+
+    def handle_accept(self):
+        pair = self.accept()
+        if pair is not None:
+            RequestHandler(pair[0], self)
+
+    def serve_forever(self, report_interval=0):
+        next_report = time.time() + report_interval
+        last_count = 0
+        while True:
+            asyncore.loop(timeout=self.scheduler.timeout(.1), use_poll=True, count=1)
+            self.scheduler.run_due()
+            if report_interval and time.time() >= next_report:
+                print '%s  requests: %i  (%.1f/sec)' % (time.strftime('%H:%M:%S'), self.requests, (self.requests - last_count) / float(report_interval))
+                last_count = self.requests
+                next_report += report_interval
+
+
+
+if __name__ == '__main__':
+    parser = optparse.OptionParser(usage='Usage: %prog [options]')
+    parser.add_option('--host', dest='host', default='127.0.0.1', help='address to listen on (default 127.0.0.1)')
+    parser.add_option('-p', '--port', dest='port', type='int', default=8080, help='port to listen on (default 8080)')
+    parser.add_option('-l', '--latency', dest='latency', default='fixed:0', help='latency distribution in secs (default fixed:0)')
+    parser.add_option('-s', '--size', dest='size', default='fixed:1024', help='response size distribution in bytes (default fixed:1024)')
+    parser.add_option('-e', '--error-rate', dest='error_rate', type='float', default=0.0, help='fraction of responses that are 500 errors')
+    parser.add_option('-r', '--report', dest='report', type='int', default=10, help='secs between request rate reports, 0 for none')
+    parser.add_option('--seed', dest='seed', type='int', help='random seed, for a reproducible sequence of injected values')
+    opts, args = parser.parse_args()
+
+    if opts.seed is not None:
+        random.seed(opts.seed)
+    try:
+        profile = Profile(opts.latency, opts.size, opts.error_rate)
+    except ValueError, e:
+        sys.stderr.write('ERROR: %s\n' % e)
+        sys.exit(1)
+    server = ReferenceServer(opts.host, opts.port, profile)
+    print 'reference server listening on http://%s:%i/  latency: %s  size: %s  error rate: %s' % (
+        opts.host, opts.port, opts.latency, opts.size, opts.error_rate)
+    try:
+        server.serve_forever(opts.report)
+    except KeyboardInterrupt:
+        print '\nrequests served: %i' % server.requests
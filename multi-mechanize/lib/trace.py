@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#
+#  This file is part of Multi-Mechanize
+#
+#
+#  trace replay:  run requests at the times they appear in a request log.
+#
+#  a user group replays a trace when its config section names one:
+#
+#    [peak_hour]
+#    threads: 50
+#    script: replay.py
+#    trace: logs/peak_hour.csv
+#    trace_speed: 2.0
+#
+#  each line of the trace is  timestamp,field,field,...  where timestamp is in
+#  secs (epoch or relative, only the offset from the first line matters).  the
+#  other fields are handed to the script as self.request, a list of strings.
+#  blank lines and lines starting with # are skipped.
+#
+#  the trace is read as a stream, so it can be much larger than memory.  user
+#  groups replaying the same file split its lines between them (line i goes to
+#  group i % k), so every line is sent exactly once across the test.  the file
+#  is split once when the test starts (split_traces), so each group only reads
+#  its own lines.
+
+
+import copy
+import csv
+import os
+
+
+
+class Trace(object):
+    def __init__(self, file_name, speed=1.0, partition=0, partitions=1):
+        if speed <= 0:
+            raise ValueError('trace speed must be greater than 0: %s' % speed)
+        self.file_name = file_name
+        self.speed = speed
+        self.partition = partition
+        self.partitions = partitions
+        self.part_file = None  # this partition's lines, when split_traces() has split the file
+
+
+    def scaled(self, factor):
+        # the same trace, replayed factor times faster
+        trace = copy.copy(self)
+        trace.speed = self.speed * factor
+        return trace
+
+
+    def replay(self):
+        # yields (offset, fields) for this partition's lines, in file order.
+        # offset is secs from the start of the test, already divided by the speed.
+        if self.part_file is not None:
+            # already this partition's lines, timed from the start of the whole file
+            for offset, fields in read_trace(self.part_file):
+                yield offset / self.speed, fields[1:]
+            return
+        first = None
+        for index, (timestamp, fields) in enumerate(read_trace(self.file_name)):
+            if first is None:
+                first = timestamp
+            if index % self.partitions == self.partition:
+                yield (timestamp - first) / self.speed, fields[1:]
+
+
+
+def read_trace(file_name):
+    # yields (timestamp, fields) for each line of a trace file, skipping blank lines and comments
+    with open(file_name, 'rb') as f:
+        for line_num, fields in enumerate(csv.reader(f)):
+            if not fields or not ''.join(fields).strip() or fields[0].startswith('#'):
+                continue
+            try:
+                timestamp = float(fields[0])
+            except ValueError:
+                raise ValueError('bad timestamp on line %i of trace %s: %s' % (line_num + 1, file_name, fields[0]))
+            yield timestamp, fields
+
+
+
+def partition_traces(traces):
+    # traces reading the same file share its lines out between them
+    by_file = {}
+    for trace in traces:
+        by_file.setdefault(os.path.abspath(trace.file_name), []).append(trace)
+    for same_file in by_file.values():
+        for i, trace in enumerate(same_file):
+            trace.partition = i
+            trace.partitions = len(same_file)
+
+
+
+def split_traces(traces, directory):
+    # reads each file shared by several traces once, and writes every trace's lines to a file of its own 
+    # in directory (trace.part_file), with the timestamps made relative to the file's first line.  splitting 
+    # again rewrites the same files.  raises IOError if a trace file can't be read, and ValueError if it 
+    # has a bad timestamp.
+    by_file = {}
+    for trace in traces:
+        by_file.setdefault(os.path.abspath(trace.file_name), []).append(trace)
+    for file_num, (file_name, same_file) in enumerate(sorted(by_file.items())):
+        if same_file[0].partitions == 1:
+            open(file_name, 'rb').close()  # fail now, not in the user group
+            continue
+        part_files = []
+        try:
+            for trace in sorted(same_file, key=lambda trace: trace.partition):
+                trace.part_file = os.path.join(directory, '%i.%i_%s' % (file_num, trace.partition, os.path.basename(file_name)))
+                part_files.append(open(trace.part_file, 'wb'))
+            writers = [csv.writer(f) for f in part_files]
+            first = None
+            for index, (timestamp, fields) in enumerate(read_trace(file_name)):
+                if first is None:
+                    first = timestamp
+                writers[index % len(writers)].writerow([repr(timestamp - first)] + fields[1:])
+        finally:
+            for f in part_files:
+                f.close()
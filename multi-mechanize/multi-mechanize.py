@@ -11,23 +11,36 @@
 
 
 import ConfigParser
+import fractions
 import glob
+import itertools
 import multiprocessing
 import optparse
 import os
 import Queue
 import shutil
+import socket
 import subprocess
 import sys
+import tempfile
 import threading
 import time
+import lib.capacity as capacity
+import lib.counters as counters
+import lib.feeder as feeder
+import lib.placement as placement
 import lib.results as results
+import lib.segments as segments
+import lib.trace as trace
 import lib.progressbar as progressbar        
 
 usage = 'Usage: %prog <project name> [options]'
 parser = optparse.OptionParser(usage=usage)
 parser.add_option('-p', '--port', dest='port', type='int', help='rpc listener port')
 parser.add_option('-r', '--results', dest='results_dir', help='results directory to reprocess')
+parser.add_option('-w', '--window', dest='window', help='elapsed time window to reprocess, in secs (start:end)')
+parser.add_option('-s', '--search', dest='search', action='store_true', help='search for the max throughput that meets the [search] SLO')
+parser.add_option('--pool', dest='pool', action='store_true', help='with --port:  keep user group processes warm between runs (scripts, feeders and Transaction instances are kept, agent threads start per run)')
 cmd_opts, args = parser.parse_args()
 
 try:
@@ -51,10 +64,20 @@ for f in glob.glob( '%s/*.py' % scripts_path):  # import all test scripts as mod
 
 def main():
     if cmd_opts.results_dir:  # don't run a test, just reprocess results
-        rerun_results(cmd_opts.results_dir)
+        rerun_results(cmd_opts.results_dir, cmd_opts.window)
     elif cmd_opts.port:
         import lib.rpcserver
-        lib.rpcserver.launch_rpc_server(cmd_opts.port, project_name, run_test)
+        pool = None
+        if cmd_opts.pool:
+            pool = WarmPool(project_name)
+            pool.ready()
+        try:
+            lib.rpcserver.launch_rpc_server(cmd_opts.port, project_name, run_test, pool)
+        finally:
+            if pool is not None:
+                pool.stop()
+    elif cmd_opts.search:
+        run_search()
     else:  
         run_test()
     return
@@ -66,47 +89,93 @@ def run_test(remote_starter=None):
         remote_starter.test_running = True
         remote_starter.output_dir = None
         
-    run_time, rampup, console_logging, results_ts_interval, user_group_configs, results_database, post_run_script = configure(project_name)
+    run_time, rampup, console_logging, results_ts_interval, user_group_configs, results_database, post_run_script, feeder_configs, transaction_timeout, shutdown_timeout, results_segment_time = configure(project_name)
+    
+    # remote runs can override the run time and rampup, and give every node the same start time
+    start_at = None
+    pool = None
+    if remote_starter is not None:
+        run_time = remote_starter.run_time or run_time
+        rampup = remote_starter.rampup or rampup
+        start_at = remote_starter.start_at or None
+        pool = remote_starter.pool
     
     run_localtime = time.localtime() 
     output_dir = time.strftime('projects/' + project_name + '/results/results_%Y.%m.%d_%H.%M.%S/', run_localtime) 
         
-    # this queue is shared between all processes/threads
-    queue = multiprocessing.Queue()
-    rw = ResultsWriter(queue, output_dir, console_logging)
+    # read now so a bad option stops the test before it runs
+    analysis_config = configure_analysis(project_name)
+    
+    # the results writer runs in this process, pin it before starting it
+    placement_config = configure_placement(project_name)
+    if placement_config.writer_cpus:
+        placement.set_affinity(placement_config.writer_cpus)
+    
+    if pool is not None:
+        # warm user group processes, already forked with the scripts imported and the feeders mapped
+        user_groups = pool.ready()
+        queue = pool.queue
+        trace_dir = None
+    else:
+        # this queue is shared between all processes/threads
+        queue = multiprocessing.Queue()
+        trace_dir = split_traces(user_group_configs)
+    rw = ResultsWriter(queue, output_dir, console_logging, results_segment_time)
     rw.daemon = True
     rw.start()
     
-    user_groups = [] 
-    for i, ug_config in enumerate(user_group_configs):
-        ug = UserGroup(queue, i, ug_config.name, ug_config.num_threads, ug_config.script_file, run_time, rampup)
-        user_groups.append(ug)    
-    for user_group in user_groups:
-        user_group.start()
+    if pool is not None:
+        start_time = max(start_at or 0, time.time())
+        for user_group in user_groups:
+            user_group.start_run(start_time, run_time, rampup)
+        time.sleep(max(start_time - time.time(), 0))
+    else:
+        # test data is mapped once here and inherited by every user group process
+        try:
+            feeders = feeder.open_feeders(feeder_configs)
+        except (IOError, ValueError), e:
+            sys.stderr.write('ERROR: can not open data feeder: %s\n' % e)
+            sys.exit(1)
+        
+        if start_at is not None:
+            time.sleep(max(start_at - time.time(), 0))
         
-    start_time = time.time() 
+        user_groups = [] 
+        for i, ug_config in enumerate(user_group_configs):
+            ug = UserGroup(queue, i, ug_config.name, ug_config.num_threads, ug_config.scripts, run_time, rampup, feeders, len(user_group_configs), 
+                           transaction_timeout=transaction_timeout, shutdown_timeout=shutdown_timeout, trace=ug_config.trace, 
+                           cpus=user_group_cpus(ug_config, placement_config))
+            user_groups.append(ug)    
+        for user_group in user_groups:
+            user_group.start()
+            
+        start_time = time.time() 
+    # user groups abandon their remaining requests at run_time + shutdown_timeout; this is the backstop if one doesn't exit
+    deadline = start_time + run_time + shutdown_timeout + 5
     
     if console_logging:
         for user_group in user_groups:
-            user_group.join()
+            user_group.wait(max(deadline - time.time(), 0))
     else:
         print '\n  user_groups:  %i' % len(user_groups)
-        print '  threads: %i\n' % (ug_config.num_threads * len(user_groups))
+        print '  threads: %i\n' % sum([ug_config.num_threads for ug_config in user_group_configs])
         p = progressbar.ProgressBar(run_time)
         elapsed = 0
         while elapsed < (run_time + 1):
             p.update_time(elapsed)
+            # read straight from the agents' shared counters, not from the results writer
+            live_counts = counters.sum_totals([user_group.counters for user_group in user_groups])
             if sys.platform.startswith('win'):
-                print '%s   transactions: %i  timers: %i  errors: %i\r' % (p, rw.trans_count, rw.timer_count, rw.error_count),
+                print '%s   transactions: %i  timers: %i  errors: %i  timeouts: %i\r' % tuple([p] + live_counts),
             else:
-                print '%s   transactions: %i  timers: %i  errors: %i' % (p, rw.trans_count, rw.timer_count, rw.error_count)
+                print '%s   transactions: %i  timers: %i  errors: %i  timeouts: %i' % tuple([p] + live_counts)
                 sys.stdout.write(chr(27) + '[A' )
             time.sleep(1)
             elapsed = time.time() - start_time
         
         print p
         
-        while [user_group for user_group in user_groups if user_group.is_alive()] != []:
+        while [user_group for user_group in user_groups if user_group.is_running()] != [] and time.time() < deadline:
             if sys.platform.startswith('win'):
                 print 'waiting for all requests to finish...\r',
             else:
@@ -116,11 +185,20 @@ def run_test(remote_starter=None):
             
         if not sys.platform.startswith('win'):
             print
+    
+    for user_group in user_groups:
+        if user_group.is_running():
+            sys.stderr.write('WARNING: user group %s did not shut down in time, terminating it\n' % user_group.user_group_name)
+            user_group.terminate()  # a pool forks a new process for the next run
 
     # all agents are done running at this point
+    if trace_dir is not None:
+        shutil.rmtree(trace_dir, True)
     time.sleep(.2) # make sure the writer queue is flushed
+    rw.stop()
     print '\n\nanalyzing results...\n'
-    results.output_results(output_dir, 'results.csv', run_time, rampup, results_ts_interval, user_group_configs)
+    results.output_results(output_dir, 'results.csv', run_time, rampup, results_ts_interval, user_group_configs, 
+                           analysis_config=analysis_config)
     print 'created: %sresults.html\n' % output_dir
     
     # copy config file to results directory
@@ -148,18 +226,118 @@ def run_test(remote_starter=None):
     
     
     
-def rerun_results(results_dir):
+def run_search():
+    run_time, rampup, console_logging, results_ts_interval, user_group_configs, results_database, post_run_script, feeder_configs, transaction_timeout, shutdown_timeout, results_segment_time = configure(project_name)
+    search_config = configure_search(project_name)
+    
+    run_localtime = time.localtime() 
+    output_dir = time.strftime('projects/' + project_name + '/results/search_%Y.%m.%d_%H.%M.%S/', run_localtime) 
+    
+    analysis_config = configure_analysis(project_name)
+    placement_config = configure_placement(project_name)
+    if placement_config.writer_cpus:
+        placement.set_affinity(placement_config.writer_cpus)
+    
+    trace_dir = split_traces(user_group_configs)
+    queue = multiprocessing.Queue()
+    rw = ResultsWriter(queue, output_dir, console_logging, results_segment_time)
+    rw.daemon = True
+    rw.start()
+    
+    try:
+        feeders = feeder.open_feeders(feeder_configs)
+    except (IOError, ValueError), e:
+        sys.stderr.write('ERROR: can not open data feeder: %s\n' % e)
+        sys.exit(1)
+    
+    print '\n  capacity search: %spct latency <= %.3f secs, error rate <= %.2f%%' % (
+        search_config.latency_percentile, search_config.max_latency, search_config.max_error_rate * 100)
+    print '  step time: %i secs (+ %i secs rampup)\n' % (search_config.step_time, rampup)
+    
+    search_start = time.time()
+    step_numbers = itertools.count()
+    
+    def run_step(scale):
+        step = step_numbers.next()
+        step_run_time = rampup + search_config.step_time
+        step_start = time.time()
+        rw.start_step(step, step_start - search_start)
+        user_groups = []
+        for i, ug_config in enumerate(user_group_configs):
+            # trace groups replay their trace scale times faster
+            ug = UserGroup(queue, i, ug_config.name, ug_config.num_threads * scale, ug_config.scripts, step_run_time, rampup, feeders, len(user_group_configs), 
+                           transaction_timeout=transaction_timeout, shutdown_timeout=shutdown_timeout, 
+                           trace=ug_config.trace and ug_config.trace.scaled(scale), cpus=user_group_cpus(ug_config, placement_config), 
+                           step=step)
+            ug.start_time = step_start  # every group in the step keeps the same clock
+            user_groups.append(ug)
+        for user_group in user_groups:
+            user_group.start()
+        
+        deadline = step_start + step_run_time + shutdown_timeout + 5
+        for user_group in user_groups:
+            user_group.join(max(deadline - time.time(), 0))
+            if user_group.is_alive():
+                user_group.terminate()
+        
+        # only transactions that finished after rampup and before the end of the step are measured, 
+        # by the agents' own elapsed times, so writer lag and stragglers from other steps don't count
+        rw.drain()
+        trans_times, error_count = rw.take_step(step, rampup, step_run_time)
+        
+        num_threads = sum([ug_config.num_threads * scale for ug_config in user_group_configs])
+        result = capacity.StepResult(scale, num_threads, search_config.step_time, trans_times, error_count, search_config)
+        print '  %4ix  threads: %5i  rate: %8.2f/s  %spct: %s  errors: %.2f%%  %s' % (
+            scale, num_threads, result.throughput, search_config.latency_percentile, capacity.format_secs(result.pct_latency), 
+            result.error_rate * 100, result.passed and 'pass' or 'FAIL')
+        return result
+    
+    best, steps = capacity.search(run_step, search_config.max_scale)
+    
+    if trace_dir is not None:
+        shutil.rmtree(trace_dir, True)
+    time.sleep(.2) # make sure the writer queue is flushed
+    rw.stop()
+    print '\n\nanalyzing results...\n'
+    capacity.output_capacity_results(output_dir, search_config, best, steps, user_group_configs,
+                                     analysis_config.charts)
+    if best is None:
+        print 'SLO not met at the lowest load (1x configured threads)'
+    else:
+        print 'max sustainable throughput: %.2f transactions/sec at %ix configured threads' % (best.throughput, best.scale)
+    print 'created: %sresults.html\n' % output_dir
+    
+    project_config = os.sep.join(['projects', project_name, 'config.cfg'])
+    saved_config = os.sep.join([output_dir, 'config.cfg'])
+    shutil.copy(project_config, saved_config)
+    
+    print 'done.\n'
+    
+    return
+    
+    
+    
+def rerun_results(results_dir, window=None):
+    if window is not None:
+        try:
+            window = tuple([float(secs) for secs in window.split(':')])
+            assert len(window) == 2
+        except (ValueError, AssertionError):
+            sys.stderr.write('ERROR: time window must be start:end (secs)\n')
+            sys.exit(1)
     output_dir = 'projects/%s/results/%s/' % (project_name, results_dir)
     saved_config = '%s/config.cfg' % output_dir
-    run_time, rampup, console_logging, results_ts_interval, user_group_configs, results_database, post_run_script = configure(project_name, config_file=saved_config)
+    run_time, rampup, console_logging, results_ts_interval, user_group_configs, results_database, post_run_script, feeder_configs, transaction_timeout, shutdown_timeout, results_segment_time = configure(project_name, config_file=saved_config)
     print '\n\nanalyzing results...\n'
-    results.output_results(output_dir, 'results.csv', run_time, rampup, results_ts_interval, user_group_configs)
+    results.output_results(output_dir, 'results.csv', run_time, rampup, results_ts_interval, user_group_configs, window, 
+                           configure_analysis(project_name, config_file=saved_config))
     print 'created: %sresults.html\n' % output_dir
 
 
 
 def configure(project_name, config_file=None):
     user_group_configs = []
+    feeder_configs = []
     config = ConfigParser.ConfigParser()
     if config_file is None:
         config_file = 'projects/%s/config.cfg' % project_name
@@ -178,54 +356,457 @@ def configure(project_name, config_file=None):
                 post_run_script = config.get(section, 'post_run_script')
             except ConfigParser.NoOptionError:
                 post_run_script = None
+            try:
+                transaction_timeout = config.getfloat(section, 'transaction_timeout')
+            except ConfigParser.NoOptionError:
+                transaction_timeout = None
+            try:
+                shutdown_timeout = config.getfloat(section, 'shutdown_timeout')
+            except ConfigParser.NoOptionError:
+                shutdown_timeout = 30
+            try:
+                results_segment_time = config.getint(section, 'results_segment_time')
+            except ConfigParser.NoOptionError:
+                results_segment_time = None
+        elif section == 'search':
+            pass  # see configure_search()
+        elif section.startswith('feeder:'):
+            feeder_name = section[len('feeder:'):].strip()
+            file_name = config.get(section, 'file')
+            if not os.path.isabs(file_name):
+                file_name = os.path.join('projects', project_name, file_name)
+            try:
+                mode = config.get(section, 'mode')
+            except ConfigParser.NoOptionError:
+                mode = 'sequential'
+            try:
+                format = config.get(section, 'format')
+            except ConfigParser.NoOptionError:
+                format = 'csv'
+            try:
+                record_size = config.getint(section, 'record_size')
+            except ConfigParser.NoOptionError:
+                record_size = None
+            if mode not in feeder.MODES or format not in feeder.FORMATS or (format == 'binary' and not record_size):
+                sys.stderr.write('ERROR: invalid data feeder: %s (mode must be one of %s, format one of %s, binary feeders need a record_size)\n' % (
+                    feeder_name, ', '.join(feeder.MODES), ', '.join(feeder.FORMATS)))
+                sys.exit(1)
+            feeder_configs.append(feeder.FeederConfig(feeder_name, file_name, mode, format, record_size))
         else:
             threads = config.getint(section, 'threads')
             script = config.get(section, 'script')
             user_group_name = section
             ug_config = UserGroupConfig(threads, user_group_name, script)
+            try:
+                ug_config.scripts = parse_script_mix(script)
+            except ValueError, e:
+                sys.stderr.write('ERROR: invalid script mix for user group %s: %s\n' % (user_group_name, e))
+                sys.exit(1)
+            if config.has_option(section, 'trace'):
+                file_name = config.get(section, 'trace')
+                if not os.path.isabs(file_name):
+                    file_name = os.path.join('projects', project_name, file_name)
+                try:
+                    trace_speed = config.getfloat(section, 'trace_speed')
+                except ConfigParser.NoOptionError:
+                    trace_speed = 1.0
+                if trace_speed <= 0:  # the file is checked when a test starts, see split_traces()
+                    sys.stderr.write('ERROR: invalid trace for user group %s: %s (trace_speed must be greater than 0)\n' % (
+                        user_group_name, file_name))
+                    sys.exit(1)
+                ug_config.trace = trace.Trace(file_name, trace_speed)
+            if config.has_option(section, 'cpus'):
+                try:
+                    ug_config.cpus = placement.parse_cpu_list(config.get(section, 'cpus'))
+                except ValueError, e:
+                    sys.stderr.write('ERROR: invalid cpus for user group %s: %s\n' % (user_group_name, e))
+                    sys.exit(1)
             user_group_configs.append(ug_config)
+    trace.partition_traces([ug_config.trace for ug_config in user_group_configs if ug_config.trace is not None])
 
-    return (run_time, rampup, console_logging, results_ts_interval, user_group_configs, results_database, post_run_script)
+    return (run_time, rampup, console_logging, results_ts_interval, user_group_configs, results_database, post_run_script, feeder_configs, transaction_timeout, shutdown_timeout, results_segment_time)
     
 
 
+def configure_search(project_name, config_file=None):
+    # the optional [search] section:  SLO and step settings for --search
+    search_config = capacity.SearchConfig()
+    config = ConfigParser.ConfigParser()
+    if config_file is None:
+        config_file = 'projects/%s/config.cfg' % project_name
+    config.read(config_file)
+    if config.has_section('search'):
+        for option in ('step_time', 'latency_percentile', 'max_scale'):
+            if config.has_option('search', option):
+                setattr(search_config, option, config.getint('search', option))
+        for option in ('max_latency', 'max_error_rate'):
+            if config.has_option('search', option):
+                setattr(search_config, option, config.getfloat('search', option))
+    return search_config
+    
+
+
+def configure_analysis(project_name, config_file=None):
+    # analysis options from [global]:  steady-state warmup/cooldown (secs), coordinated omission correction, chart backend (png/js), 
+    # raw points kept for the scatter plots
+    analysis_config = results.AnalysisConfig()
+    config = ConfigParser.ConfigParser()
+    if config_file is None:
+        config_file = 'projects/%s/config.cfg' % project_name
+    config.read(config_file)
+    for option in ('warmup', 'cooldown'):
+        if config.has_option('global', option):
+            setattr(analysis_config, option, config.getfloat('global', option))
+    if config.has_option('global', 'co_correction') and config.getboolean('global', 'co_correction'):
+        # the interval at which the agents are expected to send requests, as for HdrHistogram
+        if not config.has_option('global', 'co_expected_interval') or config.getfloat('global', 'co_expected_interval') <= 0:
+            sys.stderr.write('ERROR: co_correction needs co_expected_interval (secs between requests, greater than 0)\n')
+            sys.exit(1)
+        analysis_config.co_expected_interval = config.getfloat('global', 'co_expected_interval')
+    if config.has_option('global', 'report_charts'):
+        analysis_config.charts = config.get('global', 'report_charts')
+        if analysis_config.charts not in results.CHART_BACKENDS:
+            sys.stderr.write('ERROR: invalid report_charts: %s (must be one of %s)\n' % (analysis_config.charts, ', '.join(results.CHART_BACKENDS)))
+            sys.exit(1)
+    if config.has_option('global', 'raw_sample_size'):
+        analysis_config.raw_sample_size = config.getint('global', 'raw_sample_size')
+    return analysis_config
+    
+
+
+def configure_placement(project_name, config_file=None):
+    # process placement options from [global]:  writer_cpus (the controller and results writer)
+    placement_config = placement.PlacementConfig()
+    config = ConfigParser.ConfigParser()
+    if config_file is None:
+        config_file = 'projects/%s/config.cfg' % project_name
+    config.read(config_file)
+    try:
+        if config.has_option('global', 'writer_cpus'):
+            placement_config.writer_cpus = placement.parse_cpu_list(config.get('global', 'writer_cpus'))
+        if config.has_option('global', 'start_method'):
+            raise ValueError('start_method is not supported:  user groups are always forked')
+    except ValueError, e:
+        sys.stderr.write('ERROR: invalid placement option: %s\n' % e)
+        sys.exit(1)
+    return placement_config
+    
+
+
+def user_group_cpus(ug_config, placement_config):
+    # the group's own cpus, or every core except the writer's.  None leaves the group unpinned.
+    if ug_config.cpus is not None:
+        return ug_config.cpus
+    if placement_config.writer_cpus:
+        return [cpu for cpu in range(multiprocessing.cpu_count()) if cpu not in placement_config.writer_cpus] or None
+    return None
+
+
+
+def split_traces(user_group_configs):
+    # reads each trace file once as a test starts, giving every group that replays it a file of its own 
+    # lines.  returns the directory holding those files, to remove when the test is over (or None).
+    traces = [ug_config.trace for ug_config in user_group_configs if ug_config.trace is not None]
+    if not traces:
+        return None
+    trace_dir = tempfile.mkdtemp(prefix='mm_trace_')
+    try:
+        trace.split_traces(traces, trace_dir)
+    except (IOError, ValueError), e:
+        shutil.rmtree(trace_dir, True)
+        sys.stderr.write('ERROR: can not read trace: %s\n' % e)
+        sys.exit(1)
+    return trace_dir
+
+
+
+def parse_script_mix(script):
+    # 'script' is either a single script file, or a weighted mix:  browse.py:7, search.py:2, checkout.py:1
+    scripts = []
+    for entry in script.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if ':' in entry:
+            script_file, weight = entry.rsplit(':', 1)
+            try:
+                weight = int(weight)
+            except ValueError:
+                raise ValueError('weight must be an integer: %s' % entry)
+        else:
+            script_file, weight = entry, 1
+        if weight < 1:
+            raise ValueError('weight must be at least 1: %s' % entry)
+        scripts.append((script_file.strip(), weight))
+    if not scripts:
+        raise ValueError('no script specified')
+    return scripts
+
+
+
+def mix_schedule(weights):
+    # one cycle of a smooth weighted round-robin over the script weights.
+    # agents walk this list in order, so the mix is exact and needs no locks or random numbers.
+    divisor = reduce(fractions.gcd, weights)
+    weights = [weight // divisor for weight in weights]
+    total = sum(weights)
+    current = [0] * len(weights)
+    schedule = []
+    for i in xrange(total):
+        for j, weight in enumerate(weights):
+            current[j] += weight
+        chosen = current.index(max(current))
+        current[chosen] -= total
+        schedule.append(chosen)
+    return schedule
+
+
+
 class UserGroupConfig(object):
     def __init__(self, num_threads, name, script_file):
         self.num_threads = num_threads
         self.name = name
         self.script_file = script_file
+        self.scripts = [(script_file, 1)]
+        self.trace = None  # trace.Trace when the group replays a request log
+        self.cpus = None  # cpu numbers to pin the group's process to
     
     
     
 class UserGroup(multiprocessing.Process):
-    def __init__(self, queue, process_num, user_group_name, num_threads, script_file, run_time, rampup):
+    def __init__(self, queue, process_num, user_group_name, num_threads, scripts, run_time, rampup, feeders=None, num_processes=1, 
+                 transaction_timeout=None, shutdown_timeout=30, trace=None, cpus=None, step=None):
         multiprocessing.Process.__init__(self)
         self.queue = queue
         self.process_num = process_num
         self.user_group_name = user_group_name
         self.num_threads = num_threads
-        self.script_file = script_file
+        self.scripts = scripts
         self.run_time = run_time
         self.rampup = rampup
+        self.feeders = feeders or {}
+        self.num_processes = num_processes
+        self.transaction_timeout = transaction_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.trace = trace
+        self.cpus = cpus
+        self.step = step  # capacity search:  the load step this group runs, tagged on every result
+        self.counters = counters.CounterBlock(num_threads)  # one row per agent
         self.start_time = time.time()
+        self.transactions = None  # {thread_num: {script_file: Transaction}} kept between runs, or None
         
     def run(self):
+        if self.cpus:
+            placement.set_affinity(self.cpus)
+        self.bind_feeders()
+        self.run_agents()
+        
+    def bind_feeders(self):
+        # once per process, so the feeder cursors carry on from one run to the next
+        for data_feeder in self.feeders.values():
+            data_feeder.bind(self.process_num, self.num_processes)
+        
+    def agent_transactions(self, thread_num):
+        if self.transactions is None:
+            return None
+        return self.transactions.setdefault(thread_num, {})
+        
+    def run_agents(self):
+        # one test run in this process.  returns False if agents had to be abandoned at the deadline.
+        previous_timeout = socket.getdefaulttimeout()
+        if self.transaction_timeout:
+            # blocking socket calls in scripts (httplib, urllib2, mechanize) give up on their own, see watch_timeouts()
+            socket.setdefaulttimeout(self.transaction_timeout)
         threads = []
-        for i in range(self.num_threads):
-            spacing = float(self.rampup) / float(self.num_threads)
-            if i > 0:
-                time.sleep(spacing)
-            agent_thread = Agent(self.queue, self.process_num, i, self.start_time, self.run_time, self.user_group_name, self.script_file)
-            agent_thread.daemon = True
-            threads.append(agent_thread)
-            agent_thread.start()            
+        finished = threading.Event()
+        if self.transaction_timeout:
+            watchdog = threading.Thread(target=self.watch_timeouts, args=(threads, finished))
+            watchdog.daemon = True
+            watchdog.start()
+        if self.trace is not None:
+            # open loop:  the trace sets the arrival times, agents are a pool of workers (no rampup)
+            requests = Queue.Queue()
+            for i in range(self.num_threads):
+                agent_thread = Agent(self.queue, self.process_num, i, self.start_time, self.run_time, self.user_group_name, self.scripts, self.feeders, 
+                                     requests, self.counters, self.agent_transactions(i), self.step)
+                agent_thread.daemon = True
+                threads.append(agent_thread)
+                agent_thread.start()
+            self.dispatch(requests)
+        else:
+            for i in range(self.num_threads):
+                spacing = float(self.rampup) / float(self.num_threads)
+                if i > 0:
+                    time.sleep(spacing)
+                agent_thread = Agent(self.queue, self.process_num, i, self.start_time, self.run_time, self.user_group_name, self.scripts, self.feeders, 
+                                     counters=self.counters, transactions=self.agent_transactions(i), step=self.step)
+                agent_thread.daemon = True
+                threads.append(agent_thread)
+                agent_thread.start()            
+        
+        # drain until the hard deadline, then abandon whatever is still running (agents are daemon threads)
+        deadline = self.start_time + self.run_time + self.shutdown_timeout
         for agent_thread in threads:
-            agent_thread.join()
+            agent_thread.join(max(deadline - time.time(), 0))
+        abandoned = [agent_thread for agent_thread in threads if agent_thread.is_alive()]
+        for agent_thread in abandoned:
+            agent_thread.abandon()
+        finished.set()
+        socket.setdefaulttimeout(previous_timeout)
+        return not abandoned
+    
+    def is_running(self):
+        return self.is_alive()
+    
+    def wait(self, timeout):
+        self.join(timeout)
+        
+    def dispatch(self, requests):
+        # release each trace line to the workers at its offset from the start of the test
+        try:
+            for offset, request in self.trace.replay():
+                if offset >= self.run_time:
+                    break
+                due = self.start_time + offset
+                delay = due - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                requests.put((due, request))
+        except (IOError, ValueError), e:
+            sys.stderr.write('ERROR: can not replay trace for user group %s: %s\n' % (self.user_group_name, e))
+        for i in range(self.num_threads):
+            requests.put(None)  # end of the trace
+    
+    def watch_timeouts(self, threads, finished):
+        # records transactions that overrun transaction_timeout; it can't stop them, scripts see self.cancelled.  
+        # for the length of the run the socket default timeout is also transaction_timeout.  that default is 
+        # process-wide, so it applies to every socket a script creates without its own timeout; the previous 
+        # default is restored when the run ends.
+        poll_interval = min(self.transaction_timeout / 10.0, .5)
+        while not finished.is_set():
+            now = time.time()
+            for agent_thread in threads[:]:
+                agent_thread.check_timeout(self.transaction_timeout, now)
+            time.sleep(poll_interval)
         
 
 
+class PooledUserGroup(UserGroup):
+    # a user group process that stays up between runs (--port with --pool).  it is forked 
+    # once, with the scripts imported and the feeders mapped, then runs a test each time a 
+    # (start time, run time, rampup) command arrives on self.commands.  each agent's Transaction 
+    # instances and the feeder cursors carry over from run to run; the agent threads themselves 
+    # are started for each run.
+    def __init__(self, queue, process_num, user_group_name, num_threads, scripts, feeders=None, num_processes=1, 
+                 transaction_timeout=None, shutdown_timeout=30, trace=None, cpus=None):
+        UserGroup.__init__(self, queue, process_num, user_group_name, num_threads, scripts, 0, 0, feeders, num_processes, 
+                           transaction_timeout, shutdown_timeout, trace, cpus)
+        self.transactions = {}
+        self.commands = multiprocessing.Queue()
+        self.idle = multiprocessing.Event()
+        self.idle.set()
+        
+    def run(self):
+        if self.cpus:
+            placement.set_affinity(self.cpus)
+        self.bind_feeders()
+        while True:
+            command = self.commands.get()
+            if command is None:
+                break
+            self.start_time, self.run_time, self.rampup = command
+            delay = self.start_time - time.time()
+            if delay > 0:
+                time.sleep(delay)  # every group on every node starts at the same moment
+            clean = self.run_agents()
+            self.idle.set()
+            if not clean:
+                break  # abandoned agents may still be running, let the pool fork a fresh process
+    
+    def start_run(self, start_time, run_time, rampup):
+        self.counters.reset()
+        self.idle.clear()
+        self.commands.put((start_time, run_time, rampup))
+    
+    def is_running(self):
+        return self.is_alive() and not self.idle.is_set()
+    
+    def wait(self, timeout):
+        self.idle.wait(timeout)
+
+
+
+class WarmPool(object):
+    # the PooledUserGroup processes of one rpc node, forked again only when config.cfg changes 
+    # or a process died
+    def __init__(self, project_name):
+        self.project_name = project_name
+        self.config_file = 'projects/%s/config.cfg' % project_name
+        self.config_text = None
+        self.queue = None
+        self.user_groups = []
+        self.trace_dir = None  # the groups' trace files, see split_traces()
+        self.traces = []
+    
+    def read_config(self):
+        with open(self.config_file) as f:
+            return f.read()
+    
+    def ready(self):
+        # returns the user groups, forking them first if needed
+        if (not self.user_groups or self.read_config() != self.config_text 
+                or [user_group for user_group in self.user_groups if not user_group.is_alive()]):
+            self.stop()
+            self.fork()
+        elif self.traces:
+            # the processes keep their trace files, refresh what's in them
+            try:
+                trace.split_traces(self.traces, self.trace_dir)
+            except (IOError, ValueError), e:
+                sys.stderr.write('ERROR: can not read trace: %s\n' % e)
+                sys.exit(1)
+        return self.user_groups
+    
+    def fork(self):
+        self.config_text = self.read_config()
+        (run_time, rampup, console_logging, results_ts_interval, user_group_configs, results_database, post_run_script, 
+         feeder_configs, transaction_timeout, shutdown_timeout, results_segment_time) = configure(self.project_name)
+        placement_config = configure_placement(self.project_name)
+        try:
+            feeders = feeder.open_feeders(feeder_configs)
+        except (IOError, ValueError), e:
+            sys.stderr.write('ERROR: can not open data feeder: %s\n' % e)
+            sys.exit(1)
+        self.trace_dir = split_traces(user_group_configs)
+        self.traces = [ug_config.trace for ug_config in user_group_configs if ug_config.trace is not None]
+        self.queue = multiprocessing.Queue()
+        for i, ug_config in enumerate(user_group_configs):
+            ug = PooledUserGroup(self.queue, i, ug_config.name, ug_config.num_threads, ug_config.scripts, feeders, len(user_group_configs), 
+                                 transaction_timeout=transaction_timeout, shutdown_timeout=shutdown_timeout, trace=ug_config.trace, 
+                                 cpus=user_group_cpus(ug_config, placement_config))
+            ug.daemon = True
+            ug.start()
+            self.user_groups.append(ug)
+    
+    def stop(self):
+        for user_group in self.user_groups:
+            if user_group.is_alive():
+                user_group.commands.put(None)
+        for user_group in self.user_groups:
+            user_group.join(1)
+            if user_group.is_alive():
+                user_group.terminate()
+        self.user_groups = []
+        if self.trace_dir is not None:
+            shutil.rmtree(self.trace_dir, True)
+            self.trace_dir = None
+        self.traces = []
+
+
+
 class Agent(threading.Thread):
-    def __init__(self, queue, process_num, thread_num, start_time, run_time, user_group_name, script_file):
+    def __init__(self, queue, process_num, thread_num, start_time, run_time, user_group_name, scripts, feeders=None, requests=None, counters=None, 
+                 transactions=None, step=None):
         threading.Thread.__init__(self)
         self.queue = queue
         self.process_num = process_num
@@ -233,7 +814,20 @@ class Agent(threading.Thread):
         self.start_time = start_time
         self.run_time = run_time
         self.user_group_name = user_group_name
-        self.script_file = script_file
+        self.scripts = scripts
+        self.feeders = feeders or {}
+        self.requests = requests  # trace replay:  Queue of (due time, request fields), None when the trace ends
+        self.counters = counters  # the user group's CounterBlock, this agent writes row thread_num
+        self.transactions = transactions  # {script_file: Transaction} kept from earlier runs (pooled groups), or None
+        self.step = step
+        
+        # state of the transaction in flight, shared with the user group's timeout watchdog
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.stopping = False
+        self.trans_started = None
+        self.timed_out = False
+        self.script_name = None
         
         # choose most accurate timer to use (time.clock has finer granularity than time.time on windows, but shouldn't be used on other systems)
         if sys.platform.startswith('win'):
@@ -242,59 +836,195 @@ class Agent(threading.Thread):
             self.default_timer = time.time
     
     
-    def run(self):
-        elapsed = 0
-        
-        if self.script_file.lower().endswith('.py'):
-            module_name = self.script_file.replace('.py', '')
+    def load_transaction(self, script_file):
+        if script_file.lower().endswith('.py'):
+            module_name = script_file.replace('.py', '')
         else:
-            sys.stderr.write('ERROR: scripts must have .py extension. can not run test script: %s.  aborting user group: %s\n' % (self.script_file, self.user_group_name))
-            return
+            sys.stderr.write('ERROR: scripts must have .py extension. can not run test script: %s.  aborting user group: %s\n' % (script_file, self.user_group_name))
+            return None
         try:
-            trans = eval(module_name + '.Transaction()')
+            transaction_class = eval(module_name + '.Transaction')
+            # set before the constructor runs, so __init__ can read test data too (e.g. a login per agent)
+            transaction_class.feeders = self.feeders
+            trans = transaction_class()
         except NameError, e:
-            sys.stderr.write('ERROR: can not find test script: %s.  aborting user group: %s\n' % (self.script_file, self.user_group_name))
-            return
+            sys.stderr.write('ERROR: can not find test script: %s.  aborting user group: %s\n' % (script_file, self.user_group_name))
+            return None
         except Exception, e:
-            sys.stderr.write('ERROR: failed initializing Transaction: %s.  aborting user group: %s\n' % (self.script_file, self.user_group_name))
-            return
-        
+            sys.stderr.write('ERROR: failed initializing Transaction: %s.  aborting user group: %s\n' % (script_file, self.user_group_name))
+            return None
+        self.attach_transaction(trans)
+        return trans
+    
+    
+    def attach_transaction(self, trans):
+        # (re)binds a Transaction instance to this agent, for a new one or one kept from an earlier run
         trans.custom_timers = {}
         
         # scripts have access to these vars, which can be useful for loading unique data
         trans.thread_num = self.thread_num
         trans.process_num = self.process_num
-            
-        while elapsed < self.run_time:
-            error = ''
-            start = self.default_timer()  
-            
-            try:
-                trans.run()
-            except Exception, e:  # test runner catches all script exceptions here
-                error = str(e).replace(',', '')
+        # shared test data declared in config.cfg:  self.feeders['name'].next_row()
+        trans.feeders = self.feeders
+        # set when the transaction timed out or the test is shutting down, long-running scripts should check it
+        trans.cancelled = self.cancelled
+        # the current trace line's fields (after the timestamp) in trace replay
+        trans.request = None
+        self.reset_transfer_stats(trans)
+    
+    
+    def reset_transfer_stats(self, trans):
+        # optional per-transaction results a script can fill in:  payload sizes, and a 
+        # status/outcome code (e.g. the HTTP status).  reset before every run.
+        trans.bytes_sent = 0
+        trans.bytes_received = 0
+        trans.status = ''
+    
+    
+    def run(self):
+        # one Transaction instance per script in the group's mix
+        transactions = []
+        for script_file, weight in self.scripts:
+            if self.transactions is not None and script_file in self.transactions:
+                trans = self.transactions[script_file]
+                self.attach_transaction(trans)
+            else:
+                trans = self.load_transaction(script_file)
+                if trans is None:
+                    return
+                if self.transactions is not None:
+                    self.transactions[script_file] = trans
+            script_name = os.path.basename(script_file)[:-len('.py')]
+            transactions.append((script_name, trans))
+        
+        # each agent starts at a different point of the cycle, so the mix is spread across threads too
+        schedule = mix_schedule([weight for script_file, weight in self.scripts])
+        position = self.thread_num % len(schedule)
+        
+        if self.requests is not None:
+            while not self.stopping:
+                item = self.requests.get()
+                if item is None:
+                    break
+                due, request = item
+                script_name, trans = transactions[schedule[position]]
+                position = (position + 1) % len(schedule)
+                trans.request = request
+                # schedule slip:  how late the request started, because every worker was busy
+                self.run_transaction(script_name, trans, {'Schedule_Slip': max(time.time() - due, 0.0)})
+            return
+        
+        elapsed = 0
+        while elapsed < self.run_time and not self.stopping:
+            script_name, trans = transactions[schedule[position]]
+            position = (position + 1) % len(schedule)
+            elapsed = self.run_transaction(script_name, trans)
+    
+    
+    def run_transaction(self, script_name, trans, extra_timers=None):
+        # runs one transaction and queues its result.  returns the elapsed time in the test.
+        self.reset_transfer_stats(trans)
+        
+        error = ''
+        with self.lock:
+            self.script_name = script_name
+            self.timed_out = False
+            self.trans_started = time.time()
+        start = self.default_timer()  
+        
+        try:
+            trans.run()
+        except Exception, e:  # test runner catches all script exceptions here
+            error = str(e).replace(',', '')
 
-            finish = self.default_timer()
-            
-            scriptrun_time = finish - start
-            elapsed = time.time() - self.start_time 
+        finish = self.default_timer()
+        
+        scriptrun_time = finish - start
+        elapsed = time.time() - self.start_time 
+        
+        with self.lock:
+            self.trans_started = None
+            timed_out = self.timed_out
+        if timed_out:  # already recorded by the watchdog
+            self.cancelled.clear()
+            return elapsed
 
-            epoch = time.mktime(time.localtime())
-            
-            fields = (elapsed, epoch, self.user_group_name, scriptrun_time, error, trans.custom_timers)
-            self.queue.put(fields)
+        epoch = time.mktime(time.localtime())
+        
+        try:
+            bytes_sent = int(trans.bytes_sent)
+            bytes_received = int(trans.bytes_received)
+        except (TypeError, ValueError, OverflowError), e:  # the script set a byte count that isn't a number
+            bytes_sent = bytes_received = 0
+            if not error:
+                error = ('invalid byte count: %s' % e).replace(',', '')
+        
+        status = str(trans.status).replace(',', '')
+        if not status:
+            status = error and 'error' or 'ok'
+        
+        custom_timers = trans.custom_timers
+        if extra_timers:
+            custom_timers = dict(custom_timers, **extra_timers)
+        
+        fields = (elapsed, epoch, self.user_group_name, script_name, self.thread_num, scriptrun_time, error, 
+                  bytes_sent, bytes_received, status, custom_timers, self.step)
+        if self.counters is not None:
+            with self.lock:  # the watchdog writes this row too, see record_timeout()
+                self.counters.add(self.thread_num, 1, len(custom_timers), error != '' and 1 or 0)
+        self.queue.put(fields)
+        return elapsed
+    
+    
+    def check_timeout(self, timeout, now):
+        with self.lock:
+            if self.trans_started is not None and not self.timed_out and now - self.trans_started >= timeout:
+                self.record_timeout(now)
+    
+    
+    def abandon(self):
+        # end of the drain period:  stop looping, and record anything still in flight as timed out
+        self.stopping = True
+        with self.lock:
+            if self.trans_started is not None and not self.timed_out:
+                self.record_timeout(time.time())
+        self.cancelled.set()
+    
+    
+    def record_timeout(self, now):
+        # caller holds self.lock
+        self.timed_out = True
+        self.cancelled.set()
+        elapsed = now - self.start_time
+        epoch = time.mktime(time.localtime())
+        fields = (elapsed, epoch, self.user_group_name, self.script_name, self.thread_num, now - self.trans_started, results.TIMEOUT_ERROR, 
+                  0, 0, 'timeout', {}, self.step)
+        if self.counters is not None:
+            self.counters.add(self.thread_num, 1, 0, 1, 1)
+        self.queue.put(fields)
             
 
 
 class ResultsWriter(threading.Thread):
-    def __init__(self, queue, output_dir, console_logging):
+    def __init__(self, queue, output_dir, console_logging, segment_time=None):
         threading.Thread.__init__(self)
         self.queue = queue
         self.console_logging = console_logging
         self.output_dir = output_dir
+        self.segment_time = segment_time
+        self.stopping = False
         self.trans_count = 0
         self.timer_count = 0
         self.error_count = 0
+        self.timeout_count = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        
+        # capacity search steps, see start_step() and take_step()
+        self.step_lock = threading.Lock()
+        self.step_offsets = {}  # {step: secs from the start of the search to the start of the step}
+        self.step_samples = {}  # {step: [(elapsed in the step, scriptrun_time, error)]}, for steps not taken yet
+        self.idle = threading.Event()
         
         try:
             os.makedirs(self.output_dir, 0755)
@@ -303,20 +1033,67 @@ class ResultsWriter(threading.Thread):
             sys.exit(1)    
     
     def run(self):
-        with open(self.output_dir + 'results.csv', 'w') as f:     
+        f = segments.SegmentWriter(self.output_dir, 'results.csv', self.segment_time)
+        try:
             while True:
                 try:
-                    elapsed, epoch, self.user_group_name, scriptrun_time, error, custom_timers = self.queue.get(False)
+                    (elapsed, epoch, self.user_group_name, script_name, thread_num, scriptrun_time, error, 
+                     bytes_sent, bytes_received, status, custom_timers, step) = self.queue.get(False)
                     self.trans_count += 1
+                    self.bytes_sent += bytes_sent
+                    self.bytes_received += bytes_received
                     self.timer_count += len(custom_timers)
                     if error != '':
                         self.error_count += 1
-                    f.write('%i,%.3f,%i,%s,%f,%s,%s\n' % (self.trans_count, elapsed, epoch, self.user_group_name, scriptrun_time, error, repr(custom_timers)))
-                    f.flush()
+                    if error == results.TIMEOUT_ERROR:
+                        self.timeout_count += 1
+                    if step is not None:
+                        with self.step_lock:
+                            if step in self.step_samples:
+                                self.step_samples[step].append((elapsed, scriptrun_time, error != ''))
+                            # agents time each step from its own start, the results file from the start of the search
+                            elapsed += self.step_offsets[step]
+                    f.write('%i,%.3f,%i,%s,%s,%i,%f,%s,%i,%i,%s,%s\n' % (self.trans_count, elapsed, epoch, self.user_group_name, script_name, thread_num, scriptrun_time, error, bytes_sent, bytes_received, status, repr(custom_timers)), elapsed, epoch)
                     if self.console_logging:
-                        print '%i, %.3f, %i, %s, %.3f, %s, %s' % (self.trans_count, elapsed, epoch, self.user_group_name, scriptrun_time, error, repr(custom_timers))
+                        print '%i, %.3f, %i, %s, %s, %i, %.3f, %s, %i, %i, %s, %s' % (self.trans_count, elapsed, epoch, self.user_group_name, script_name, thread_num, scriptrun_time, error, bytes_sent, bytes_received, status, repr(custom_timers))
                 except Queue.Empty:
+                    self.idle.set()
+                    if self.stopping:
+                        break
                     time.sleep(.05)
+        finally:
+            f.close()
+    
+    def stop(self):
+        # drain the queue, close the last segment and wait for compression to finish
+        self.stopping = True
+        self.join()
+    
+    def drain(self):
+        # waits until everything already on the queue has been written
+        self.idle.clear()
+        while not self.idle.wait(.5):
+            pass
+    
+    def start_step(self, step, offset):
+        # call before the step's user groups start
+        with self.step_lock:
+            self.step_offsets[step] = offset
+            self.step_samples[step] = []
+    
+    def take_step(self, step, start, end):
+        # returns the transaction times and error count of the step's transactions that finished 
+        # between start and end (elapsed secs in the step), and stops collecting for the step
+        with self.step_lock:
+            samples = self.step_samples.pop(step, [])
+        trans_times = []
+        error_count = 0
+        for elapsed, scriptrun_time, error in samples:
+            if start <= elapsed < end:
+                trans_times.append(scriptrun_time)
+                if error:
+                    error_count += 1
+        return trans_times, error_count
 
 
 
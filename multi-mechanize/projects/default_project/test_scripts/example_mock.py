@@ -23,6 +23,7 @@ class Transaction(object):
         r = random.uniform(1, 2)
         time.sleep(r)
         self.custom_timers['Example_Timer'] = r
+        self.bytes_received = random.randint(1024, 65536)
         
 
  
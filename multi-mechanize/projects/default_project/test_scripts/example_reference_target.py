@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2010 Corey Goldberg (corey@goldb.org)
+#  License: GNU LGPLv3
+#
+#  This file is part of Multi-Mechanize
+#
+#
+#  runs against the loopback reference server, for offline benchmarking:
+#
+#    python lib/tools/reference_server.py --latency exp:0.05 --size uniform:512,8192
+#
+#  the Injected_Latency timer is the latency the server added, so it can be
+#  compared with the measured response times.
+
+
+import httplib
+
+
+
+class Transaction(object):
+    def __init__(self):
+        self.custom_timers = {}
+        self.conn = httplib.HTTPConnection('127.0.0.1', 8080)  # kept alive between runs
+
+    def run(self):
+        try:
+            self.conn.request('GET', '/')
+            resp = self.conn.getresponse()
+            content = resp.read()
+        except (httplib.HTTPException, IOError):
+            self.conn.close()  # reconnect on the next run
+            raise
+
+        self.custom_timers['Injected_Latency'] = float(resp.getheader('X-Injected-Latency', 0))
+        self.bytes_received = len(content)
+        self.status = resp.status
+
+        assert (resp.status == 200), 'Bad HTTP Response'
+
+
+if __name__ == '__main__':
+    trans = Transaction()
+    trans.run()
+    print trans.custom_timers